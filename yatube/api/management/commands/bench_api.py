@@ -0,0 +1,85 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+from django.urls import reverse
+
+from core.benchmark import format_timing, measure
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+# SQLite вставляет пачку одним составным SELECT не длиннее 500 строк.
+BATCH_SIZE = 400
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает скорость и размер ответов JSON API и HTML-страниц '
+            'с теми же постами. Данные откатываются после замера.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            reader, author, group, post = self.fill(options['posts'])
+            client = Client()
+            client.force_login(reader)
+            pages = (
+                ('Все посты', reverse('posts:index'),
+                 reverse('api:post_list')),
+                ('Группа', reverse('posts:group_posts', args=[group.slug]),
+                 reverse('api:group_posts', args=[group.slug])),
+                ('Профиль', reverse('posts:profile', args=[author.username]),
+                 reverse('api:profile_posts', args=[author.username])),
+                ('Подписки', reverse('posts:follow_index'),
+                 reverse('api:follow_posts')),
+                ('Пост', reverse('posts:post_detail', args=[post.pk]),
+                 reverse('api:post_detail', args=[post.pk])),
+            )
+            for label, html, api in pages:
+                self.stdout.write(f'{label}:')
+                for name, url in (('  HTML', html), ('  JSON', api)):
+                    size = len(client.get(url).content)
+                    seconds = measure(lambda: client.get(url),
+                                      options['repeat'])
+                    self.stdout.write(
+                        f'{format_timing(name, seconds)}, {size // 1024} КБ')
+                etag = client.get(api)['ETag']
+                seconds = measure(
+                    lambda: client.get(api, HTTP_IF_NONE_MATCH=etag),
+                    options['repeat'])
+                self.stdout.write(format_timing('  JSON 304', seconds))
+            transaction.set_rollback(True)
+
+    def fill(self, count):
+        rng = random.Random(0)
+        User.objects.bulk_create(
+            (User(username=f'bench-api-{number}', first_name='Имя',
+                  last_name=f'Фамилия {number}')
+             for number in range(200)),
+            batch_size=BATCH_SIZE)
+        authors = list(User.objects.filter(username__startswith='bench-api-'))
+        Group.objects.bulk_create(
+            (Group(title=f'Группа {number}', slug=f'bench-api-{number}',
+                   description='Описание')
+             for number in range(20)),
+            batch_size=BATCH_SIZE)
+        groups = list(Group.objects.filter(slug__startswith='bench-api-'))
+        Post.objects.bulk_create(
+            (Post(author=rng.choice(authors), group=rng.choice(groups),
+                  text=f'Пост номер {number} ' + 'текст ' * 50)
+             for number in range(count)),
+            batch_size=BATCH_SIZE)
+        reader = User.objects.create_user(username='bench-api-reader')
+        Follow.objects.bulk_create(
+            Follow(user=reader, author=author) for author in authors[:50])
+        post = Post.objects.filter(author__in=authors).latest('pk')
+        Comment.objects.bulk_create(
+            Comment(post=post, author=rng.choice(authors),
+                    text='Комментарий')
+            for _ in range(50))
+        return reader, authors[0], groups[0], post
@@ -0,0 +1,117 @@
+"""Представление постов, групп, авторов и комментариев в JSON.
+
+Посты читаются через values() только с нужными колонками, без создания
+моделей. Авторы и группы страницы загружаются одним запросом на каждую
+модель по собранным id, а не соединением для каждой строки.
+"""
+from django.contrib.auth import get_user_model
+
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+# Поле в ответе -> колонка в values().
+POST_FIELDS = {
+    'id': 'pk',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author_id',
+    'group': 'group_id',
+    'image': 'image',
+}
+
+
+def parse_fields(value):
+    """Поля поста из параметра fields=id,text,...; по умолчанию все."""
+    if not value:
+        return list(POST_FIELDS)
+    fields = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in fields if name not in POST_FIELDS]
+    if unknown:
+        raise ValueError(f'Неизвестные поля: {", ".join(unknown)}')
+    return fields
+
+
+def author_data(author):
+    return {
+        'username': author['username'],
+        'full_name': f'{author["first_name"]} {author["last_name"]}'.strip(),
+    }
+
+
+def group_data(group):
+    return {
+        'slug': group['slug'],
+        'title': group['title'],
+    }
+
+
+def load_authors(ids):
+    return {
+        author['pk']: author_data(author)
+        for author in User.objects.filter(pk__in=ids).values(
+            'pk', 'username', 'first_name', 'last_name')
+    }
+
+
+def load_groups(ids):
+    return {
+        group['pk']: group_data(group)
+        for group in Group.objects.filter(pk__in=ids).values(
+            'pk', 'slug', 'title')
+    }
+
+
+def image_url(name):
+    if not name:
+        return None
+    return Post._meta.get_field('image').storage.url(name)
+
+
+def serialize_posts(pks, fields):
+    """Посты с id из pks в том же порядке, только с полями fields."""
+    columns = {'pk'} | {POST_FIELDS[name] for name in fields}
+    rows = {
+        row['pk']: row
+        for row in Post.objects.filter(pk__in=pks).order_by().values(
+            *columns)
+    }
+    authors = groups = {}
+    if 'author' in fields:
+        authors = load_authors({row['author_id'] for row in rows.values()})
+    if 'group' in fields:
+        groups = load_groups({row['group_id'] for row in rows.values()
+                              if row['group_id'] is not None})
+    results = []
+    for pk in pks:
+        row = rows.get(pk)
+        if row is None:
+            continue
+        data = {}
+        for name in fields:
+            value = row[POST_FIELDS[name]]
+            if name == 'author':
+                value = authors.get(value)
+            elif name == 'group':
+                value = groups.get(value)
+            elif name == 'image':
+                value = image_url(value)
+            data[name] = value
+        results.append(data)
+    return results
+
+
+def serialize_comments(post_id):
+    comments = list(
+        Comment.objects.filter(post_id=post_id).order_by('created', 'pk')
+        .values('pk', 'author_id', 'text', 'created'))
+    authors = load_authors({comment['author_id'] for comment in comments})
+    return [
+        {
+            'id': comment['pk'],
+            'author': authors.get(comment['author_id']),
+            'text': comment['text'],
+            'created': comment['created'],
+        }
+        for comment in comments
+    ]
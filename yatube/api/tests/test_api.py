@@ -0,0 +1,94 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='leo', first_name='Лев', last_name='Толстой')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug',
+            description='Тестовое описание')
+        cls.posts = [
+            Post.objects.create(author=cls.author, text=f'Пост {number}',
+                                group=cls.group if number % 2 else None)
+            for number in range(5)
+        ]
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.reader, text='Комментарий')
+
+    def setUp(self):
+        self.client = Client()
+
+    def get(self, name, *args, **params):
+        return self.client.get(reverse(f'api:{name}', args=args), params)
+
+    def test_post_list_with_cursor(self):
+        seen = []
+        cursor = ''
+        while True:
+            data = self.get('post_list', limit=2, cursor=cursor).json()
+            seen += [post['id'] for post in data['results']]
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(seen, [post.pk for post in reversed(self.posts)])
+
+    def test_post_fields(self):
+        latest, post = self.get('post_list', limit=2).json()['results']
+        self.assertEqual(post['author'],
+                         {'username': 'leo', 'full_name': 'Лев Толстой'})
+        self.assertEqual(post['group'],
+                         {'slug': 'test-slug', 'title': 'Тестовая группа'})
+        self.assertIsNone(latest['group'])
+        self.assertIsNone(post['image'])
+        data = self.get('post_list', fields='id,text').json()
+        self.assertEqual(set(data['results'][0]), {'id', 'text'})
+        response = self.get('post_list', fields='id,password')
+        self.assertEqual(response.status_code, 400)
+
+    def test_group_and_profile_feeds(self):
+        data = self.get('group_posts', 'test-slug', fields='id').json()
+        self.assertEqual(data['group']['slug'], 'test-slug')
+        self.assertEqual([post['id'] for post in data['results']],
+                         [self.posts[3].pk, self.posts[1].pk])
+        data = self.get('profile_posts', 'leo', fields='id').json()
+        self.assertEqual(data['author']['full_name'], 'Лев Толстой')
+        self.assertEqual(len(data['results']), 5)
+        self.assertEqual(
+            self.get('group_posts', 'missing').status_code, 404)
+
+    def test_follow_feed(self):
+        self.assertEqual(self.get('follow_posts').status_code, 401)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.client.force_login(self.reader)
+        data = self.get('follow_posts', fields='id', limit=3).json()
+        self.assertEqual([post['id'] for post in data['results']],
+                         [post.pk for post in self.posts[:1:-1]])
+        self.assertIsNotNone(data['next_cursor'])
+
+    def test_post_detail(self):
+        data = self.get('post_detail', self.posts[0].pk).json()
+        self.assertEqual(data['text'], 'Пост 0')
+        self.assertEqual(
+            [(comment['author']['username'], comment['text'])
+             for comment in data['comments']],
+            [('reader', 'Комментарий')])
+        self.assertEqual(self.get('post_detail', 0).status_code, 404)
+
+    def test_etag(self):
+        url = reverse('api:post_detail', args=[self.posts[0].pk])
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.filter(pk=self.posts[0].pk).update(text='Новый текст')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,131 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.feeds import author_scope, group_scope
+from posts.models import Follow, Group, GroupFollow, Post
+from posts.poll import check_new
+
+User = get_user_model()
+
+
+@override_settings(POLL_LIMIT=3)
+class PollTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='leo')
+        cls.other = User.objects.create_user(username='other')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug',
+            description='Тестовое описание')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self):
+        connection.run_on_commit = []
+        cache.clear()
+        self.client = Client()
+
+    def commit(self):
+        """Выполняет отложенные on_commit: TestCase не фиксирует
+        транзакцию и сам их не запускает."""
+        callbacks, connection.run_on_commit = connection.run_on_commit, []
+        for _, callback in callbacks:
+            callback()
+
+    def poll(self, name, *args, since=None):
+        return self.client.get(reverse(f'api:{name}', args=args),
+                               {'since': since or self.post.pk})
+
+    def publish(self, count, **fields):
+        posts = [
+            Post.objects.create(text=f'Новый {number}', **{
+                'author': self.author, **fields})
+            for number in range(count)
+        ]
+        self.commit()
+        return posts
+
+    def test_nothing_new_without_queries(self):
+        self.poll('post_list_poll')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.poll('post_list_poll').status_code, 304)
+        self.poll('profile_posts_poll', 'leo')
+        with self.assertNumQueries(0):
+            response = self.poll('profile_posts_poll', 'leo')
+        self.assertEqual(response.status_code, 304)
+
+    def test_new_posts_are_counted_up_to_limit(self):
+        self.poll('post_list_poll')
+        posts = self.publish(2)
+        self.assertEqual(self.poll('post_list_poll').json(), {
+            'count': 2, 'newest_id': posts[-1].pk, 'more': False})
+        posts = self.publish(2)
+        self.assertEqual(self.poll('post_list_poll').json(), {
+            'count': 3, 'newest_id': posts[-1].pk, 'more': True})
+        self.assertEqual(
+            self.poll('post_list_poll', since=posts[-1].pk).status_code, 304)
+
+    def test_group_and_profile_scopes(self):
+        self.publish(1, author=self.other)
+        self.assertEqual(
+            self.poll('group_posts_poll', 'test-slug').status_code, 304)
+        self.assertEqual(
+            self.poll('profile_posts_poll', 'leo').status_code, 304)
+        self.assertEqual(
+            self.poll('profile_posts_poll', 'other').json()['count'], 1)
+        self.publish(1, group=self.group)
+        self.assertEqual(
+            self.poll('group_posts_poll', 'test-slug').json()['count'], 1)
+        self.assertEqual(
+            self.poll('group_posts_poll', 'missing').status_code, 404)
+
+    def test_renamed_scopes_stop_answering(self):
+        """После смены slug или username старый адрес отвечает 404"""
+        self.poll('group_posts_poll', 'test-slug')
+        self.poll('profile_posts_poll', 'other')
+        group = Group.objects.get(pk=self.group.pk)
+        group.slug = 'new-slug'
+        group.save()
+        other = User.objects.get(pk=self.other.pk)
+        other.username = 'renamed'
+        other.save()
+        self.commit()
+        self.assertEqual(
+            self.poll('group_posts_poll', 'test-slug').status_code, 404)
+        self.assertEqual(
+            self.poll('profile_posts_poll', 'other').status_code, 404)
+        self.assertEqual(
+            self.poll('group_posts_poll', 'new-slug').status_code, 304)
+        self.assertEqual(
+            self.poll('profile_posts_poll', 'renamed').status_code, 304)
+
+    def test_follow_feed(self):
+        self.assertEqual(self.poll('follow_posts_poll').status_code, 401)
+        self.client.force_login(self.reader)
+        self.publish(1, author=self.other)
+        self.assertEqual(self.poll('follow_posts_poll').status_code, 304)
+        Follow.objects.create(user=self.reader, author=self.other)
+        GroupFollow.objects.create(user=self.reader, group=self.group)
+        self.commit()
+        self.publish(1, group=self.group)
+        self.assertEqual(self.poll('follow_posts_poll').json()['count'], 2)
+
+    def test_many_scopes_read_cache_in_bulk(self):
+        """Опрос по сотне подписок читает кеш двумя get_many"""
+        scopes = [author_scope(pk) for pk in range(1, 101)] + [
+            group_scope(pk) for pk in range(1, 21)]
+        check_new(scopes, self.post.pk)
+        with mock.patch.object(cache, 'get_many',
+                               wraps=cache.get_many) as get_many, \
+                mock.patch.object(cache, 'get_or_set',
+                                  wraps=cache.get_or_set) as get_or_set, \
+                self.assertNumQueries(0):
+            self.assertIsNone(check_new(scopes, self.post.pk))
+        self.assertEqual(get_many.call_count, 2)
+        get_or_set.assert_not_called()
@@ -0,0 +1,28 @@
+from django.urls import path
+
+from . import views
+
+
+app_name = 'api'
+
+urlpatterns = [
+    path('posts/', views.post_list, name='post_list'),
+    path('posts/poll/', views.post_list_poll, name='post_list_poll'),
+    path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path('groups/<slug:slug>/posts/', views.group_posts, name='group_posts'),
+    path(
+        'groups/<slug:slug>/posts/poll/',
+        views.group_posts_poll,
+        name='group_posts_poll'),
+    path(
+        'profiles/<str:username>/posts/',
+        views.profile_posts,
+        name='profile_posts'),
+    path(
+        'profiles/<str:username>/posts/poll/',
+        views.profile_posts_poll,
+        name='profile_posts_poll'),
+    path('follow/', views.follow_posts, name='follow_posts'),
+    path('follow/poll/', views.follow_posts_poll, name='follow_posts_poll'),
+    path('export/', views.export, name='export'),
+]
@@ -0,0 +1,164 @@
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import (HttpResponseNotModified, JsonResponse,
+                         StreamingHttpResponse)
+from django.utils.cache import get_conditional_response, set_response_etag
+
+from posts.export import export_lines, gzip_stream
+from posts.feed import FollowFeed, page_keys
+from posts.feeds import INDEX
+from posts.models import Group, Post, User
+from posts.poll import (author_scopes, check_new, follow_scopes,
+                        group_scopes)
+from posts.utils import decode_date_cursor, encode_cursor
+from .serializers import (author_data, group_data, parse_fields,
+                          serialize_comments, serialize_posts)
+
+
+def api_error(message, status):
+    return JsonResponse({'error': message}, status=status)
+
+
+def json_response(request, data):
+    """Ответ с ETag; на совпавший If-None-Match отдает 304 без тела."""
+    response = JsonResponse(data, json_dumps_params={'ensure_ascii': False})
+    set_response_etag(response)
+    return get_conditional_response(
+        request, etag=response['ETag'], response=response)
+
+
+def feed_response(request, posts, **extra):
+    """Страница ленты постов с курсором следующей страницы."""
+    try:
+        fields = parse_fields(request.GET.get('fields'))
+    except ValueError as error:
+        return api_error(str(error), 400)
+    try:
+        limit = int(request.GET.get('limit', settings.POSTS_LIMIT))
+    except ValueError:
+        return api_error('limit должен быть числом', 400)
+    limit = min(max(limit, 1), settings.API_LIMIT_MAX)
+    keys = page_keys(
+        posts, limit + 1, decode_date_cursor(request.GET.get('cursor')))
+    next_cursor = None
+    if len(keys) > limit:
+        pub_date, pk = keys[limit - 1]
+        next_cursor = encode_cursor(pub_date.isoformat(), pk)
+    data = {
+        **extra,
+        'results': serialize_posts([pk for _, pk in keys[:limit]], fields),
+        'next_cursor': next_cursor,
+    }
+    return json_response(request, data)
+
+
+def post_list(request):
+    return feed_response(request, Post.objects.all())
+
+
+def group_posts(request, slug):
+    group = Group.objects.filter(slug=slug).values(
+        'pk', 'slug', 'title').first()
+    if group is None:
+        return api_error('Группа не найдена', 404)
+    return feed_response(
+        request,
+        Post.objects.filter(group_id=group['pk']),
+        group=group_data(group),
+    )
+
+
+def profile_posts(request, username):
+    author = User.objects.filter(username=username).values(
+        'pk', 'username', 'first_name', 'last_name').first()
+    if author is None:
+        return api_error('Пользователь не найден', 404)
+    return feed_response(
+        request,
+        Post.objects.filter(author_id=author['pk']),
+        author=author_data(author),
+    )
+
+
+def follow_posts(request):
+    if not request.user.is_authenticated:
+        return api_error('Нужна авторизация', 401)
+    return feed_response(request, FollowFeed(request.user))
+
+
+def post_detail(request, post_id):
+    try:
+        fields = parse_fields(request.GET.get('fields'))
+    except ValueError as error:
+        return api_error(str(error), 400)
+    posts = serialize_posts([post_id], fields)
+    if not posts:
+        return api_error('Запись не найдена', 404)
+    data = {
+        **posts[0],
+        'comments': serialize_comments(post_id),
+    }
+    return json_response(request, data)
+
+
+def poll_response(request, scopes):
+    """Сколько постов новее ?since=<id> и id новейшего; 304, если новых
+    нет. Обычный ответ «ничего нового» берется из кеша без базы."""
+    try:
+        since = int(request.GET.get('since', 0))
+    except ValueError:
+        return api_error('since должен быть числом', 400)
+    found = check_new(scopes, since)
+    if found is None:
+        return HttpResponseNotModified()
+    count, newest_id = found
+    return JsonResponse({
+        'count': count,
+        'newest_id': newest_id,
+        'more': count >= settings.POLL_LIMIT,
+    })
+
+
+def post_list_poll(request):
+    return poll_response(request, [INDEX])
+
+
+def group_posts_poll(request, slug):
+    scopes = group_scopes(slug)
+    if scopes is None:
+        return api_error('Группа не найдена', 404)
+    return poll_response(request, scopes)
+
+
+def profile_posts_poll(request, username):
+    scopes = author_scopes(username)
+    if scopes is None:
+        return api_error('Пользователь не найден', 404)
+    return poll_response(request, scopes)
+
+
+def follow_posts_poll(request):
+    if not request.user.is_authenticated:
+        return api_error('Нужна авторизация', 401)
+    return poll_response(request, follow_scopes(request.user))
+
+
+@staff_member_required
+def export(request):
+    """Выгрузка постов и комментариев в JSON Lines, по желанию в gzip."""
+    author = None
+    if request.GET.get('author'):
+        author = User.objects.filter(username=request.GET['author']).first()
+        if author is None:
+            return api_error('Пользователь не найден', 404)
+    lines = export_lines(author, request.GET.get('comments') != '0')
+    filename = f'{author.username if author else "posts"}.jsonl'
+    if request.GET.get('gzip') == '1':
+        response = StreamingHttpResponse(
+            gzip_stream(lines), content_type='application/gzip')
+        filename += '.gz'
+    else:
+        response = StreamingHttpResponse(
+            lines, content_type='application/x-ndjson; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,152 @@
+"""Основа для списков админки на больших таблицах.
+
+Списки не считают COUNT(*) по всей таблице, ищут по префиксу через
+диапазон по индексу, а навигация по датам проверяет наличие записей
+в каждом периоде запросом-диапазоном вместо DISTINCT по всей выборке.
+"""
+import datetime
+
+from django.conf import settings
+from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections, models
+from django.db.models import Max, Q
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+MAX_CHAR = '\U0010ffff'
+
+
+def prefix_q(field, prefix):
+    """Условие «начинается с» в виде диапазона, который идет по индексу.
+
+    В отличие от LIKE 'prefix%' регистр учитывается.
+    """
+    return Q(**{f'{field}__gte': prefix, f'{field}__lt': prefix + MAX_CHAR})
+
+
+def estimate_count(queryset):
+    """Примерное число строк таблицы без полного прохода по ней."""
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+        if row and row[0] >= 0:
+            return int(row[0])
+    # MAX по первичному ключу читает одну строку индекса; удаленные
+    # записи дают завышенную оценку, и последние страницы будут пустыми.
+    return queryset.model._default_manager.using(queryset.db).aggregate(
+        last=Max('pk'))['last'] or 0
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор, который не считает точно большие выборки.
+
+    Для таблицы без фильтров берется оценка, для отфильтрованной выборки
+    счет останавливается на count_limit.
+    """
+    count_limit = 10000
+
+    @cached_property
+    def count(self):
+        if not self.object_list.query.where:
+            return estimate_count(self.object_list)
+        return self.object_list[:self.count_limit].count()
+
+
+def _next_period(day, kind):
+    if kind == 'year':
+        return day.replace(year=day.year + 1)
+    if kind == 'month':
+        return (day.replace(day=28) + datetime.timedelta(days=4)).replace(
+            day=1)
+    return day + datetime.timedelta(days=1)
+
+
+def _truncate(day, kind):
+    if kind == 'year':
+        return day.replace(month=1, day=1)
+    if kind == 'month':
+        return day.replace(day=1)
+    return day
+
+
+class RangeDatesQuerySet(models.QuerySet):
+    """QuerySet, у которого dates() проверяет периоды по индексу.
+
+    Обычный dates() группирует все строки выборки по усеченной дате.
+    Здесь границы берутся из первой и последней записи, а каждый год,
+    месяц или день проверяется отдельным exists() по диапазону.
+    """
+
+    def dates(self, field_name, kind, order='ASC'):
+        ordered = self.order_by(field_name).values_list(field_name, flat=True)
+        first, last = ordered.first(), ordered.last()
+        if first is None:
+            return []
+        is_datetime = isinstance(
+            self.model._meta.get_field(field_name), models.DateTimeField)
+        if is_datetime:
+            first, last = self._local_date(first), self._local_date(last)
+        periods = []
+        start = _truncate(first, kind)
+        while start <= last:
+            end = _next_period(start, kind)
+            bounds = (start, end)
+            if is_datetime:
+                bounds = tuple(self._day_start(day) for day in bounds)
+            if self.filter(**{f'{field_name}__gte': bounds[0],
+                              f'{field_name}__lt': bounds[1]}).exists():
+                periods.append(start)
+            start = end
+        return periods if order == 'ASC' else periods[::-1]
+
+    @staticmethod
+    def _local_date(value):
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        return value.date()
+
+    @staticmethod
+    def _day_start(day):
+        value = datetime.datetime.combine(day, datetime.time.min)
+        return timezone.make_aware(value) if settings.USE_TZ else value
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Админка для таблиц на миллионы строк.
+
+    prefix_search_fields — поля, по префиксу которых идет поиск. Для пути
+    вида 'author__username' сначала ищутся связанные записи, затем
+    выборка фильтруется по их id.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    prefix_search_fields = ()
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        return RangeDatesQuerySet(queryset.model, queryset.query,
+                                  queryset.db)
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        return queryset.filter(self.search_condition(search_term)), False
+
+    def search_condition(self, search_term):
+        condition = Q(pk__in=[])
+        for path in self.prefix_search_fields:
+            relation, _, field = path.partition('__')
+            if not field:
+                condition |= prefix_q(path, search_term)
+                continue
+            related = self.model._meta.get_field(relation).related_model
+            matches = related._default_manager.filter(
+                prefix_q(field, search_term)).values('pk')
+            condition |= Q(**{f'{relation}__in': matches})
+        return condition
@@ -0,0 +1,14 @@
+import time
+
+
+def measure(func, repeat=100):
+    """Вызывает func repeat раз и возвращает среднее время вызова, сек."""
+    func()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat
+
+
+def format_timing(label, seconds):
+    return f'{label}: {seconds * 1000:.3f} мс/запрос, {1 / seconds:.0f} rps'
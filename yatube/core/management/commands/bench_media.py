@@ -0,0 +1,57 @@
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+from django.views.static import serve
+
+from core.benchmark import format_timing, measure
+from core.media import serve_media
+
+
+def consume(response):
+    for _ in response:
+        pass
+    response.close()
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает отдачу медиафайлов через django.views.static '
+            'и через serve_media в разных режимах.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=200 * 1024,
+                            help='Размер тестового файла, байт.')
+        parser.add_argument('--repeat', type=int, default=500)
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        with tempfile.TemporaryDirectory() as media_root:
+            name = 'cache/ab/cd/bench.jpg'
+            os.makedirs(os.path.join(media_root, 'cache/ab/cd'))
+            with open(os.path.join(media_root, name), 'wb') as file:
+                file.write(os.urandom(options['size']))
+
+            def run_static():
+                consume(serve(factory.get('/'), name,
+                              document_root=media_root))
+
+            def run_media():
+                consume(serve_media(factory.get('/'), name))
+
+            def run_range():
+                consume(serve_media(
+                    factory.get('/', HTTP_RANGE='bytes=0-65535'), name))
+
+            cases = [('static()', run_static, {})]
+            for mode in ('sendfile', 'x-accel-redirect', 'x-sendfile'):
+                cases.append((f'serve_media [{mode}]', run_media,
+                              {'MEDIA_SERVE_MODE': mode}))
+            cases.append(('serve_media [sendfile, Range 64K]', run_range,
+                          {'MEDIA_SERVE_MODE': 'sendfile'}))
+            self.stdout.write(f'Файл: {options["size"]} байт, '
+                              f'{options["repeat"]} запросов')
+            for label, func, overrides in cases:
+                with override_settings(MEDIA_ROOT=media_root, **overrides):
+                    seconds = measure(func, options['repeat'])
+                self.stdout.write(format_timing(label, seconds))
@@ -0,0 +1,210 @@
+import mimetypes
+import os
+import posixpath
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (FileResponse, Http404, HttpResponse,
+                         StreamingHttpResponse)
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+from sorl.thumbnail.conf import settings as thumbnail_settings
+
+from .middleware import accepted_encodings
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+# Имена статики после ManifestStaticFilesStorage: name.<12 hex>.ext.
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+
+
+class RangeFileWrapper:
+    """Отдает кусок файла блоками, не читая его целиком."""
+
+    def __init__(self, filelike, offset, length, block_size=64 * 1024):
+        self.filelike = filelike
+        self.offset = offset
+        self.remaining = length
+        self.block_size = block_size
+
+    def __iter__(self):
+        self.filelike.seek(self.offset)
+        while self.remaining > 0:
+            data = self.filelike.read(min(self.block_size, self.remaining))
+            if not data:
+                break
+            self.remaining -= len(data)
+            yield data
+
+    def close(self):
+        self.filelike.close()
+
+
+def parse_range(header, size):
+    """Разбирает заголовок Range с одним диапазоном.
+
+    Возвращает (start, end) включительно, None для заголовка, который надо
+    проигнорировать, и False для диапазона за пределами файла.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def if_range_matches(request, etag, last_modified):
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def cache_control(name):
+    if name.startswith(thumbnail_settings.THUMBNAIL_PREFIX):
+        return f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    return f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}'
+
+
+def static_cache_control(name):
+    if HASHED_NAME_RE.search(name):
+        return f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    return f'public, max-age={settings.STATIC_CACHE_MAX_AGE}'
+
+
+def content_headers(name):
+    """Content-Type и Content-Encoding по имени файла."""
+    content_type, encoding = mimetypes.guess_type(name)
+    return content_type or 'application/octet-stream', encoding
+
+
+def file_response(request, fullpath, name, st, mode='sendfile',
+                  headers=None):
+    content_type, encoding = headers or content_headers(fullpath)
+    if mode == 'x-accel-redirect':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = quote(
+            settings.MEDIA_ACCEL_REDIRECT_PREFIX + name)
+        return response
+    if mode == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = fullpath
+        return response
+    byte_range = None
+    if 'HTTP_RANGE' in request.META and if_range_matches(
+            request, etag_for(st), int(st.st_mtime)):
+        byte_range = parse_range(request.META['HTTP_RANGE'], st.st_size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{st.st_size}'
+        return response
+    if byte_range is None:
+        # FileResponse отдает файл через wsgi.file_wrapper, который
+        # у gunicorn и uwsgi реализован на os.sendfile.
+        response = FileResponse(open(fullpath, 'rb'),
+                                content_type=content_type)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            RangeFileWrapper(open(fullpath, 'rb'), start, length),
+            status=206,
+            content_type=content_type,
+        )
+        response['Content-Length'] = str(length)
+        response['Content-Range'] = f'bytes {start}-{end}/{st.st_size}'
+    if encoding:
+        response['Content-Encoding'] = encoding
+    return response
+
+
+def etag_for(st):
+    return f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+
+
+def find_file(root, path):
+    name = posixpath.normpath(path).lstrip('/')
+    try:
+        fullpath = safe_join(root, name)
+        st = os.stat(fullpath)
+    except (SuspiciousFileOperation, OSError, ValueError):
+        raise Http404('Файл не найден')
+    if not stat.S_ISREG(st.st_mode):
+        raise Http404('Файл не найден')
+    return name, fullpath, st
+
+
+def serve_file(request, fullpath, name, st, mode='sendfile', headers=None):
+    etag = etag_for(st)
+    last_modified = int(st.st_mtime)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = file_response(request, fullpath, name, st, mode,
+                                 headers)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def serve_media(request, path):
+    """Отдает файлы из MEDIA_ROOT в боевом режиме.
+
+    В зависимости от MEDIA_SERVE_MODE передача байтов поручается
+    фронтовому серверу (X-Accel-Redirect, X-Sendfile) или выполняется
+    самим процессом через sendfile.
+    """
+    name, fullpath, st = find_file(settings.MEDIA_ROOT, path)
+    response = serve_file(request, fullpath, name, st,
+                          settings.MEDIA_SERVE_MODE)
+    response['Cache-Control'] = cache_control(name)
+    return response
+
+
+def serve_static(request, path):
+    """Отдает собранную collectstatic статику в боевом режиме.
+
+    Клиенту, который принимает br или gzip, достается заранее сжатая
+    копия name.br или name.gz, если она есть (см.
+    CompressedManifestStaticFilesStorage). Тип берется по исходному
+    имени, а кодировка — по выбранной копии: mimetypes до Python 3.9 не
+    знает суффикс .br. Файлы с хешем содержимого в имени кешируются
+    навсегда.
+    """
+    name, fullpath, st = find_file(settings.STATIC_ROOT, path)
+    encodings = accepted_encodings(
+        request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    headers = content_headers(name)
+    compressed = False
+    for encoding, suffix in PRECOMPRESSED:
+        if encoding not in encodings:
+            continue
+        try:
+            st = os.stat(fullpath + suffix)
+        except OSError:
+            continue
+        fullpath += suffix
+        headers = (headers[0], encoding)
+        compressed = True
+        break
+    response = serve_file(request, fullpath, name, st, headers=headers)
+    if compressed or os.path.exists(fullpath + '.gz'):
+        patch_vary_headers(response, ('Accept-Encoding',))
+    response['Cache-Control'] = static_cache_control(name)
+    return response
@@ -0,0 +1,81 @@
+import gzip
+import hashlib
+import os
+import re
+import uuid
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.storage import FileSystemStorage
+
+from .middleware import brotli
+
+SHARDED_NAME_RE = re.compile(r'(^|/)[0-9a-f]{2}/[0-9a-f]{2}/[^/]+$')
+# Какие статические файлы сжимать заранее: картинки и шрифты уже сжаты.
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.txt', '.xml', '.map',
+                           '.json', '.ico')
+
+
+def shard_name(name, token=None):
+    """Раскладывает файл по двухуровневым каталогам: dir/ab/cd/file.
+
+    Без token префикс берется из md5 имени, поэтому для одного и того же
+    файла путь всегда получается одинаковым.
+    """
+    dirname, filename = os.path.split(name)
+    if token is None:
+        token = hashlib.md5(name.encode()).hexdigest()
+    return os.path.join(dirname, token[:2], token[2:4], filename)
+
+
+def is_sharded(name):
+    """Проверяет, лежит ли файл уже в шардированном каталоге."""
+    return bool(SHARDED_NAME_RE.search(name))
+
+
+class ShardedFileSystemStorage(FileSystemStorage):
+    """Хранилище, которое кладет новые загрузки в каталоги вида ab/cd/.
+
+    Так в одном каталоге не скапливаются сотни тысяч файлов. Префикс
+    случайный, чтобы одинаковые имена вроде image.jpg не попадали
+    в один и тот же каталог.
+    """
+
+    def generate_filename(self, filename):
+        filename = super().generate_filename(filename)
+        return shard_name(filename, uuid.uuid4().hex)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Статика с хешем содержимого в имени и заранее сжатыми копиями.
+
+    collectstatic пишет рядом с каждым файлом с хешем name.gz и, если
+    установлен brotli, name.br — с наибольшим сжатием, раз и навсегда.
+    Копия сохраняется, только если она меньше оригинала.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        # CSS со ссылками обрабатывается в несколько проходов; сжимать
+        # нужно имя из последнего.
+        hashed_names = {}
+        for name, hashed_name, processed in super().post_process(
+                paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_names[name] = hashed_name
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for hashed_name in hashed_names.values():
+            if hashed_name.endswith(COMPRESSIBLE_EXTENSIONS):
+                self.compress(hashed_name)
+
+    def compress(self, name):
+        path = self.path(name)
+        with open(path, 'rb') as source:
+            content = source.read()
+        variants = [('.gz', gzip.compress(content, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(content, quality=11)))
+        for suffix, compressed in variants:
+            if len(compressed) < len(content):
+                with open(path + suffix, 'wb') as target:
+                    target.write(compressed)
@@ -1,4 +1,10 @@
 from django import template
+from django.urls import reverse
+from django.utils.html import conditional_escape, format_html
+from django.utils.safestring import mark_safe
+
+from posts.tags import TAG_RE
+from posts.utils import encode_cursor
 
 
 register = template.Library()
@@ -7,3 +13,37 @@ register = template.Library()
 @register.filter
 def addclass(field, css):
     return field.as_widget(attrs={'class': css})
+
+
+@register.simple_tag(takes_context=True)
+def replace_query(context, **kwargs):
+    """Текущая строка запроса с замененными параметрами."""
+    query = context['request'].GET.copy()
+    for key, value in kwargs.items():
+        query[key] = value
+    return query.urlencode()
+
+
+@register.filter
+def page_cursor(page):
+    """Курсор ленты после последнего поста страницы: с него фрагменты
+    продолжают ленту без перезагрузки."""
+    post = page[len(page) - 1]
+    return encode_cursor(post.pub_date.isoformat(), post.pk)
+
+
+@register.filter(needs_autoescape=True)
+def hashtags(text, autoescape=True):
+    """Текст со ссылками на ленты хештегов."""
+    escape = conditional_escape if autoescape else str
+    parts = []
+    position = 0
+    for match in TAG_RE.finditer(text):
+        parts.append(escape(text[position:match.start()]))
+        parts.append(format_html(
+            '<a href="{}">{}</a>',
+            reverse('posts:tag_posts', args=[match.group(1).lower()]),
+            match.group()))
+        position = match.end()
+    parts.append(escape(text[position:]))
+    return mark_safe(''.join(parts))
@@ -0,0 +1,141 @@
+import gzip
+import json
+import mimetypes
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+TEMP_STATIC_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class CompressionMiddlewareTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        author = User.objects.create_user(username='leo')
+        Post.objects.bulk_create(
+            Post(author=author, text='Длинный текст поста ' * 20)
+            for _ in range(10))
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_large_page_is_gzipped(self):
+        """Страница больше порога сжимается для клиентов с gzip"""
+        url = reverse('posts:index')
+        plain = self.client.get(url)
+        self.assertNotIn('Content-Encoding', plain)
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertEqual(int(response['Content-Length']),
+                         len(response.content))
+
+    def test_rejected_and_small_responses_are_not_compressed(self):
+        """gzip;q=0 и короткие ответы отдаются как есть"""
+        response = self.client.get(
+            reverse('posts:index'), HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertNotIn('Content-Encoding', response)
+        with override_settings(COMPRESS_MIN_SIZE=10 ** 7):
+            response = self.client.get(
+                reverse('posts:index'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', response)
+
+    def test_etag_still_matches(self):
+        """Сжатый ответ API получает слабый ETag, и 304 продолжают работать"""
+        url = reverse('api:post_list')
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        response = self.client.get(
+            url, HTTP_ACCEPT_ENCODING='gzip',
+            HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+
+@override_settings(
+    STATIC_ROOT=TEMP_STATIC_ROOT,
+    STATICFILES_STORAGE='core.storage.CompressedManifestStaticFilesStorage')
+class CompressedStaticTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, verbosity=0,
+                     stdout=StringIO())
+        with open(os.path.join(TEMP_STATIC_ROOT, 'staticfiles.json')) as f:
+            cls.css = json.load(f)['paths']['css/bootstrap.min.css']
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_STATIC_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_collectstatic_writes_hashed_gzip_copy(self):
+        """collectstatic пишет файл с хешем и его gzip-копию"""
+        path = os.path.join(TEMP_STATIC_ROOT, self.css)
+        self.assertRegex(self.css, r'\.[0-9a-f]{12}\.css$')
+        with open(path, 'rb') as original, gzip.open(path + '.gz') as copy:
+            self.assertEqual(copy.read(), original.read())
+        self.assertFalse(os.path.exists(
+            os.path.join(TEMP_STATIC_ROOT, 'img/logo.png.gz')))
+
+    def test_precompressed_copy_is_served(self):
+        """Клиент с gzip получает готовую копию, хешированный файл
+        кешируется навсегда"""
+        url = settings.STATIC_URL + self.css
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('immutable', response['Cache-Control'])
+        with open(os.path.join(TEMP_STATIC_ROOT, self.css), 'rb') as f:
+            self.assertEqual(
+                gzip.decompress(b''.join(response.streaming_content)),
+                f.read())
+        response.close()
+        response = self.client.get(
+            settings.STATIC_URL + 'css/bootstrap.min.css')
+        self.assertNotIn('Content-Encoding', response)
+        self.assertNotIn('immutable', response['Cache-Control'])
+        response.close()
+
+    def test_brotli_copy_headers_do_not_depend_on_mimetypes(self):
+        """Тип .br-копии берется по исходному имени: mimetypes до
+        Python 3.9 не знает суффикс .br"""
+        path = os.path.join(TEMP_STATIC_ROOT, self.css)
+        shutil.copyfile(path + '.gz', path + '.br')
+        self.addCleanup(os.remove, path + '.br')
+        encodings_map = {
+            suffix: encoding
+            for suffix, encoding in mimetypes.encodings_map.items()
+            if suffix != '.br'
+        }
+        with mock.patch.dict(mimetypes.encodings_map, encodings_map,
+                             clear=True):
+            response = self.client.get(settings.STATIC_URL + self.css,
+                                       HTTP_ACCEPT_ENCODING='br, gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        response.close()
+
+    def test_pages_render_with_manifest(self):
+        """Страницы ссылаются только на статику из манифеста: иначе без
+        DEBUG шаблон падает с ошибкой"""
+        for url in (reverse('posts:index'), reverse('users:login'),
+                    reverse('about:author')):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, self.css)
@@ -0,0 +1,91 @@
+import os
+import shutil
+import tempfile
+from http import HTTPStatus
+
+from django.conf import settings
+from django.test import Client, TestCase, override_settings
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, MEDIA_SERVE_MODE='sendfile')
+class ServeMediaTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.content = bytes(range(256)) * 4
+        os.makedirs(os.path.join(TEMP_MEDIA_ROOT, 'cache/ab/cd'))
+        for name in ('posts/ab/cd/pic.jpg', 'cache/ab/cd/thumb.jpg'):
+            os.makedirs(os.path.join(TEMP_MEDIA_ROOT, os.path.dirname(name)),
+                        exist_ok=True)
+            with open(os.path.join(TEMP_MEDIA_ROOT, name), 'wb') as file:
+                file.write(cls.content)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_full_file(self):
+        """Файл отдается целиком с заголовками для кеширования"""
+        response = self.client.get('/media/posts/ab/cd/pic.jpg')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('ETag', response)
+        self.assertNotIn('immutable', response['Cache-Control'])
+
+    def test_thumbnails_are_immutable(self):
+        """Миниатюры кешируются надолго"""
+        response = self.client.get('/media/cache/ab/cd/thumb.jpg')
+        self.assertIn('immutable', response['Cache-Control'])
+
+    def test_range_request(self):
+        """Запрос с Range получает 206 и нужный кусок файла"""
+        cases = (
+            ('bytes=0-9', self.content[:10], 'bytes 0-9/1024'),
+            ('bytes=1000-', self.content[1000:], 'bytes 1000-1023/1024'),
+            ('bytes=-4', self.content[-4:], 'bytes 1020-1023/1024'),
+        )
+        for header, expected, content_range in cases:
+            with self.subTest(header=header):
+                response = self.client.get('/media/posts/ab/cd/pic.jpg',
+                                           HTTP_RANGE=header)
+                self.assertEqual(response.status_code,
+                                 HTTPStatus.PARTIAL_CONTENT)
+                self.assertEqual(b''.join(response.streaming_content),
+                                 expected)
+                self.assertEqual(response['Content-Range'], content_range)
+
+    def test_unsatisfiable_range(self):
+        """Диапазон за концом файла получает 416"""
+        response = self.client.get('/media/posts/ab/cd/pic.jpg',
+                                   HTTP_RANGE='bytes=5000-')
+        self.assertEqual(response.status_code,
+                         HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+
+    def test_conditional_request(self):
+        """Повторный запрос с If-None-Match получает 304"""
+        etag = self.client.get('/media/posts/ab/cd/pic.jpg')['ETag']
+        response = self.client.get('/media/posts/ab/cd/pic.jpg',
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_missing_and_outside_files(self):
+        """Несуществующие файлы и пути за MEDIA_ROOT не отдаются"""
+        for url in ('/media/posts/none.jpg', '/media/../settings.py'):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    @override_settings(MEDIA_SERVE_MODE='x-accel-redirect')
+    def test_x_accel_redirect(self):
+        """Передача файла поручается nginx"""
+        response = self.client.get('/media/posts/ab/cd/pic.jpg')
+        self.assertEqual(response['X-Accel-Redirect'],
+                         '/protected-media/posts/ab/cd/pic.jpg')
+        self.assertEqual(response.content, b'')
@@ -1,16 +1,25 @@
 from django.contrib import admin
 
-from .models import Group, Post, Comment, Follow
+from core.admin import LargeTableAdmin
+from .models import Group, GroupFollow, Post, Comment, Follow, Tag
+from .search import COMMENT_FTS_TABLE, match_q
 
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(LargeTableAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group',)
-    list_editable = ('group',)
-    search_fields = ('text',)
+    list_select_related = ('author', 'group',)
+    autocomplete_fields = ('author', 'group',)
+    search_fields = ('text', 'author__username',)
+    prefix_search_fields = ('author__username',)
     list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
     empty_value_display = '-пусто-'
 
+    def search_condition(self, search_term):
+        """Полнотекстовый поиск по тексту или префикс имени автора."""
+        return match_q(search_term) | super().search_condition(search_term)
+
 
 @admin.register(Group)
 class GroupAdmin(admin.ModelAdmin):
@@ -21,14 +30,42 @@ class GroupAdmin(admin.ModelAdmin):
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'author', 'text',)
-    search_fields = ('author', 'text',)
+class CommentAdmin(LargeTableAdmin):
+    list_display = ('pk', 'author', 'post', 'text',)
+    list_select_related = ('author', 'post',)
+    autocomplete_fields = ('post', 'author',)
+    search_fields = ('text', 'author__username',)
+    prefix_search_fields = ('author__username',)
     empty_value_display = '-пусто-'
 
+    def search_condition(self, search_term):
+        """Полнотекстовый поиск по тексту или префикс имени автора."""
+        return (match_q(search_term, COMMENT_FTS_TABLE)
+                | super().search_condition(search_term))
+
 
 @admin.register(Follow)
-class FollowAdmin(admin.ModelAdmin):
+class FollowAdmin(LargeTableAdmin):
     list_display = ('pk', 'user', 'author',)
-    search_fields = ('user', 'author',)
+    list_select_related = ('user', 'author',)
+    autocomplete_fields = ('user', 'author',)
+    search_fields = ('user__username', 'author__username',)
+    prefix_search_fields = ('user__username', 'author__username',)
     empty_value_display = '-пусто-'
+
+
+@admin.register(GroupFollow)
+class GroupFollowAdmin(LargeTableAdmin):
+    list_display = ('pk', 'user', 'group',)
+    list_select_related = ('user', 'group',)
+    autocomplete_fields = ('user', 'group',)
+    search_fields = ('user__username', 'group__slug',)
+    prefix_search_fields = ('user__username', 'group__slug',)
+    empty_value_display = '-пусто-'
+
+
+@admin.register(Tag)
+class TagAdmin(LargeTableAdmin):
+    list_display = ('pk', 'name',)
+    search_fields = ('name',)
+    prefix_search_fields = ('name',)
@@ -0,0 +1,86 @@
+"""Архив постов по месяцам.
+
+Посты месяца выбираются условием pub_date >= начала месяца и < начала
+следующего, а не __year/__month: функции над колонкой не дают базе
+пройти по индексам (pub_date), (author, pub_date) и (group, pub_date).
+Число постов по месяцам хранится в MonthlyPostCount и обновляется
+сигналами модели Post, поэтому оглавление архива не считает GROUP BY по
+всей таблице постов.
+"""
+import datetime
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import MonthlyPostCount, Post
+
+
+def month_of(moment):
+    """Первое число месяца даты moment в текущем часовом поясе."""
+    return timezone.localtime(moment).date().replace(day=1)
+
+
+def month_range(year, month):
+    """Начало месяца и начало следующего месяца."""
+    start = datetime.datetime(year, month, 1)
+    end = datetime.datetime(year + month // 12, month % 12 + 1, 1)
+    return timezone.make_aware(start), timezone.make_aware(end)
+
+
+def scopes(author_id, group_id):
+    """Счетчики, в которые входит пост: по сайту, автору и группе."""
+    yield {'author': None, 'group': None}
+    yield {'author_id': author_id, 'group': None}
+    if group_id is not None:
+        yield {'author': None, 'group_id': group_id}
+
+
+def adjust(month, author_id, group_id, delta):
+    """Прибавляет delta к счетчикам месяца, создавая недостающие."""
+    for scope in scopes(author_id, group_id):
+        counts = MonthlyPostCount.objects.filter(month=month, **scope)
+        if counts.update(count=F('count') + delta) or delta < 0:
+            continue
+        try:
+            with transaction.atomic():
+                MonthlyPostCount.objects.create(
+                    month=month, count=delta, **scope)
+        except IntegrityError:
+            counts.update(count=F('count') + delta)
+
+
+def record_change(post, old_author_id, old_group_id):
+    """Переносит пост в счетчики нового автора или группы."""
+    if (old_author_id, old_group_id) == (post.author_id, post.group_id):
+        return
+    month = month_of(post.pub_date)
+    adjust(month, old_author_id, old_group_id, -1)
+    adjust(month, post.author_id, post.group_id, 1)
+
+
+def rebuild_counts(batch_size=1000):
+    """Пересчитывает все счетчики, читая посты пачками по pk."""
+    counts = Counter()
+    last_pk = 0
+    while True:
+        posts = list(
+            Post.objects.filter(pk__gt=last_pk).order_by('pk').values_list(
+                'pk', 'author_id', 'group_id', 'pub_date')[:batch_size])
+        if not posts:
+            break
+        last_pk = posts[-1][0]
+        for _, author_id, group_id, pub_date in posts:
+            month = month_of(pub_date)
+            counts[month, None, None] += 1
+            counts[month, author_id, None] += 1
+            if group_id is not None:
+                counts[month, None, group_id] += 1
+    with transaction.atomic():
+        MonthlyPostCount.objects.all().delete()
+        MonthlyPostCount.objects.bulk_create(
+            (MonthlyPostCount(month=month, author_id=author_id,
+                              group_id=group_id, count=count)
+             for (month, author_id, group_id), count in counts.items()),
+            batch_size=500)
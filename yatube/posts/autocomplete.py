@@ -0,0 +1,192 @@
+"""Автодополнение авторов и групп по префиксу.
+
+Индекс живет в памяти процесса и общий для всех его запросов:
+отсортированный список ключей «нормализованный текст, \\0, тип, pk»,
+поиск — bisect по префиксу. Ключи автора — username и полное имя,
+группы — название и slug.
+
+Изменения пользователей и групп приходят сигналами. Процесс, в котором
+случилось изменение, правит свой индекс сразу, а в кеш записывает
+очередной номер изменения и что изменилось. Остальные процессы при
+следующем поиске видят новый номер и перечитывают из базы только
+измененные объекты; если записи журнала уже вытеснены из кеша или
+изменений слишком много, индекс строится заново. Номер начинается со
+времени сборки, как поколения в posts.feeds: после сброса счетчика
+процесс не примет новый номер за тот, что он уже видел.
+"""
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Group
+
+User = get_user_model()
+
+USER = 'u'
+GROUP = 'g'
+SEPARATOR = '\0'
+GENERATION_KEY = 'autocomplete:generation'
+CHANGE_KEY = 'autocomplete:change:{}'
+CHANGE_TIMEOUT = 24 * 60 * 60
+# Отставание, после которого дешевле перестроить индекс, чем читать журнал.
+MAX_CHANGES = 1000
+# Поля пользователя, от которых зависит индекс.
+USER_FIELDS = frozenset(('username', 'first_name', 'last_name', 'is_active'))
+
+
+def normalize(text):
+    return ' '.join(text.casefold().replace('ё', 'е').split())
+
+
+class PrefixIndex:
+    """Отсортированные ключи и подписи объектов по (тип, pk)."""
+
+    def __init__(self):
+        self.keys = []
+        self.objects = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, kind, pk, label, url_arg, texts):
+        self.remove(kind, pk)
+        suffix = f'{SEPARATOR}{kind}{pk}'
+        keys = tuple({normalize(text) + suffix for text in texts if text})
+        self.objects[kind, pk] = (label, url_arg, keys)
+        for key in keys:
+            insort(self.keys, key)
+
+    def remove(self, kind, pk):
+        entry = self.objects.pop((kind, pk), None)
+        if entry is None:
+            return
+        for key in entry[2]:
+            index = bisect_left(self.keys, key)
+            if index < len(self.keys) and self.keys[index] == key:
+                del self.keys[index]
+
+    def load(self, entries):
+        """Заполняет пустой индекс разом: одна сортировка вместо вставок."""
+        for kind, pk, label, url_arg, texts in entries:
+            suffix = f'{SEPARATOR}{kind}{pk}'
+            keys = tuple({normalize(text) + suffix for text in texts if text})
+            self.objects[kind, pk] = (label, url_arg, keys)
+            self.keys.extend(keys)
+        self.keys.sort()
+
+    def search(self, prefix, limit=10):
+        """Объекты с ключом, который начинается с prefix, в порядке
+        ключей: список (тип, pk, подпись, аргумент для URL)."""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        found = {}
+        keys = self.keys
+        index = bisect_left(keys, prefix)
+        while index < len(keys) and len(found) < limit:
+            key = keys[index]
+            if not key.startswith(prefix):
+                break
+            ref = key[key.rindex(SEPARATOR) + 1:]
+            found.setdefault((ref[0], int(ref[1:])), None)
+            index += 1
+        return [(kind, pk) + self.objects[kind, pk][:2]
+                for kind, pk in found]
+
+
+def user_entry(pk, username, first_name, last_name):
+    full_name = f'{first_name} {last_name}'.strip()
+    return (USER, pk, full_name or username, username,
+            (username, full_name, last_name))
+
+
+def group_entry(pk, slug, title):
+    return GROUP, pk, title, slug, (title, slug)
+
+
+def load_entries(user_ids=None, group_ids=None):
+    users = User.objects.filter(is_active=True)
+    groups = Group.objects.all()
+    if user_ids is not None:
+        users = users.filter(pk__in=user_ids)
+    if group_ids is not None:
+        groups = groups.filter(pk__in=group_ids)
+    for row in users.values_list(
+            'pk', 'username', 'first_name', 'last_name').iterator():
+        yield user_entry(*row)
+    for row in groups.values_list('pk', 'slug', 'title').iterator():
+        yield group_entry(*row)
+
+
+class SharedIndex:
+    """Индекс процесса, согласованный с другими процессами через кеш."""
+
+    def __init__(self):
+        self.index = None
+        self.generation = None
+        self.lock = threading.Lock()
+
+    def rebuild(self):
+        index = PrefixIndex()
+        generation = cache.get_or_set(GENERATION_KEY, time.time_ns(), None)
+        index.load(load_entries())
+        self.index, self.generation = index, generation
+
+    def sync(self):
+        generation = cache.get(GENERATION_KEY)
+        if self.index is not None and generation == self.generation:
+            return
+        with self.lock:
+            if (self.index is None or generation is None
+                    or not 0 < generation - self.generation <= MAX_CHANGES):
+                self.rebuild()
+                return
+            changes = cache.get_many([
+                CHANGE_KEY.format(number)
+                for number in range(self.generation + 1, generation + 1)])
+            if len(changes) != generation - self.generation:
+                self.rebuild()
+                return
+            self.apply(changes.values())
+            self.generation = generation
+
+    def apply(self, changes):
+        changed = {USER: set(), GROUP: set()}
+        for kind, pk in changes:
+            changed[kind].add(pk)
+            self.index.remove(kind, pk)
+        for entry in load_entries(changed[USER], changed[GROUP]):
+            self.index.add(*entry)
+
+    def changed(self, kind, pk):
+        """Отмечает изменение объекта после фиксации транзакции, чтобы
+        другие процессы не прочитали из базы старые данные."""
+        transaction.on_commit(lambda: self.publish(kind, pk))
+
+    def publish(self, kind, pk):
+        try:
+            generation = cache.incr(GENERATION_KEY)
+        except ValueError:
+            # Счетчика нет в кеше: все процессы перестроят индекс сами.
+            return
+        cache.set(CHANGE_KEY.format(generation), (kind, pk), CHANGE_TIMEOUT)
+        with self.lock:
+            if self.index is not None and self.generation == generation - 1:
+                self.apply([(kind, pk)])
+                self.generation = generation
+
+    def invalidate(self):
+        """Заставляет все процессы перестроить индекс, например после
+        массовой загрузки пользователей без сигналов."""
+        cache.delete(GENERATION_KEY)
+
+    def search(self, prefix, limit=10):
+        self.sync()
+        return self.index.search(prefix, limit)
+
+
+shared_index = SharedIndex()
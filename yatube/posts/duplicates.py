@@ -0,0 +1,149 @@
+"""Поиск почти одинаковых постов по MinHash и LSH.
+
+Текст разбивается на шинглы — подстроки из SHINGLE_SIZE символов
+нормализованного текста. Сходство двух текстов — мера Жаккара их множеств
+шинглов, и ее оценивает доля совпавших позиций MinHash-сигнатур.
+
+Сигнатура строится за один проход хеширования (one permutation hashing):
+каждый шингл хешируется один раз, старшие биты хеша выбирают позицию
+сигнатуры, младшие — значение, в позиции остается минимум. Пустые позиции
+заполняются из ближайшей непустой справа (densification). Так сигнатура
+стоит столько же, сколько хеширование шинглов, а не NUM_HASHES проходов.
+
+Сигнатура делится на BANDS полос по ROWS значений; хеш каждой полосы —
+ключ корзины в SignatureBucket. Кандидаты в дубликаты — посты, у которых
+совпала хотя бы одна корзина: при сходстве s вероятность этого
+1 - (1 - s^ROWS)^BANDS, порог около (1 / BANDS)^(1 / ROWS) ≈ 0.71.
+Кандидаты проверяются по сохраненным сигнатурам.
+"""
+import re
+import sys
+from array import array
+from collections import Counter
+from hashlib import blake2b
+
+from django.db import transaction
+
+from .models import PostSignature, SignatureBucket
+
+WORD_RE = re.compile(r'\w+')
+SHINGLE_SIZE = 5
+NUM_HASHES = 128
+BANDS = 16
+ROWS = NUM_HASHES // BANDS
+# Короткие тексты вроде «Спасибо!» часто совпадают без всякого спама.
+MIN_LENGTH = 100
+THRESHOLD = 0.8
+MAX_CANDIDATES = 50
+BIN_SHIFT = 64 - (NUM_HASHES - 1).bit_length()
+VALUE_MASK = 0xFFFFFFFF
+EMPTY = VALUE_MASK + 1
+# Сдвиг значения, взятого из соседней позиции, чтобы соседние позиции
+# не совпадали между собой.
+DENSIFY_STEP = 0x9E3779B9
+
+
+def normalize(text):
+    return ' '.join(WORD_RE.findall(text.lower().replace('ё', 'е')))
+
+
+def _hash(data):
+    return int.from_bytes(blake2b(data, digest_size=8).digest(), 'little')
+
+
+def signature(text):
+    """MinHash-сигнатура текста или None для слишком короткого текста."""
+    text = normalize(text)
+    if len(text) < MIN_LENGTH:
+        return None
+    minimums = [EMPTY] * NUM_HASHES
+    for shingle in {text[start:start + SHINGLE_SIZE]
+                    for start in range(len(text) - SHINGLE_SIZE + 1)}:
+        value = _hash(shingle.encode())
+        position = value >> BIN_SHIFT
+        value &= VALUE_MASK
+        if value < minimums[position]:
+            minimums[position] = value
+    result = array('I', bytes(4 * NUM_HASHES))
+    for position, value in enumerate(minimums):
+        step = 0
+        while value == EMPTY:
+            step += 1
+            value = minimums[(position + step) % NUM_HASHES]
+        result[position] = (value + step * DENSIFY_STEP) & VALUE_MASK
+    return result
+
+
+def pack(minhash):
+    data = array('I', minhash)
+    if sys.byteorder == 'big':
+        data.byteswap()
+    return data.tobytes()
+
+
+def unpack(data):
+    minhash = array('I')
+    minhash.frombytes(bytes(data))
+    if sys.byteorder == 'big':
+        minhash.byteswap()
+    return minhash
+
+
+def band_keys(minhash):
+    """Ключи корзин LSH: хеш номера полосы и ее значений."""
+    data = pack(minhash)
+    width = ROWS * minhash.itemsize
+    return [
+        _hash(bytes([band]) + data[band * width:(band + 1) * width])
+        - 2 ** 63
+        for band in range(BANDS)
+    ]
+
+
+def similarity(first, second):
+    """Оценка меры Жаккара по двум сигнатурам."""
+    return sum(a == b for a, b in zip(first, second)) / NUM_HASHES
+
+
+def find_duplicate(text, exclude=None):
+    """Пост, почти совпадающий с текстом: (id, сходство) или None.
+
+    Кандидаты проверяются по убыванию числа совпавших корзин, и их число
+    ограничено, поэтому даже волна одинакового спама не делает проверку
+    дольше нескольких запросов по индексу.
+    """
+    minhash = signature(text)
+    if minhash is None:
+        return None
+    buckets = SignatureBucket.objects.filter(key__in=band_keys(minhash))
+    if exclude is not None:
+        buckets = buckets.exclude(post_id=exclude)
+    candidates = [
+        pk for pk, _ in Counter(
+            buckets.values_list('post_id', flat=True)[:MAX_CANDIDATES * BANDS]
+        ).most_common(MAX_CANDIDATES)
+    ]
+    stored = dict(PostSignature.objects.filter(
+        post_id__in=candidates).values_list('post_id', 'minhash'))
+    for pk in candidates:
+        if pk in stored:
+            score = similarity(minhash, unpack(stored[pk]))
+            if score >= THRESHOLD:
+                return pk, score
+    return None
+
+
+def sign_posts(posts):
+    """Заново сохраняет сигнатуры и корзины пачки постов (id, text)."""
+    signatures = {pk: signature(text) for pk, text in posts}
+    with transaction.atomic():
+        PostSignature.objects.filter(post_id__in=signatures).delete()
+        SignatureBucket.objects.filter(post_id__in=signatures).delete()
+        PostSignature.objects.bulk_create(
+            PostSignature(post_id=pk, minhash=pack(minhash))
+            for pk, minhash in signatures.items() if minhash is not None)
+        SignatureBucket.objects.bulk_create(
+            (SignatureBucket(post_id=pk, key=key)
+             for pk, minhash in signatures.items() if minhash is not None
+             for key in band_keys(minhash)),
+            batch_size=500)
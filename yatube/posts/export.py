@@ -0,0 +1,99 @@
+"""Потоковая выгрузка постов и комментариев в JSON Lines.
+
+Посты читаются пачками по pk (pk > последнего выгруженного), комментарии
+пачки — курсором базы, и каждая строка сразу уходит в вывод. В памяти
+держится одна пачка, поэтому расход памяти не зависит от размера
+выгрузки. Авторы и группы пишутся по username и slug: так файл можно
+загрузить в другую базу командой import_jsonl.
+"""
+import json
+import zlib
+
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Comment, Group, Post
+from .utils import chunked
+
+User = get_user_model()
+
+# Сжатие идет кусками не меньше этого размера: zlib на каждой строке
+# отдельно работал бы заметно медленнее.
+GZIP_CHUNK_SIZE = 64 * 1024
+
+
+def dumps(row):
+    return json.dumps(row, ensure_ascii=False, cls=DjangoJSONEncoder) + '\n'
+
+
+def usernames(ids):
+    return dict(User.objects.filter(pk__in=ids).values_list('pk', 'username'))
+
+
+def export_comments(post_ids, batch_size):
+    comments = (
+        Comment.objects.filter(post_id__in=post_ids).order_by('pk')
+        .values_list('pk', 'post_id', 'author_id', 'text', 'created')
+        .iterator(chunk_size=batch_size)
+    )
+    for batch in chunked(comments, batch_size):
+        authors = usernames({row[2] for row in batch})
+        for pk, post_id, author_id, text, created in batch:
+            yield dumps({
+                'type': 'comment',
+                'id': pk,
+                'post': post_id,
+                'author': authors[author_id],
+                'text': text,
+                'created': created,
+            })
+
+
+def export_lines(author=None, comments=True, batch_size=1000):
+    """Строки JSON Lines: посты по возрастанию pk, за каждой пачкой
+    постов — их комментарии."""
+    posts = Post.objects.order_by('pk').values_list(
+        'pk', 'author_id', 'group_id', 'text', 'pub_date', 'image')
+    if author is not None:
+        posts = posts.filter(author=author)
+    groups = {}
+    last_pk = 0
+    while True:
+        batch = list(posts.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            break
+        last_pk = batch[-1][0]
+        authors = usernames({row[1] for row in batch})
+        missing = {row[2] for row in batch} - groups.keys() - {None}
+        if missing:
+            groups.update(Group.objects.filter(pk__in=missing).values_list(
+                'pk', 'slug'))
+        for pk, author_id, group_id, text, pub_date, image in batch:
+            yield dumps({
+                'type': 'post',
+                'id': pk,
+                'author': authors[author_id],
+                'group': groups.get(group_id),
+                'text': text,
+                'pub_date': pub_date,
+                'image': image or None,
+            })
+        if comments:
+            yield from export_comments([row[0] for row in batch], batch_size)
+
+
+def gzip_stream(lines):
+    """Сжимает поток строк в gzip на лету, отдавая байты кусками."""
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    buffer = []
+    size = 0
+    for line in lines:
+        data = line.encode()
+        buffer.append(data)
+        size += len(data)
+        if size >= GZIP_CHUNK_SIZE:
+            chunk = compressor.compress(b''.join(buffer))
+            buffer, size = [], 0
+            if chunk:
+                yield chunk
+    yield compressor.compress(b''.join(buffer)) + compressor.flush()
@@ -0,0 +1,72 @@
+"""Лента подписок: посты избранных авторов и групп.
+
+Запрос с OR по двум подпискам не ложится на индексы подписок: база идет
+по индексу pub_date всей таблицы и проверяет каждый пост, пока не
+наберет страницу, а COUNT для пагинатора проходит все посты. Поэтому лента
+читается двумя ветками — посты авторов по индексу (author, pub_date) и
+посты групп по индексу (group, pub_date), — каждая уже упорядочена и
+ограничена концом нужной страницы. Ветки читают только ключи
+(pub_date, pk), сливаются heapq.merge, и лишь посты самой страницы
+загружаются целиком. Посты избранного автора в избранной группе попадают
+только в ветку авторов, поэтому в ленте они один раз.
+"""
+import heapq
+from itertools import islice
+
+from django.db.models import Q
+
+from .listing import listing
+from .models import Follow, GroupFollow, Post
+
+ORDERING = ('-pub_date', '-pk')
+
+
+class FollowFeed:
+    """Последовательность постов ленты для Paginator: count и срезы."""
+
+    def __init__(self, user):
+        self.authors = Follow.objects.filter(user=user).values('author')
+        self.groups = GroupFollow.objects.filter(user=user).values('group')
+
+    def by_authors(self):
+        return Post.objects.filter(author__in=self.authors)
+
+    def by_groups(self):
+        """Посты групп, кроме тех, что уже есть в ветке авторов."""
+        return Post.objects.filter(group__in=self.groups).exclude(
+            author__in=self.authors)
+
+    def count(self):
+        return self.by_authors().count() + self.by_groups().count()
+
+    def keys(self, limit, after=None):
+        """Ключи (pub_date, pk) первых limit постов ленты, старше after."""
+        branches = []
+        for branch in (self.by_authors(), self.by_groups()):
+            if after is not None:
+                pub_date, pk = after
+                branch = branch.filter(
+                    Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk))
+            branches.append(branch.order_by(*ORDERING).values_list(
+                'pub_date', 'pk')[:limit])
+        return list(islice(heapq.merge(*branches, reverse=True), limit))
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        pks = [pk for _, pk in self.keys(index.stop)[index.start:]]
+        posts = listing(Post.objects.all()).in_bulk(pks)
+        return [posts[pk] for pk in pks if pk in posts]
+
+
+def page_keys(posts, limit, after=None):
+    """Ключи (pub_date, pk) страницы ленты после курсора after: ленты
+    подписок или запроса постов."""
+    if isinstance(posts, FollowFeed):
+        return posts.keys(limit, after)
+    if after is not None:
+        pub_date, pk = after
+        posts = posts.filter(
+            Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk))
+    return list(posts.order_by(*ORDERING).values_list(
+        'pub_date', 'pk')[:limit])
@@ -0,0 +1,252 @@
+"""RSS/Atom-ленты и карта сайта, закешированные по поколениям.
+
+У каждой ленты (главная, группа, автор) есть счетчик поколения в кеше;
+готовый ответ хранится под ключом с этим поколением в качестве version.
+Новый, измененный или удаленный пост увеличивает счетчики своих лент, и
+следующий запрос собирает ленту заново, а старые версии просто истекают.
+Те же области кешируют фрагменты карточек для бесконечной прокрутки.
+
+Карта сайта разбита на шарды по SITEMAP_SHARD_SIZE id подряд: шард n
+раздела содержит объекты с pk в (n * size, (n + 1) * size]. Шард читает
+из базы только свой диапазон по первичному ключу и кешируется со своим
+поколением, которое меняется лишь при добавлении или удалении объекта
+из этого диапазона. Индексу карты нужен только наибольший pk раздела.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+from django.shortcuts import get_object_or_404
+from django.template.defaultfilters import truncatechars
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+
+from .models import Group, Post
+
+User = get_user_model()
+
+GENERATION_KEY = 'feeds:generation:{}'
+FEED_KEY = 'feeds:{}:{}:{}'
+SHARD_KEY = 'sitemap:{}:{}:{}'
+FRAGMENT_KEY = 'fragments:{}:{}'
+# Ответы живут не дольше суток, даже если лента больше не меняется:
+# так со временем подтягиваются новые имена авторов и названия групп.
+TIMEOUT = 24 * 60 * 60
+
+INDEX = 'index'
+# Общее поколение входит в ключи всех лент и шардов карты сайта.
+ALL = 'all'
+SECTIONS = {
+    'posts': Post,
+    'groups': Group,
+}
+
+
+def generation(scope):
+    """Текущее поколение области. Начальное значение берется из времени,
+    чтобы после вытеснения счетчика из кеша не прочитать старые версии.
+
+    Поколение увеличивает процесс, в котором изменились посты, а читают
+    все процессы сервера, поэтому кеш должен быть общим (см. CACHES).
+    """
+    return cache.get_or_set(GENERATION_KEY.format(scope), time.time_ns(),
+                            None)
+
+
+def generations(scopes):
+    """Поколения нескольких областей одним чтением кеша: {область:
+    поколение}. Недостающие счетчики заводятся как в generation()."""
+    keys = {scope: GENERATION_KEY.format(scope) for scope in scopes}
+    found = cache.get_many(keys.values())
+    return {scope: found[key] if key in found else generation(scope)
+            for scope, key in keys.items()}
+
+
+def bump(*scopes):
+    """Увеличивает поколения после фиксации транзакции, чтобы другой
+    процесс не закешировал ответ со старыми данными из базы."""
+    def publish():
+        for scope in scopes:
+            try:
+                cache.incr(GENERATION_KEY.format(scope))
+            except ValueError:
+                # Счетчика нет: его создаст следующий запрос.
+                pass
+    transaction.on_commit(publish)
+
+
+def cached(scope, key, build):
+    """Значение build(), закешированное до смены поколения области."""
+    key = f'{key}:{generation(ALL)}'
+    version = generation(scope)
+    value = cache.get(key, version=version)
+    if value is None:
+        value = build()
+        cache.set(key, value, TIMEOUT, version=version)
+    return value
+
+
+def invalidate():
+    """Сбрасывает все ленты и карту сайта, например после массовой
+    загрузки постов без сигналов."""
+    bump(ALL)
+
+
+def group_scope(group_id):
+    return f'group:{group_id}'
+
+
+def author_scope(author_id):
+    return f'author:{author_id}'
+
+
+def shard_of(pk):
+    return (pk - 1) // settings.SITEMAP_SHARD_SIZE
+
+
+def shard_scope(section, number):
+    return f'sitemap:{section}:{number}'
+
+
+def post_scopes(author_id, group_id):
+    scopes = [INDEX, author_scope(author_id)]
+    if group_id is not None:
+        scopes.append(group_scope(group_id))
+    return scopes
+
+
+class PostsFeed(Feed):
+    """RSS-лента последних постов; ответы кешируются по поколению."""
+
+    title = 'Yatube: последние записи'
+    description = 'Новые записи на Yatube'
+
+    def __call__(self, request, *args, **kwargs):
+        scope = self.scope(self.get_object(request, *args, **kwargs))
+        key = FEED_KEY.format(scope, self.feed_type.__name__,
+                              request.build_absolute_uri('/'))
+        return cached(scope, key, lambda: super(PostsFeed, self).__call__(
+            request, *args, **kwargs))
+
+    def scope(self, obj):
+        return INDEX
+
+    def link(self, obj):
+        return reverse('posts:index')
+
+    def posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj):
+        return self.posts(obj).select_related('author')[
+            :settings.FEED_LIMIT]
+
+    def item_title(self, item):
+        return truncatechars(item.text, 80)
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', args=[item.pk])
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+
+class GroupFeed(PostsFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def scope(self, obj):
+        return group_scope(obj.pk)
+
+    def title(self, obj):
+        return f'Yatube: {obj.title}'
+
+    def description(self, obj):
+        return obj.description
+
+    def link(self, obj):
+        return reverse('posts:group_posts', args=[obj.slug])
+
+    def posts(self, obj):
+        return obj.posts.all()
+
+
+class AuthorFeed(PostsFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def scope(self, obj):
+        return author_scope(obj.pk)
+
+    def title(self, obj):
+        return f'Yatube: {obj.get_full_name() or obj.username}'
+
+    def description(self, obj):
+        return f'Записи пользователя {obj.username}'
+
+    def link(self, obj):
+        return reverse('posts:profile', args=[obj.username])
+
+    def posts(self, obj):
+        return obj.posts.all()
+
+
+class AtomPostsFeed(PostsFeed):
+    feed_type = Atom1Feed
+    subtitle = PostsFeed.description
+
+
+class AtomGroupFeed(GroupFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return obj.description
+
+
+class AtomAuthorFeed(AuthorFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
+
+
+def shard_count(section):
+    """Число шардов раздела: наибольший pk берется по индексу, без
+    чтения таблицы."""
+    max_pk = SECTIONS[section].objects.aggregate(max_pk=Max('pk'))['max_pk']
+    return -(-(max_pk or 0) // settings.SITEMAP_SHARD_SIZE)
+
+
+def shard_urls(section, number):
+    size = settings.SITEMAP_SHARD_SIZE
+    objects = SECTIONS[section].objects.filter(
+        pk__gt=number * size, pk__lte=(number + 1) * size).order_by('pk')
+    if section == 'posts':
+        for pk, pub_date in objects.values_list('pk', 'pub_date'):
+            yield reverse('posts:post_detail', args=[pk]), pub_date
+    else:
+        for slug in objects.values_list('slug', flat=True):
+            yield reverse('posts:group_posts', args=[slug]), None
+
+
+def render_shard(request, section, number):
+    key = SHARD_KEY.format(section, number, request.build_absolute_uri('/'))
+    return cached(
+        shard_scope(section, number), key,
+        lambda: render_to_string('sitemaps/shard.xml', {
+            'urls': [
+                (request.build_absolute_uri(path), lastmod)
+                for path, lastmod in shard_urls(section, number)
+            ],
+        }))
@@ -1,5 +1,6 @@
 from django import forms
 
+from .duplicates import find_duplicate
 from .models import Post, Comment
 
 
@@ -9,6 +10,13 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('text', 'group', 'image')
 
+    def clean_text(self):
+        text = self.cleaned_data['text']
+        if find_duplicate(text, exclude=self.instance.pk) is not None:
+            raise forms.ValidationError(
+                'Почти такая же запись уже опубликована')
+        return text
+
 
 class CommentForm(forms.ModelForm):
 
@@ -0,0 +1,48 @@
+import base64
+from io import BytesIO
+
+from django.core.exceptions import SuspiciousFileOperation
+from PIL import Image, ImageOps
+
+# Карточки показывают картинку, обрезанную до 960x339, поэтому
+# превью строится с теми же пропорциями.
+PLACEHOLDER_SIZE = (20, 7)
+
+
+def make_placeholder(image):
+    preview = ImageOps.fit(image.convert('RGB'), PLACEHOLDER_SIZE)
+    buffer = BytesIO()
+    preview.save(buffer, 'PNG', optimize=True)
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    return f'data:image/png;base64,{encoded}'
+
+
+def read_placeholder(field_file):
+    """Возвращает превью картинки поста.
+
+    Работает и с только что загруженным файлом, и с уже сохраненным.
+    Если картинку прочитать не удалось, возвращает пустую строку.
+    """
+    if not field_file:
+        return ''
+    try:
+        if field_file._committed:
+            source = field_file.storage.open(field_file.name)
+        else:
+            source = field_file.file
+            source.seek(0)
+        try:
+            with Image.open(source) as image:
+                placeholder = make_placeholder(image)
+        finally:
+            if field_file._committed:
+                source.close()
+            else:
+                source.seek(0)
+    except (OSError, ValueError, SuspiciousFileOperation):
+        return ''
+    return placeholder
+
+
+def update_image_meta(post):
+    post.image_placeholder = read_placeholder(post.image)
@@ -0,0 +1,34 @@
+"""Облегченная выборка постов для карточек лент.
+
+Карточке нужны дата, картинка, начало текста, имя автора и slug группы.
+Полный текст поста бывает длинным, а строка auth_user несет хеш пароля,
+email и прочие служебные колонки, поэтому ленты читают только нужные
+колонки через only(), а начало текста хранится готовым в Post.preview и
+обновляется при сохранении поста.
+"""
+from django.utils.text import Truncator
+
+from .models import PREVIEW_LENGTH
+
+POST_FIELDS = ('pub_date', 'preview', 'image', 'image_placeholder')
+RELATED_FIELDS = {
+    'author': ('first_name', 'last_name', 'username'),
+    'group': ('slug',),
+}
+
+
+def make_preview(text):
+    """Текст, обрезанный до PREVIEW_LENGTH символов с многоточием."""
+    return Truncator(text).chars(PREVIEW_LENGTH)
+
+
+def listing(posts, related=('author', 'group')):
+    """Посты для карточек: только их колонки и колонки related-связей.
+
+    Колонки author_id и group_id читаются всегда: без них пост из
+    group.posts или author.posts не узнает свою группу или автора и
+    карточка догружает их отдельным запросом."""
+    fields = [*POST_FIELDS, *RELATED_FIELDS]
+    for name in related:
+        fields.extend(f'{name}__{field}' for field in RELATED_FIELDS[name])
+    return posts.select_related(*related).only(*fields)
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from posts.images import update_image_meta
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Заполняет превью картинок у постов, '
+            'созданных до появления этих полей.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=200,
+            help='Сколько постов обрабатывать за один запрос.')
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Пересчитать и у постов, где данные уже есть.')
+
+    def handle(self, *args, **options):
+        queryset = Post.objects.exclude(image='').only('pk', 'image')
+        if not options['force']:
+            queryset = queryset.filter(image_placeholder='')
+        last_pk = 0
+        updated = failed = 0
+        while True:
+            batch = list(
+                queryset.filter(pk__gt=last_pk)
+                .order_by('pk')[:options['batch_size']]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            for post in batch:
+                update_image_meta(post)
+            done = [post for post in batch if post.image_placeholder]
+            failed += len(batch) - len(done)
+            updated += len(done)
+            Post.objects.bulk_update(done, ['image_placeholder'])
+            self.stdout.write(f'Обработаны посты до pk={last_pk}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Обновлено постов: {updated}, не удалось прочитать: {failed}'))
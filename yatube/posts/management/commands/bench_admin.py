@@ -0,0 +1,105 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from posts.models import Comment, Follow, Group, Post
+from posts.search import COMMENT_FTS_TABLE, index_posts
+from posts.utils import chunked
+
+User = get_user_model()
+
+# SQLite вставляет пачку одним составным SELECT не длиннее 500 строк.
+BATCH_SIZE = 400
+ANIMALS = ('котов',) * 999 + ('гиппопотамов',)
+
+CHANGELISTS = (
+    ('Post', '/admin/posts/post/'),
+    ('Post, частое', '/admin/posts/post/?q=котами'),
+    ('Post, редкое', '/admin/posts/post/?q=гиппопотам'),
+    ('Post, год', '/admin/posts/post/?pub_date__year=2026'),
+    ('Post, месяц',
+     '/admin/posts/post/?pub_date__year=2026&pub_date__month=10'),
+    ('Comment', '/admin/posts/comment/'),
+    ('Comment, поиск', '/admin/posts/comment/?q=bench-user-1'),
+    ('Comment, текст', '/admin/posts/comment/?q=ответ'),
+    ('Follow', '/admin/posts/follow/'),
+    ('Follow, поиск', '/admin/posts/follow/?q=bench-user-1'),
+    ('Автодополнение',
+     '/admin/auth/user/autocomplete/?term=bench-user-1'),
+)
+
+
+class Command(BaseCommand):
+    help = ('Считает запросы и время страниц списков админки на '
+            'сгенерированных данных. Данные откатываются после замера.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=50000)
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--groups', type=int, default=200)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            admin = self.fill(options)
+            client = Client()
+            client.force_login(admin)
+            for label, url in CHANGELISTS:
+                self.stdout.write(f'{label:16} {self.measure(client, url)}')
+            transaction.set_rollback(True)
+
+    def measure(self, client, url):
+        try:
+            client.get(url)
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = client.get(url)
+                elapsed = time.perf_counter() - started
+        except Exception as error:
+            return f'ошибка: {error}'
+        return (f'запросов: {len(queries):3} '
+                f'время: {elapsed * 1000:8.1f} мс '
+                f'HTML: {len(response.content) // 1024} КБ')
+
+    def fill(self, options):
+        rng = random.Random(0)
+        admin = User.objects.create_superuser(
+            'bench-admin', 'admin@example.com', 'password')
+        User.objects.bulk_create(
+            (User(username=f'bench-user-{number}')
+             for number in range(options['users'])),
+            batch_size=BATCH_SIZE)
+        users = list(User.objects.filter(username__startswith='bench-user'))
+        Group.objects.bulk_create(
+            (Group(title=f'Группа {number}', slug=f'bench-group-{number}',
+                   description='Описание')
+             for number in range(options['groups'])),
+            batch_size=BATCH_SIZE)
+        groups = list(Group.objects.filter(slug__startswith='bench-group'))
+        Post.objects.bulk_create(
+            (Post(author=rng.choice(users), group=rng.choice(groups),
+                  text=f'Пост номер {number} про {rng.choice(ANIMALS)}')
+             for number in range(options['posts'])),
+            batch_size=BATCH_SIZE)
+        # bulk_create не шлет сигналов, индекс поиска заполняется здесь.
+        for batch in chunked(
+                Post.objects.values_list('pk', 'text').iterator(), 5000):
+            index_posts(batch)
+        posts = list(Post.objects.values_list('pk', flat=True)[:1000])
+        Comment.objects.bulk_create(
+            (Comment(post_id=rng.choice(posts), author=rng.choice(users),
+                     text='Ответ' if number % 1000 == 0 else 'Комментарий')
+             for number in range(options['posts'])),
+            batch_size=BATCH_SIZE)
+        for batch in chunked(
+                Comment.objects.values_list('pk', 'text').iterator(), 5000):
+            index_posts(batch, COMMENT_FTS_TABLE)
+        Follow.objects.bulk_create(
+            (Follow(user=user, author=author)
+             for user in users[:100] for author in users[100:200]),
+            batch_size=BATCH_SIZE)
+        return admin
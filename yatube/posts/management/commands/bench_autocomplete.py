@@ -0,0 +1,76 @@
+import random
+import string
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from posts.autocomplete import PrefixIndex, group_entry, user_entry
+
+FIRST_NAMES = ['Анна', 'Иван', 'Мария', 'Петр', 'Ольга', 'Сергей', 'Елена',
+               'Алексей', 'Татьяна', 'Дмитрий', 'Наталья', 'Андрей']
+LAST_NAMES = ['Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев',
+              'Петров', 'Соколов', 'Михайлов', 'Новиков', 'Федоров',
+              'Морозов', 'Волков', 'Алексеев', 'Лебедев', 'Семенов']
+
+
+class Command(BaseCommand):
+    help = ('Замеряет память и время поиска индекса автодополнения '
+            'на случайных пользователях и группах, без базы данных.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100000)
+        parser.add_argument('--groups', type=int, default=1000)
+        parser.add_argument('--queries', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        entries = self.generate(options['users'], options['groups'])
+        tracemalloc.start()
+        index = PrefixIndex()
+        index.load(iter(entries))
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        started = time.perf_counter()
+        PrefixIndex().load(iter(entries))
+        elapsed = time.perf_counter() - started
+        objects = len(index.objects)
+        self.stdout.write(
+            f'Индекс: {objects} объектов, {len(index)} ключей, '
+            f'построен за {elapsed:.2f} с, {size / 2 ** 20:.1f} МБ '
+            f'({size / 2 ** 20 * 100000 / objects:.1f} МБ на 100 тыс. '
+            f'объектов)')
+        rng = random.Random(1)
+        for length in (1, 2, 3, 5):
+            queries = [
+                rng.choice(entries)[4][0][:length]
+                for _ in range(options['queries'])
+            ]
+            started = time.perf_counter()
+            for query in queries:
+                index.search(query, 10)
+            per_query = (time.perf_counter() - started) / len(queries)
+            self.stdout.write(
+                f'  префикс из {length} симв.: '
+                f'{per_query * 1000000:.1f} мкс на запрос')
+        sample = rng.sample(entries, min(1000, len(entries)))
+        started = time.perf_counter()
+        for entry in sample:
+            index.add(*entry)
+        per_update = (time.perf_counter() - started) / len(sample)
+        self.stdout.write(
+            f'  обновление объекта: {per_update * 1000000:.1f} мкс')
+
+    def generate(self, users, groups):
+        rng = random.Random(0)
+        entries = []
+        for pk in range(1, users + 1):
+            username = ''.join(rng.choices(
+                string.ascii_lowercase, k=rng.randint(4, 10))) + str(pk)
+            entries.append(user_entry(
+                pk, username, rng.choice(FIRST_NAMES),
+                rng.choice(LAST_NAMES)))
+        for pk in range(1, groups + 1):
+            slug = f'group-{pk}'
+            entries.append(group_entry(
+                pk, slug, f'{rng.choice(LAST_NAMES)}ская группа {pk}'))
+        return entries
@@ -0,0 +1,130 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.duplicates import (SHINGLE_SIZE, THRESHOLD, find_duplicate,
+                              normalize, sign_posts, signature)
+from posts.models import Post
+from posts.utils import chunked
+
+User = get_user_model()
+
+# SQLite вставляет пачку одним составным SELECT не длиннее 500 строк.
+BATCH_SIZE = 400
+SYLLABLES = ('ка', 'ро', 'ми', 'ло', 'на', 'те', 'ры', 'су', 'по', 'ве',
+             'да', 'ни', 'го', 'ле', 'ту', 'за', 'бо', 'ша', 'ки', 'мо')
+
+
+class Command(BaseCommand):
+    help = ('Замеряет долю ложных срабатываний и пропусков поиска почти '
+            'одинаковых постов и время одной проверки на сгенерированных '
+            'постах. Данные откатываются после замера.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--queries', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        words = list({
+            ''.join(rng.choices(SYLLABLES, k=rng.randint(1, 4)))
+            for _ in range(20000)
+        })
+        texts = [self.text(rng, words) for _ in range(options['posts'])]
+        with transaction.atomic():
+            author = User.objects.create_user(username='bench-duplicates')
+            started = time.perf_counter()
+            pks = self.fill(author, texts)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'Подписано постов: {len(pks)} за {elapsed:.1f} с')
+            # Правки от 2 до 40% слов дают сходство по обе стороны порога.
+            cases = []
+            for _ in range(options['queries']):
+                index = rng.randrange(len(texts))
+                share = rng.uniform(0.02, 0.4)
+                query = self.edit(rng, words, texts[index], share)
+                cases.append((query, jaccard(query, texts[index])))
+            cases += [(self.text(rng, words), 0.0)
+                      for _ in range(options['queries'])]
+            self.report(cases, dict(zip(pks, texts)))
+            transaction.set_rollback(True)
+
+    def report(self, cases, texts):
+        positives = false_positives = false_negatives = 0
+        timings = []
+        for query, similarity in cases:
+            started = time.perf_counter()
+            found = find_duplicate(query)
+            timings.append(time.perf_counter() - started)
+            expected = similarity >= THRESHOLD
+            positives += expected
+            if found is None:
+                false_negatives += expected
+            elif jaccard(query, texts[found[0]]) < THRESHOLD:
+                false_positives += 1
+        negatives = len(cases) - positives
+        timings.sort()
+        self.stdout.write(
+            f'Запросов: {len(cases)}, дубликатов со сходством '
+            f'>= {THRESHOLD}: {positives}')
+        self.stdout.write(
+            f'  ложные срабатывания: {false_positives} '
+            f'({false_positives / max(negatives, 1):.2%} от прочих)')
+        self.stdout.write(
+            f'  пропуски: {false_negatives} '
+            f'({false_negatives / max(positives, 1):.2%} от дубликатов)')
+        self.stdout.write(
+            f'  проверка: {sum(timings) / len(timings) * 1000:.2f} мс '
+            f'в среднем, p99 {timings[len(timings) * 99 // 100] * 1000:.2f} '
+            f'мс')
+        started = time.perf_counter()
+        for query, _ in cases:
+            signature(query)
+        self.stdout.write(
+            f'  из них сигнатура: '
+            f'{(time.perf_counter() - started) / len(cases) * 1000:.2f} мс')
+
+    def fill(self, author, texts):
+        pks = []
+        for batch in chunked(texts, BATCH_SIZE):
+            posts = Post.objects.bulk_create(
+                Post(text=text, author=author) for text in batch)
+            pks.extend(post.pk for post in posts)
+        if None in pks:
+            pks = list(Post.objects.filter(author=author)
+                       .order_by('pk').values_list('pk', flat=True))
+        for batch in chunked(list(zip(pks, texts)), BATCH_SIZE):
+            sign_posts(batch)
+        return pks
+
+    def text(self, rng, words):
+        return ' '.join(rng.choices(words, k=rng.randint(30, 80)))
+
+    def edit(self, rng, words, text, share):
+        """Заменяет, вставляет или удаляет долю share слов."""
+        result = text.split()
+        for _ in range(max(1, round(len(result) * share))):
+            position = rng.randrange(len(result))
+            action = rng.randrange(3)
+            if action == 0:
+                result[position] = rng.choice(words)
+            elif action == 1:
+                result.insert(position, rng.choice(words))
+            elif len(result) > 1:
+                del result[position]
+        return ' '.join(result)
+
+
+def shingles(text):
+    text = normalize(text)
+    return {text[start:start + SHINGLE_SIZE]
+            for start in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def jaccard(first, second):
+    first, second = shingles(first), shingles(second)
+    return len(first & second) / len(first | second)
@@ -0,0 +1,99 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+
+from core.benchmark import measure
+from posts.feed import ORDERING, FollowFeed
+from posts.models import Follow, Group, GroupFollow, Post
+from posts.utils import get_paginate
+
+User = get_user_model()
+
+# SQLite вставляет пачку одним составным SELECT не длиннее 500 строк.
+BATCH_SIZE = 400
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает ленту подписок на авторов и группы одним запросом '
+            'с OR и слиянием веток по индексам на сгенерированных данных. '
+            'Данные откатываются после замера.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=200000)
+        parser.add_argument('--authors', type=int, default=2000)
+        parser.add_argument('--groups', type=int, default=200)
+        parser.add_argument('--follow-authors', type=int, default=300)
+        parser.add_argument('--follow-groups', type=int, default=30)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            active, quiet = self.fill(options)
+            self.stdout.write(
+                'Читатель активных авторов и групп; читатель авторов, '
+                'писавших только в начале:')
+            for label, reader in (('активные', active), ('тихие', quiet)):
+                feeds = (
+                    ('OR', Post.objects.filter(
+                        Q(author__following__user=reader)
+                        | Q(group__followers__user=reader)
+                    ).distinct().select_related(
+                        'author', 'group').order_by(*ORDERING)),
+                    ('слияние', FollowFeed(reader)),
+                )
+                for page in (1, 50):
+                    for name, feed in feeds:
+                        seconds = measure(
+                            lambda: list(get_paginate(page, feed)), repeat=3)
+                        self.stdout.write(
+                            f'  {label:9} стр. {page:2} {name:8} '
+                            f'{seconds * 1000:8.1f} мс')
+            transaction.set_rollback(True)
+
+    def fill(self, options):
+        rng = random.Random(0)
+        User.objects.bulk_create(
+            (User(username=f'bench-author-{number}')
+             for number in range(options['authors'])),
+            batch_size=BATCH_SIZE)
+        authors = list(User.objects.filter(
+            username__startswith='bench-author').values_list('pk', flat=True))
+        Group.objects.bulk_create(
+            (Group(title=f'Группа {number}', slug=f'bench-group-{number}',
+                   description='Описание')
+             for number in range(options['groups'])),
+            batch_size=BATCH_SIZE)
+        groups = list(Group.objects.filter(
+            slug__startswith='bench-group').values_list('pk', flat=True))
+        quiet_authors = authors[:options['follow_authors']]
+        active_authors = authors[len(quiet_authors):]
+        first_pk = (Post.objects.order_by('-pk')
+                    .values_list('pk', flat=True).first() or 0) + 1
+        Post.objects.bulk_create(
+            (Post(author_id=rng.choice(
+                quiet_authors if number < len(quiet_authors) * 5
+                else active_authors),
+                group_id=rng.choice(groups) if rng.random() < 0.5 else None,
+                text=f'Пост номер {number}')
+             for number in range(options['posts'])),
+            batch_size=BATCH_SIZE)
+        # auto_now_add ставит всем постам одно время: разносим по минутам.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE posts_post SET pub_date = datetime('2026-01-01', "
+                "'+' || (id - %s) || ' minutes') WHERE id >= %s",
+                [first_pk, first_pk])
+        active = User.objects.create_user(username='bench-reader-active')
+        quiet = User.objects.create_user(username='bench-reader-quiet')
+        Follow.objects.bulk_create(
+            [Follow(user=active, author_id=author) for author in rng.sample(
+                active_authors, options['follow_authors'])]
+            + [Follow(user=quiet, author_id=author)
+               for author in quiet_authors],
+            batch_size=BATCH_SIZE)
+        GroupFollow.objects.bulk_create(
+            GroupFollow(user=active, group_id=group)
+            for group in rng.sample(groups, options['follow_groups']))
+        return active, quiet
@@ -0,0 +1,78 @@
+import itertools
+import random
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from posts.suggestions import FollowGraph
+
+
+class Command(BaseCommand):
+    help = ('Замеряет память и время расчета рекомендаций на случайном '
+            'графе подписок в памяти, без базы данных.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100000)
+        parser.add_argument('--edges', type=int, default=1000000)
+        parser.add_argument('--sample', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        edges = self.generate(options['users'], options['edges'])
+        started = time.perf_counter()
+        graph = FollowGraph(edges)
+        elapsed = time.perf_counter() - started
+        # Повторная сборка под tracemalloc: он сильно замедляет работу.
+        tracemalloc.start()
+        FollowGraph(edges)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        self.stdout.write(
+            f'Граф {len(graph)} вершин, {graph.edges} ребер: '
+            f'построен за {elapsed:.1f} с, пик памяти {peak / 2 ** 20:.0f} МБ')
+        self.stdout.write(
+            f'  массивы CSR: {graph.nbytes / 2 ** 20:.1f} МБ, '
+            f'словарь id -> номер: {self.dict_size(graph.nodes)} МБ')
+        self.stdout.write(
+            f'  для сравнения dict[int, set] только подписок: '
+            f'{self.sets_size(edges)} МБ')
+        rng = random.Random(1)
+        sample = rng.sample(range(len(graph)), options['sample'])
+        started = time.perf_counter()
+        for node in sample:
+            graph.suggest(node, 20)
+        per_user = (time.perf_counter() - started) / len(sample)
+        self.stdout.write(
+            f'  рекомендации: {per_user * 1000:.2f} мс на пользователя, '
+            f'все пользователи ~{per_user * len(graph) / 60:.1f} мин')
+
+    def generate(self, users, count):
+        """Подписки с популярностью авторов по закону Ципфа."""
+        rng = random.Random(0)
+        weights = list(itertools.accumulate(
+            1 / (rank + 1) for rank in range(users)))
+        edges = set()
+        while len(edges) < count:
+            user = rng.randrange(users)
+            author = rng.choices(range(users), cum_weights=weights)[0]
+            if user != author:
+                edges.add((user, author))
+        return sorted(edges)
+
+    def dict_size(self, mapping):
+        tracemalloc.start()
+        copy = dict(mapping)
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del copy
+        return round(size / 2 ** 20)
+
+    def sets_size(self, edges):
+        tracemalloc.start()
+        following = {}
+        for user, author in edges:
+            following.setdefault(user, set()).add(author)
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del following
+        return round(size / 2 ** 20)
@@ -0,0 +1,75 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.benchmark import format_timing, measure
+from posts.models import Post
+from posts.search import index_posts, search_posts
+
+User = get_user_model()
+
+WORDS = (
+    'кот собака дом город река лес море солнце дождь ветер книга письмо '
+    'дорога друг работа школа машина поезд музыка песня картина театр '
+    'утро вечер ночь зима весна лето осень праздник подарок сад цветок '
+    'дерево птица рыба окно дверь стол чай кофе хлеб сыр молоко суп '
+    'гулять читать писать думать видеть слышать любить ждать строить '
+    'красивый большой маленький новый старый теплый холодный быстрый'
+).split()
+RARE_WORD = 'гиппопотамами'
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает поиск по индексу FTS5 с LIKE-поиском на '
+            'сгенерированных постах. Данные откатываются после замера.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.fill(options['posts'], options['batch_size'])
+            self.stdout.write(f'Постов: {options["posts"]}')
+            for label, query in (('частое слово', 'котами'),
+                                 ('редкое слово', 'гиппопотам'),
+                                 ('два слова', 'теплый дождь')):
+                self.compare(label, query, options['repeat'])
+            transaction.set_rollback(True)
+
+    def fill(self, count, batch_size):
+        author = User.objects.create_user(username='bench-search-author')
+        rng = random.Random(0)
+        last_pk = Post.objects.order_by('-pk').values_list(
+            'pk', flat=True).first() or 0
+        for start in range(0, count, batch_size):
+            posts = []
+            for number in range(start, min(start + batch_size, count)):
+                words = rng.choices(WORDS, k=30)
+                if number % 10000 == 0:
+                    words.append(RARE_WORD)
+                posts.append(Post(author=author, text=' '.join(words)))
+            Post.objects.bulk_create(posts)
+        created = Post.objects.filter(pk__gt=last_pk).order_by('pk')
+        for start in range(0, count, batch_size):
+            batch = list(created.filter(pk__gt=last_pk).values_list(
+                'pk', 'text')[:batch_size])
+            index_posts(batch)
+            last_pk = batch[-1][0]
+
+    def compare(self, label, query, repeat):
+        def fts():
+            search_posts(query, limit=10)
+
+        def like():
+            posts = Post.objects.select_related('author', 'group')
+            for word in query.split():
+                posts = posts.filter(text__icontains=word[:-1])
+            list(posts.order_by('-pub_date')[:10])
+
+        self.stdout.write(f'{label} «{query}»:')
+        for name, func in (('  FTS5 + bm25', fts), ('  LIKE %term%', like)):
+            self.stdout.write(format_timing(name, measure(func, repeat)))
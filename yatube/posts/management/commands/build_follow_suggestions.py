@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.suggestions import load_graph, rebuild_suggestions
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации «на кого подписаться».'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Скольким пользователям пересчитывать за одну транзакцию.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        graph = load_graph()
+        self.stdout.write(
+            f'Граф: {len(graph)} пользователей, {graph.edges} подписок, '
+            f'{graph.nbytes / 2 ** 20:.1f} МБ, '
+            f'{time.perf_counter() - started:.1f} с')
+        rebuild_suggestions(graph, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Рекомендации пересчитаны за '
+            f'{time.perf_counter() - started:.1f} с'))
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts.models import RelatedPost
+from posts.related import (add_related, load_matrix, mark_built,
+                           rebuild_related, stale_pks)
+
+
+class Command(BaseCommand):
+    help = ('Считает похожие записи по TF-IDF. По умолчанию только для '
+            'новых постов и постов, измененных после прошлого подсчета.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Пересчитать соседей всех постов.')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько постов обрабатывать за одну транзакцию.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        moment = timezone.now()
+        matrix = load_matrix()
+        self.stdout.write(
+            f'Матрица {len(matrix)} постов × {len(matrix.col_indptr) - 1} '
+            f'слов, {len(matrix.indices)} ненулевых, '
+            f'{time.perf_counter() - started:.1f} с')
+        if options['full'] or not RelatedPost.objects.exists():
+            rebuild_related(matrix, options['batch_size'])
+            mark_built(moment)
+            processed = len(matrix)
+        else:
+            stale = list(stale_pks())
+            for start in range(0, len(stale), options['batch_size']):
+                batch = stale[start:start + options['batch_size']]
+                add_related(matrix, batch)
+                mark_built(moment, batch)
+            processed = len(stale)
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано постов: {processed}, '
+            f'{time.perf_counter() - started:.1f} с'))
@@ -0,0 +1,189 @@
+import os
+import time
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.template.defaultfilters import filesizeformat
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix, del_prefix
+from sorl.thumbnail.models import KVStore
+
+from posts.models import OrphanedImage, Post
+from posts.utils import chunked
+
+
+def walk_files(path):
+    """Обходит каталог потоково, не собирая список файлов в память."""
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from walk_files(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry
+
+
+class Command(BaseCommand):
+    help = ('Удаляет картинки, на которые не ссылается ни один пост, '
+            'их миниатюры и устаревшие записи sorl-thumbnail.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько файлов или записей обрабатывать за раз.')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только посчитать, сколько места освободится.')
+        parser.add_argument(
+            '--scan', action='store_true',
+            help='Дополнительно обойти все файлы в каталоге картинок.')
+        parser.add_argument(
+            '--kvstore', action='store_true',
+            help='Дополнительно почистить хранилище ключей sorl-thumbnail.')
+        parser.add_argument(
+            '--min-age', type=int, default=24 * 60 * 60,
+            help='При обходе каталога не трогать файлы моложе, секунд.')
+
+    def handle(self, *args, **options):
+        self.dry_run = options['dry_run']
+        self.batch_size = options['batch_size']
+        self.removed = 0
+        self.reclaimed = 0
+        self.collect_queue()
+        if options['scan']:
+            self.collect_storage(options['min_age'])
+        if options['kvstore']:
+            self.collect_kvstore()
+        verb = 'Будет удалено' if self.dry_run else 'Удалено'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} картинок: {self.removed}, '
+            f'освобождено: {filesizeformat(self.reclaimed)} '
+            f'({self.reclaimed} байт)'))
+
+    @staticmethod
+    def referenced(names):
+        return set(
+            Post.objects.filter(image__in=names)
+            .values_list('image', flat=True)
+        )
+
+    def collect_queue(self):
+        last_pk = 0
+        while True:
+            batch = list(
+                OrphanedImage.objects.filter(pk__gt=last_pk)
+                .order_by('pk')[:self.batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            names = {item.name for item in batch}
+            for name in names - self.referenced(names):
+                self.remove(name)
+            if not self.dry_run:
+                OrphanedImage.objects.filter(
+                    pk__in=[item.pk for item in batch]).delete()
+
+    def collect_storage(self, min_age):
+        upload_to = Post._meta.get_field('image').upload_to
+        root = default_storage.path(upload_to)
+        if not os.path.isdir(root):
+            return
+        deadline = time.time() - min_age
+        media_root = default_storage.path('')
+        entries = (
+            entry for entry in walk_files(root)
+            if entry.stat().st_mtime < deadline
+        )
+        for batch in chunked(entries, self.batch_size):
+            names = {
+                os.path.relpath(entry.path, media_root).replace(os.sep, '/')
+                for entry in batch
+            }
+            for name in names - self.referenced(names):
+                self.remove(name)
+
+    def collect_kvstore(self):
+        prefix = add_prefix('', 'image')
+        thumbnail_prefix = thumbnail_settings.THUMBNAIL_PREFIX
+        last_key = prefix
+        while True:
+            rows = list(
+                KVStore.objects.filter(
+                    key__startswith=prefix, key__gt=last_key)
+                .order_by('key')
+                .values_list('key', 'value')[:self.batch_size]
+            )
+            if not rows:
+                break
+            last_key = rows[-1][0]
+            images = [
+                (del_prefix(key), deserialize_image_file(value))
+                for key, value in rows
+            ]
+            used = self.referenced({
+                image_file.name for _, image_file in images
+                if not image_file.name.startswith(thumbnail_prefix)
+            })
+            for key, image_file in images:
+                if image_file.name.startswith(thumbnail_prefix):
+                    if not image_file.exists() and not self.dry_run:
+                        default.kvstore._delete(key)
+                elif image_file.name not in used:
+                    self.remove(image_file.name)
+        self.collect_thumbnail_lists()
+
+    def collect_thumbnail_lists(self):
+        """Удаляет списки миниатюр, исходная картинка которых пропала."""
+        prefix = add_prefix('', 'thumbnails')
+        last_key = prefix
+        while True:
+            keys = list(
+                KVStore.objects.filter(
+                    key__startswith=prefix, key__gt=last_key)
+                .order_by('key')
+                .values_list('key', flat=True)[:self.batch_size]
+            )
+            if not keys:
+                break
+            last_key = keys[-1]
+            image_keys = {add_prefix(del_prefix(key)) for key in keys}
+            alive = set(
+                KVStore.objects.filter(key__in=image_keys)
+                .values_list('key', flat=True)
+            )
+            stale = [
+                key for key in keys
+                if add_prefix(del_prefix(key)) not in alive
+            ]
+            if stale and not self.dry_run:
+                default.kvstore._delete_raw(*stale)
+
+    def remove(self, name):
+        if os.path.isabs(name):
+            return
+        image_file = ImageFile(name, default_storage)
+        thumbnail_keys = default.kvstore._get(
+            image_file.key, identity='thumbnails') or []
+        thumbnails = [
+            thumbnail for thumbnail in map(default.kvstore._get,
+                                           thumbnail_keys)
+            if thumbnail is not None
+        ]
+        size = sum(self.file_size(item) for item in [image_file, *thumbnails])
+        self.removed += 1
+        self.reclaimed += size
+        if self.dry_run:
+            self.stdout.write(f'{name}: {filesizeformat(size)}')
+            return
+        default.kvstore.delete(image_file)
+        if default_storage.exists(name):
+            default_storage.delete(name)
+
+    @staticmethod
+    def file_size(image_file):
+        try:
+            return image_file.storage.size(image_file.name)
+        except OSError:
+            return 0
@@ -0,0 +1,61 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.export import export_lines, gzip_stream
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Выгружает посты и комментарии в JSON Lines потоком, не '
+            'загружая таблицы в память.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', default='-',
+            help='Файл для выгрузки, по умолчанию stdout.')
+        parser.add_argument(
+            '--author', help='Выгрузить только посты этого автора.')
+        parser.add_argument(
+            '--no-comments', action='store_true',
+            help='Не выгружать комментарии.')
+        parser.add_argument(
+            '--gzip', action='store_true',
+            help='Сжимать вывод в gzip; включается и для файлов *.gz.')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько строк читать из базы за один запрос.')
+
+    def handle(self, *args, **options):
+        author = None
+        if options['author']:
+            author = User.objects.filter(username=options['author']).first()
+            if author is None:
+                raise CommandError(
+                    f'Пользователь {options["author"]} не найден')
+        self.count = 0
+        lines = self.counted(export_lines(
+            author, not options['no_comments'], options['batch_size']))
+        if options['gzip'] or options['output'].endswith('.gz'):
+            chunks = gzip_stream(lines)
+        else:
+            chunks = (line.encode() for line in lines)
+        if options['output'] == '-':
+            self.write(sys.stdout.buffer, chunks)
+            return
+        with open(options['output'], 'wb') as output:
+            self.write(output, chunks)
+        self.stdout.write(self.style.SUCCESS(
+            f'Выгружено строк: {self.count}'))
+
+    def counted(self, lines):
+        for line in lines:
+            self.count += 1
+            yield line
+
+    def write(self, output, chunks):
+        for chunk in chunks:
+            output.write(chunk)
+        output.flush()
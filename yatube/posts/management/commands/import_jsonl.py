@@ -0,0 +1,71 @@
+import gzip
+import io
+import json
+import sys
+import time
+from io import StringIO
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.importer import Importer, rebuild_derived
+from posts.models import Follow
+
+
+class Command(BaseCommand):
+    help = ('Загружает посты, комментарии и подписки из JSON Lines '
+            '(формат export_jsonl) пачками через bulk_create и один раз '
+            'в конце пересчитывает производные данные.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'input', help='Файл для загрузки, "-" — stdin; *.gz '
+                          'распаковываются.')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько строк каждого типа вставлять за одну транзакцию.')
+        parser.add_argument(
+            '--skip-derived', action='store_true',
+            help='Не пересчитывать индексы и счетчики после загрузки.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть положительным')
+        follows = Follow.objects.count()
+        importer = Importer(options['batch_size'])
+        started = time.perf_counter()
+        with self.open(options['input']) as lines:
+            counts = importer.load(self.rows(lines))
+        seconds = time.perf_counter() - started
+        total = counts['post'] + counts['comment'] + counts['follow']
+        self.stdout.write(
+            f'Постов: {counts["post"]}, комментариев: {counts["comment"]}, '
+            f'новых подписок: {Follow.objects.count() - follows}, '
+            f'пропущено строк: {counts["skipped"]}')
+        self.stdout.write(
+            f'Загрузка: {seconds:.1f} с, {total / max(seconds, 1e-9):.0f} '
+            f'строк/с')
+        if not options['skip_derived']:
+            started = time.perf_counter()
+            rebuild_derived(options['batch_size'], stdout=StringIO())
+            seconds = time.perf_counter() - started
+            self.stdout.write(f'Пересчет производных данных: {seconds:.1f} с')
+        self.stdout.write(self.style.SUCCESS('Загрузка завершена'))
+
+    def open(self, path):
+        if path == '-':
+            return io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
+        try:
+            if path.endswith('.gz'):
+                return gzip.open(path, 'rt', encoding='utf-8')
+            return open(path, encoding='utf-8')
+        except OSError as error:
+            raise CommandError(f'Не удалось открыть {path}: {error}')
+
+    def rows(self, lines):
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                raise CommandError(f'Строка {number}: некорректный JSON')
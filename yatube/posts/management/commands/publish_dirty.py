@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.publish import publish_dirty
+
+
+class Command(BaseCommand):
+    help = ('Выкладывает на диск страницы из очереди измененных '
+            '(PUBLISH_PAGES); удаленные страницы убирает.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Сколько адресов забирать из очереди за раз.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть положительным')
+        processed = publish_dirty(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано страниц: {processed}'))
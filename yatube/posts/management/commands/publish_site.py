@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.publish import publish_site
+
+
+class Command(BaseCommand):
+    help = ('Выкладывает на диск все страницы групп и постов в несколько '
+            'процессов и очищает очередь измененных страниц.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help='Число процессов, по умолчанию по числу ядер; 1 — без '
+                 'пула.')
+        parser.add_argument(
+            '--batch-size', type=int, default=200,
+            help='Сколько страниц отдавать процессу за раз.')
+
+    def handle(self, *args, **options):
+        if options['workers'] is not None and options['workers'] < 1:
+            raise CommandError('--workers должен быть положительным')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть положительным')
+        started = time.perf_counter()
+        written = publish_site(options['workers'], options['batch_size'])
+        seconds = time.perf_counter() - started
+        self.stdout.write(
+            f'{seconds:.1f} с, {written / max(seconds, 1e-9):.0f} страниц/с')
+        self.stdout.write(self.style.SUCCESS(
+            f'Выложено страниц: {written}'))
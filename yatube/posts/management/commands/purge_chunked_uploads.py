@@ -0,0 +1,30 @@
+import datetime
+import os
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts.models import ChunkedUpload
+
+
+class Command(BaseCommand):
+    help = 'Удаляет брошенные загрузки по частям и их временные файлы.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-age', type=int, default=24,
+            help='Удалять загрузки, в которые не приходило частей '
+                 'указанное число часов.')
+
+    def handle(self, *args, **options):
+        deadline = timezone.now() - datetime.timedelta(
+            hours=options['max_age'])
+        stale = ChunkedUpload.objects.filter(updated__lt=deadline)
+        removed = 0
+        for upload in stale.iterator():
+            if os.path.exists(upload.path):
+                os.remove(upload.path)
+            upload.delete()
+            removed += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено незавершенных загрузок: {removed}'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts.archive import rebuild_counts
+
+
+class Command(BaseCommand):
+    help = ('Заново считает число постов по месяцам для архива, например '
+            'после массовой загрузки постов без сигналов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько постов читать за один запрос.')
+
+    def handle(self, *args, **options):
+        rebuild_counts(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS('Счетчики архива пересчитаны'))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.models import Comment, Post
+from posts.search import (COMMENT_FTS_TABLE, FTS_TABLE, clear_index,
+                          index_posts)
+
+
+class Command(BaseCommand):
+    help = 'Заново строит полнотекстовые индексы постов и комментариев.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько записей индексировать за одну транзакцию.')
+
+    def handle(self, *args, **options):
+        indexed = self.rebuild(Post, FTS_TABLE, options['batch_size'])
+        self.stdout.write(f'Проиндексировано постов: {indexed}')
+        indexed = self.rebuild(
+            Comment, COMMENT_FTS_TABLE, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано комментариев: {indexed}'))
+
+    def rebuild(self, model, table, batch_size):
+        clear_index(table)
+        last_pk = 0
+        indexed = 0
+        while True:
+            batch = list(
+                model.objects.filter(pk__gt=last_pk)
+                .order_by('pk')
+                .values_list('pk', 'text')[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1][0]
+            with transaction.atomic():
+                index_posts(batch, table)
+            indexed += len(batch)
+        return indexed
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.models import Post
+from posts.tags import index_tags
+
+
+class Command(BaseCommand):
+    help = 'Заново извлекает хештеги из текста всех постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько постов обрабатывать за одну транзакцию.')
+
+    def handle(self, *args, **options):
+        last_pk = 0
+        indexed = 0
+        while True:
+            batch = list(
+                Post.objects.filter(pk__gt=last_pk)
+                .order_by('pk')
+                .values_list('pk', 'text', 'pub_date')[:options['batch_size']]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1][0]
+            with transaction.atomic():
+                index_tags(batch)
+            indexed += len(batch)
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано постов: {indexed}'))
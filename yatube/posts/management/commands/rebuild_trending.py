@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts.trending import rebuild_trending
+
+
+class Command(BaseCommand):
+    help = ('Заново считает популярность постов и групп по датам постов '
+            'и комментариев, например после смены TRENDING_HALF_LIFE.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько постов обрабатывать за одну транзакцию.')
+
+    def handle(self, *args, **options):
+        rebuild_trending(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS('Популярность пересчитана'))
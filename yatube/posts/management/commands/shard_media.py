@@ -0,0 +1,82 @@
+import os
+import shutil
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from core.storage import is_sharded, shard_name
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Переносит картинки постов в шардированные каталоги '
+            'и обновляет пути в Post.image.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько постов обрабатывать за один запрос.')
+        parser.add_argument(
+            '--start-pk', type=int, default=0,
+            help='Продолжить с постов, у которых pk больше указанного.')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать, что будет перенесено.')
+
+    def handle(self, *args, **options):
+        last_pk = options['start_pk']
+        moved = skipped = 0
+        while True:
+            batch = list(
+                Post.objects.filter(pk__gt=last_pk)
+                .exclude(image='')
+                .order_by('pk')
+                .values_list('pk', 'image')[:options['batch_size']]
+            )
+            if not batch:
+                break
+            for pk, name in batch:
+                if is_sharded(name):
+                    continue
+                if not self.relocate(pk, name, options['dry_run']):
+                    skipped += 1
+                    continue
+                moved += 1
+            last_pk = batch[-1][0]
+            self.stdout.write(f'Обработаны посты до pk={last_pk}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Перенесено файлов: {moved}, пропущено: {skipped}'))
+
+    def relocate(self, pk, name, dry_run):
+        if os.path.isabs(name) or not default_storage.exists(name):
+            self.stderr.write(f'Пост {pk}: файл {name} не найден')
+            return False
+        new_name = shard_name(name)
+        if dry_run:
+            self.stdout.write(f'{name} -> {new_name}')
+            return True
+        self.copy(name, new_name)
+        # Старый файл удаляется только после того, как строка указывает
+        # на новый путь, поэтому сайт продолжает отдавать картинку.
+        updated = Post.objects.filter(pk=pk, image=name).update(
+            image=new_name)
+        if updated:
+            default_storage.delete(name)
+        else:
+            default_storage.delete(new_name)
+        return bool(updated)
+
+    @staticmethod
+    def copy(name, new_name):
+        source = default_storage.path(name)
+        target = default_storage.path(new_name)
+        if os.path.exists(target):
+            # Файл остался от прерванного запуска.
+            if os.path.getsize(target) == os.path.getsize(source):
+                return
+            os.remove(target)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        try:
+            os.link(source, target)
+        except OSError:
+            shutil.copy2(source, target)
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from posts.duplicates import sign_posts
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Заново считает MinHash-сигнатуры и корзины LSH всех постов '
+            'для поиска почти одинаковых записей.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько постов обрабатывать за одну транзакцию.')
+
+    def handle(self, *args, **options):
+        last_pk = 0
+        signed = 0
+        while True:
+            batch = list(
+                Post.objects.filter(pk__gt=last_pk)
+                .order_by('pk')
+                .values_list('pk', 'text')[:options['batch_size']]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1][0]
+            sign_posts(batch)
+            signed += len(batch)
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано постов: {signed}'))
@@ -0,0 +1,25 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0005_auto_20220609_0154'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrphanedImage',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Путь к файлу')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата добавления')),
+            ],
+            options={
+                'verbose_name': 'Неиспользуемая картинка',
+                'verbose_name_plural': 'Неиспользуемые картинки',
+            },
+        ),
+    ]
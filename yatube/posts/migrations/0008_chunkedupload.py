@@ -0,0 +1,33 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:15
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0007_auto_20261019_0814'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChunkedUpload',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('filename', models.CharField(max_length=255, verbose_name='Имя файла')),
+                ('size', models.PositiveIntegerField(verbose_name='Размер файла')),
+                ('offset', models.PositiveIntegerField(default=0, verbose_name='Получено байт')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата начала загрузки')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunked_uploads', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Загрузка по частям',
+                'verbose_name_plural': 'Загрузки по частям',
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+import re
+
+from django.db import DatabaseError, migrations, transaction
+
+# Стеммер не зависит от моделей, и индекс должен совпадать с тем, как
+# posts.search разбирает запросы, поэтому он берется из приложения.
+from posts.stemmer import stem
+
+FTS_TABLE = 'posts_post_fts'
+WORD_RE = re.compile(r'\w+')
+BATCH_SIZE = 1000
+
+
+def index_text(text):
+    return ' '.join(stem(word) for word in WORD_RE.findall(text))
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute(
+                f'CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5('
+                f"body, tokenize = 'unicode61 remove_diacritics 2')"
+            )
+    except DatabaseError:
+        # SQLite собран без FTS5: поиск обойдется без индекса.
+        return
+    Post = apps.get_model('posts', 'Post')
+    last_pk = 0
+    while True:
+        batch = list(
+            Post.objects.filter(pk__gt=last_pk)
+            .order_by('pk')
+            .values_list('pk', 'text')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        last_pk = batch[-1][0]
+        with schema_editor.connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, body) VALUES (%s, %s)',
+                [(pk, index_text(text)) for pk, text in batch])
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_chunkedupload'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_followsuggestion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='trend',
+            field=models.FloatField(default=0.0, editable=False, help_text='Логарифм затухающей суммы активности, см. posts.trending', verbose_name='Популярность'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='trend',
+            field=models.FloatField(default=0.0, editable=False, help_text='Логарифм затухающей суммы активности, см. posts.trending', verbose_name='Популярность'),
+        ),
+        migrations.AddIndex(
+            model_name='group',
+            index=models.Index(fields=['-trend'], name='posts_group_trend_4b47c8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-trend'], name='posts_post_trend_76171f_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_trend'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostSignature',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='signature', serialize=False, to='posts.Post', verbose_name='Запись')),
+                ('minhash', models.BinaryField(help_text='Сигнатура шинглов текста, см. posts.duplicates', verbose_name='MinHash')),
+            ],
+            options={
+                'verbose_name': 'Сигнатура записи',
+                'verbose_name_plural': 'Сигнатуры записей',
+            },
+        ),
+        migrations.CreateModel(
+            name='SignatureBucket',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.BigIntegerField(db_index=True, help_text='Хеш полосы MinHash-сигнатуры', verbose_name='Ключ корзины')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.Post', verbose_name='Запись')),
+            ],
+            options={
+                'verbose_name': 'Корзина LSH',
+                'verbose_name_plural': 'Корзины LSH',
+            },
+        ),
+    ]
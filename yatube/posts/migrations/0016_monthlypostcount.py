@@ -0,0 +1,42 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:58
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0015_postsignature_signaturebucket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyPostCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='Первое число месяца', verbose_name='Месяц')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Число записей')),
+                ('author', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.Group', verbose_name='Группа')),
+            ],
+            options={
+                'verbose_name': 'Записи за месяц',
+                'verbose_name_plural': 'Записи по месяцам',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='monthlypostcount',
+            constraint=models.UniqueConstraint(condition=models.Q(('author', None), ('group', None)), fields=('month',), name='unique_site_month'),
+        ),
+        migrations.AddConstraint(
+            model_name='monthlypostcount',
+            constraint=models.UniqueConstraint(condition=models.Q(author__isnull=False), fields=('author', 'month'), name='unique_author_month'),
+        ),
+        migrations.AddConstraint(
+            model_name='monthlypostcount',
+            constraint=models.UniqueConstraint(condition=models.Q(group__isnull=False), fields=('group', 'month'), name='unique_group_month'),
+        ),
+    ]
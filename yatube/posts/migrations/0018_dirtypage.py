@@ -0,0 +1,25 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_groupfollow'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DirtyPage',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=255, unique=True, verbose_name='Адрес страницы')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата добавления')),
+            ],
+            options={
+                'verbose_name': 'Устаревшая страница',
+                'verbose_name_plural': 'Устаревшие страницы',
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:43
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+BATCH_SIZE = 1000
+# Копия posts.models.PREVIEW_LENGTH: миграция не зависит от кода приложения.
+PREVIEW_LENGTH = 300
+
+
+def fill_previews(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    last_pk = 0
+    while True:
+        batch = list(
+            Post.objects.filter(pk__gt=last_pk)
+            .order_by('pk')
+            .only('text')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+        for post in batch:
+            post.preview = Truncator(post.text).chars(PREVIEW_LENGTH)
+        Post.objects.bulk_update(batch, ['preview'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_dirtypage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='preview',
+            field=models.CharField(blank=True, editable=False, help_text='Обрезанный текст для карточек в лентах, см. posts.listing', max_length=300, verbose_name='Начало текста'),
+        ),
+        migrations.RunPython(fill_previews, migrations.RunPython.noop),
+    ]
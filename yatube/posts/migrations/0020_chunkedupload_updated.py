@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_post_preview'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chunkedupload',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, verbose_name='Дата последней части'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+from django.db import migrations, models
+from django.db.models import F
+import django.utils.timezone
+
+
+def mark_built(apps, schema_editor):
+    """Посты, у которых уже есть соседи, считаются посчитанными; у
+    остальных соседи будут посчитаны заново один раз."""
+    Post = apps.get_model('posts', 'Post')
+    Post.objects.filter(related_posts__isnull=False).update(
+        related_built_at=F('updated'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0021_comment_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Дата изменения'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='related_built_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Соседи поста устарели, если он изменен позже, см. posts.related', null=True, verbose_name='Похожие записи посчитаны'),
+        ),
+        migrations.RunPython(mark_built, migrations.RunPython.noop),
+    ]
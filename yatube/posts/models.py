@@ -1,3 +1,6 @@
+import os
+import uuid
+
 from django.contrib.auth import get_user_model
 from django.db import models
 from django.conf import settings
@@ -5,12 +8,27 @@ from django.conf import settings
 
 User = get_user_model()
 
+# Длина Post.preview вместе с многоточием: карточке в ленте хватает
+# нескольких строк текста.
+PREVIEW_LENGTH = 300
+
 
 class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField(verbose_name='Название',
                                    help_text='Описание группы')
+    trend = models.FloatField(
+        'Популярность',
+        default=0.0,
+        editable=False,
+        help_text='Логарифм затухающей суммы активности, см. posts.trending'
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-trend']),
+        ]
 
     def __str__(self):
         return self.title
@@ -21,9 +39,19 @@ class Post(models.Model):
         verbose_name='Текст записи',
         help_text='Текст новой записи'
     )
+    preview = models.CharField(
+        'Начало текста',
+        max_length=PREVIEW_LENGTH,
+        blank=True,
+        editable=False,
+        help_text='Обрезанный текст для карточек в лентах, см. posts.listing'
+    )
     pub_date = models.DateTimeField(
         auto_now_add=True,
         verbose_name='Дата публикации')
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения')
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -44,14 +72,47 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    image_placeholder = models.TextField(
+        'Превью картинки',
+        blank=True,
+        editable=False,
+        help_text='Крошечная копия картинки в виде data URI'
+    )
+    trend = models.FloatField(
+        'Популярность',
+        default=0.0,
+        editable=False,
+        help_text='Логарифм затухающей суммы активности, см. posts.trending'
+    )
+    related_built_at = models.DateTimeField(
+        'Похожие записи посчитаны',
+        null=True,
+        blank=True,
+        editable=False,
+        help_text='Соседи поста устарели, если он изменен позже, '
+                  'см. posts.related'
+    )
 
     def __str__(self):
         return self.text[:settings.LETTERS_LIMIT]
 
+    def save(self, *args, update_fields=None, **kwargs):
+        """Начало текста пересчитывается сигналом pre_save, поэтому при
+        сохранении текста через update_fields сохраняется и оно."""
+        if update_fields is not None and 'text' in update_fields:
+            update_fields = {*update_fields, 'preview'}
+        super().save(*args, update_fields=update_fields, **kwargs)
+
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Запись'
         verbose_name_plural = 'Посты'
+        indexes = [
+            models.Index(fields=['pub_date']),
+            models.Index(fields=['author', 'pub_date']),
+            models.Index(fields=['group', 'pub_date']),
+            models.Index(fields=['-trend']),
+        ]
 
 
 class Comment(models.Model):
@@ -102,3 +163,305 @@ class Follow(models.Model):
                 check=~models.Q(user=models.F('author')),
                 name='cant_self_follow'),
         ]
+
+
+class GroupFollow(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='group_follows',
+        verbose_name='Подписчик'
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='followers',
+        verbose_name='Группа'
+    )
+
+    class Meta:
+        verbose_name = 'Подписка на группу'
+        verbose_name_plural = 'Подписки на группы'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'group'], name='unique_group_members'),
+        ]
+
+
+class OrphanedImage(models.Model):
+    name = models.CharField(
+        max_length=255,
+        unique=True,
+        verbose_name='Путь к файлу',
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата добавления',
+    )
+
+    class Meta:
+        verbose_name = 'Неиспользуемая картинка'
+        verbose_name_plural = 'Неиспользуемые картинки'
+
+    def __str__(self):
+        return self.name
+
+
+class DirtyPage(models.Model):
+    """Страница, которую нужно заново выложить на диск (см. posts.publish)."""
+
+    path = models.CharField(
+        max_length=255,
+        unique=True,
+        verbose_name='Адрес страницы',
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата добавления',
+    )
+
+    class Meta:
+        verbose_name = 'Устаревшая страница'
+        verbose_name_plural = 'Устаревшие страницы'
+
+    def __str__(self):
+        return self.path
+
+
+class ChunkedUpload(models.Model):
+    token = models.UUIDField(
+        default=uuid.uuid4,
+        unique=True,
+        editable=False,
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='chunked_uploads',
+        verbose_name='Пользователь',
+    )
+    filename = models.CharField(
+        max_length=255,
+        verbose_name='Имя файла',
+    )
+    size = models.PositiveIntegerField(
+        verbose_name='Размер файла',
+    )
+    offset = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Получено байт',
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата начала загрузки',
+    )
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата последней части',
+    )
+
+    class Meta:
+        verbose_name = 'Загрузка по частям'
+        verbose_name_plural = 'Загрузки по частям'
+
+    def __str__(self):
+        return self.filename
+
+    @property
+    def path(self):
+        return os.path.join(settings.CHUNKED_UPLOAD_ROOT, self.token.hex)
+
+    @property
+    def complete(self):
+        return self.offset == self.size
+
+
+class Tag(models.Model):
+    name = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name='Название',
+        help_text='Хештег без решетки, в нижнем регистре',
+    )
+
+    class Meta:
+        verbose_name = 'Тег'
+        verbose_name_plural = 'Теги'
+
+    def __str__(self):
+        return self.name
+
+
+class PostTag(models.Model):
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='post_tags',
+        verbose_name='Запись',
+    )
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        related_name='post_tags',
+        verbose_name='Тег',
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации записи',
+        help_text='Копия Post.pub_date для ленты тега без обращения к постам',
+    )
+
+    class Meta:
+        verbose_name = 'Тег записи'
+        verbose_name_plural = 'Теги записей'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['post', 'tag'], name='unique_post_tag'),
+        ]
+        indexes = [
+            models.Index(fields=['tag', 'pub_date', 'post']),
+        ]
+
+
+class RelatedPost(models.Model):
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='related_posts',
+        verbose_name='Запись',
+    )
+    related = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Похожая запись',
+    )
+    score = models.FloatField(
+        verbose_name='Сходство',
+        help_text='Косинус между TF-IDF векторами текстов',
+    )
+
+    class Meta:
+        verbose_name = 'Похожая запись'
+        verbose_name_plural = 'Похожие записи'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['post', 'related'], name='unique_related_post'),
+        ]
+        indexes = [
+            models.Index(fields=['post', '-score']),
+        ]
+
+
+class FollowSuggestion(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follow_suggestions',
+        verbose_name='Пользователь',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Рекомендуемый автор',
+    )
+    score = models.FloatField(
+        verbose_name='Оценка',
+        help_text='Вес общих подписок и подписок подписок',
+    )
+
+    class Meta:
+        verbose_name = 'Рекомендация подписки'
+        verbose_name_plural = 'Рекомендации подписок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'], name='unique_follow_suggestion'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-score']),
+        ]
+
+
+class PostSignature(models.Model):
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='signature',
+        verbose_name='Запись',
+    )
+    minhash = models.BinaryField(
+        verbose_name='MinHash',
+        help_text='Сигнатура шинглов текста, см. posts.duplicates',
+    )
+
+    class Meta:
+        verbose_name = 'Сигнатура записи'
+        verbose_name_plural = 'Сигнатуры записей'
+
+
+class SignatureBucket(models.Model):
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Запись',
+    )
+    key = models.BigIntegerField(
+        db_index=True,
+        verbose_name='Ключ корзины',
+        help_text='Хеш полосы MinHash-сигнатуры',
+    )
+
+    class Meta:
+        verbose_name = 'Корзина LSH'
+        verbose_name_plural = 'Корзины LSH'
+
+
+class MonthlyPostCount(models.Model):
+    """Число постов за месяц: всего, в группе или у автора.
+
+    Строка без группы и автора — счетчик по всему сайту.
+    """
+    month = models.DateField(
+        verbose_name='Месяц',
+        help_text='Первое число месяца',
+    )
+    author = models.ForeignKey(
+        User,
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор',
+    )
+    group = models.ForeignKey(
+        Group,
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Группа',
+    )
+    count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число записей',
+    )
+
+    class Meta:
+        verbose_name = 'Записи за месяц'
+        verbose_name_plural = 'Записи по месяцам'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['month'],
+                condition=models.Q(author=None, group=None),
+                name='unique_site_month'),
+            models.UniqueConstraint(
+                fields=['author', 'month'],
+                condition=models.Q(author__isnull=False),
+                name='unique_author_month'),
+            models.UniqueConstraint(
+                fields=['group', 'month'],
+                condition=models.Q(group__isnull=False),
+                name='unique_group_month'),
+        ]
@@ -0,0 +1,127 @@
+"""Проверка новых постов для клиентов, которые опрашивают ленты.
+
+Наибольший id поста в области (главная, группа, автор) хранится в кеше
+под поколением этой области из posts.feeds, а поколение меняется при
+каждом новом, измененном или удаленном посте. Поколения и отметки всех
+областей читаются двумя get_many, сколько бы авторов и групп ни было в
+подписках, поэтому ответ «ничего нового» обходится двумя обращениями к
+кешу без запросов к базе. Число новых постов считается только когда
+они есть, и не дальше POLL_LIMIT.
+Подписки пользователя тоже кешируются и сбрасываются сигналами.
+
+Поколения и отметки должны видеть все процессы сервера, поэтому в
+работе кеш общий (memcached, см. CACHES в настройках): с кешем процесса
+остальные процессы отвечали бы «ничего нового» до истечения TIMEOUT.
+"""
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max, Q
+
+from .feeds import ALL, INDEX, TIMEOUT, author_scope, generations, group_scope
+from .models import Follow, Group, GroupFollow, Post
+
+User = get_user_model()
+
+# Ключи отметок и счетчиков содержат общее поколение и поколение области.
+LATEST_KEY = 'poll:latest:{}:{}:{}'
+NEW_KEY = 'poll:new:{}:{}:{}:{}'
+FOLLOWS_KEY = 'poll:follows:{}'
+GROUP_KEY = 'poll:group:{}'
+AUTHOR_KEY = 'poll:author:{}'
+
+
+def scope_filter(scope):
+    if scope == INDEX:
+        return Q()
+    kind, pk = scope.split(':')
+    if kind == 'group':
+        return Q(group_id=int(pk))
+    return Q(author_id=int(pk))
+
+
+def latest_id(scopes, versions):
+    """Наибольший id поста в областях. Отметки читаются одним get_many,
+    из базы пересчитываются только отметки сменившихся поколений."""
+    keys = {
+        scope: LATEST_KEY.format(scope, versions[ALL], versions[scope])
+        for scope in scopes
+    }
+    found = cache.get_many(keys.values())
+    missing = {
+        key: Post.objects.filter(scope_filter(scope))
+        .aggregate(latest=Max('pk'))['latest'] or 0
+        for scope, key in keys.items() if key not in found
+    }
+    if missing:
+        cache.set_many(missing, TIMEOUT)
+    return max([*found.values(), *missing.values()], default=0)
+
+
+def count_new(scopes, since):
+    posts = Post.objects.filter(
+        reduce(or_, map(scope_filter, scopes)), pk__gt=since)
+    return posts[:settings.POLL_LIMIT].count()
+
+
+def check_new(scopes, since):
+    """Число новых постов с id больше since (не больше POLL_LIMIT) и id
+    новейшего из них или None, если новых нет."""
+    versions = generations([ALL, *scopes])
+    latest = latest_id(scopes, versions)
+    if latest <= since:
+        return None
+    if len(scopes) != 1:
+        return count_new(scopes, since), latest
+    scope = scopes[0]
+    key = NEW_KEY.format(scope, since, versions[ALL], versions[scope])
+    count = cache.get(key)
+    if count is None:
+        count = count_new(scopes, since)
+        cache.set(key, count, TIMEOUT)
+    return count, latest
+
+
+def cached_pk(key, model, **lookup):
+    """pk объекта по slug или username, запомненный в кеше."""
+    pk = cache.get(key)
+    if pk is None:
+        pk = model.objects.filter(**lookup).values_list(
+            'pk', flat=True).first()
+        if pk is not None:
+            cache.set(key, pk, TIMEOUT)
+    return pk
+
+
+def group_scopes(slug):
+    pk = cached_pk(GROUP_KEY.format(slug), Group, slug=slug)
+    return None if pk is None else [group_scope(pk)]
+
+
+def author_scopes(username):
+    pk = cached_pk(AUTHOR_KEY.format(username), User, username=username)
+    return None if pk is None else [author_scope(pk)]
+
+
+def follow_scopes(user):
+    key = FOLLOWS_KEY.format(user.pk)
+    scopes = cache.get(key)
+    if scopes is None:
+        scopes = [
+            author_scope(pk) for pk in Follow.objects.filter(
+                user=user).values_list('author_id', flat=True)
+        ] + [
+            group_scope(pk) for pk in GroupFollow.objects.filter(
+                user=user).values_list('group_id', flat=True)
+        ]
+        cache.set(key, scopes, TIMEOUT)
+    return scopes
+
+
+def forget(key):
+    """Удаляет запомненные подписки или pk после фиксации транзакции."""
+    transaction.on_commit(lambda: cache.delete(key))
@@ -0,0 +1,164 @@
+"""Выкладка страниц постов и групп на диск готовым HTML.
+
+В режиме PUBLISH_PAGES страница /posts/5/ лежит в
+PUBLISH_ROOT/posts/5/index.html, и фронтовый сервер отдает ее сам, не
+обращаясь к Django, — для анонимных посетителей, у которых нет cookie
+сессии. Страницы рисуются теми же view от имени анонима; у группы
+выкладывается первая страница ленты.
+
+Выкладываются только адреса без строки запроса. По /group/slug/?page=2
+try_files нашел бы файл первой страницы, поэтому запросы с аргументами
+фронт должен передавать Django, не заглядывая на диск:
+
+    location / {
+        error_page 418 = @django;
+        if ($args) { return 418; }
+        try_files $uri/index.html @django;
+    }
+
+Сигналы не рисуют страницы сами, а ставят их адреса в очередь
+DirtyPage — повторные изменения одной страницы сливаются в одну запись.
+Команда publish_dirty разбирает очередь пачками, publish_site выкладывает
+весь сайт в несколько процессов.
+"""
+import os
+import tempfile
+from multiprocessing import Pool
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import connections
+from django.http import Http404
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+
+from .models import DirtyPage, Group, Post
+from .utils import chunked
+
+# SQLite вставляет пачку одним составным SELECT не длиннее 500 строк.
+BATCH_SIZE = 400
+
+
+def post_path(pk):
+    return reverse('posts:post_detail', args=[pk])
+
+
+def group_path(slug):
+    return reverse('posts:group_posts', args=[slug])
+
+
+def post_pages(post_id, group_ids):
+    """Страница поста и первые страницы его групп."""
+    slugs = Group.objects.filter(
+        pk__in=[pk for pk in group_ids if pk is not None]
+    ).values_list('slug', flat=True)
+    return [post_path(post_id), *map(group_path, slugs)]
+
+
+def group_pages(group_id, slugs):
+    """Страницы группы и всех ее постов: на них видно название группы."""
+    posts = Post.objects.filter(group_id=group_id).values_list(
+        'pk', flat=True)
+    return [*map(group_path, slugs), *map(post_path, posts.iterator())]
+
+
+def is_publishable(path):
+    """Адреса со строкой запроса на диск не выкладываются: фронт отдал бы
+    по ним файл страницы без аргументов."""
+    return '?' not in path
+
+
+def mark_dirty(paths):
+    """Ставит страницы в очередь на выкладку."""
+    DirtyPage.objects.bulk_create(
+        (DirtyPage(path=path) for path in set(paths)
+         if is_publishable(path)),
+        batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+
+def file_path(path):
+    return os.path.join(settings.PUBLISH_ROOT, path.strip('/'), 'index.html')
+
+
+def render_page(path):
+    """HTML страницы для анонимного посетителя или None, если ее нет."""
+    request = RequestFactory().get(path)
+    request.user = AnonymousUser()
+    match = resolve(path)
+    request.resolver_match = match
+    try:
+        response = match.func(request, *match.args, **match.kwargs)
+    except Http404:
+        return None
+    if response.status_code != 200:
+        return None
+    return response.content
+
+
+def write_page(path, content):
+    """Записывает файл атомарно: фронт не увидит недописанную страницу."""
+    target = file_path(path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    fd, temp = tempfile.mkstemp(dir=os.path.dirname(target), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as file:
+        file.write(content)
+    os.chmod(temp, 0o644)
+    os.replace(temp, target)
+
+
+def remove_page(path):
+    try:
+        os.remove(file_path(path))
+    except FileNotFoundError:
+        pass
+
+
+def publish(paths):
+    """Выкладывает страницы заново; исчезнувшие удаляет с диска, адреса
+    со строкой запроса пропускает. Возвращает число выложенных страниц."""
+    written = 0
+    for path in filter(is_publishable, paths):
+        content = render_page(path)
+        if content is None:
+            remove_page(path)
+        else:
+            write_page(path, content)
+            written += 1
+    return written
+
+
+def publish_dirty(batch_size=100):
+    """Разбирает очередь пачками. Пачка удаляется из очереди до рисования:
+    если страница снова изменится, пока ее рисуют, она вернется в очередь
+    и будет выложена еще раз. Возвращает число обработанных адресов."""
+    processed = 0
+    while True:
+        batch = list(DirtyPage.objects.order_by('pk').values_list(
+            'pk', 'path')[:batch_size])
+        if not batch:
+            return processed
+        DirtyPage.objects.filter(pk__in=[pk for pk, _ in batch]).delete()
+        publish(path for _, path in batch)
+        processed += len(batch)
+
+
+def site_paths():
+    yield from map(group_path, Group.objects.values_list('slug', flat=True)
+                   .iterator())
+    yield from map(post_path, Post.objects.order_by('pk').values_list(
+        'pk', flat=True).iterator())
+
+
+def publish_site(workers=None, batch_size=200):
+    """Выкладывает все страницы групп и постов в пуле из workers процессов
+    (по умолчанию по числу ядер), при workers=1 — в текущем процессе.
+    Возвращает число выложенных страниц."""
+    DirtyPage.objects.all().delete()
+    batches = chunked(site_paths(), batch_size)
+    if workers == 1:
+        return sum(map(publish, batches))
+    # Соединение закрывается до fork, чтобы процессы пула не делили его
+    # с родителем: каждый откроет свое при первом запросе.
+    connections.close_all()
+    with Pool(workers) as pool:
+        return sum(pool.imap_unordered(publish, batches))
@@ -0,0 +1,245 @@
+"""Похожие записи по TF-IDF векторам текстов.
+
+Матрица «посты × основы слов» хранится разреженной в формате CSR:
+три массива array (indptr, indices, data), как в scipy.sparse. Сходство
+считается пачками строк: скалярные произведения строки со всеми постами
+набираются по столбцам транспонированной матрицы, то есть только по
+постам с общими словами. Для каждого поста сохраняются top-k соседей
+в RelatedPost, и под постом они читаются одним запросом по индексу.
+
+Пост помнит, когда для него считали соседей (related_built_at): новые
+посты и посты, измененные позже этого момента, досчитываются командой
+build_related_posts, а посты без соседей второй раз не обрабатываются.
+"""
+import heapq
+import math
+from array import array
+from collections import Counter, defaultdict
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+
+from .models import Post, RelatedPost
+from .search import tokenize
+
+# Слова, которые есть больше чем в такой доле постов, не отличают посты
+# друг от друга, а списки постов по ним самые длинные. На маленьких
+# наборах постов слова не отбрасываются.
+MAX_DF = 0.2
+MAX_DF_FLOOR = 100
+MIN_SCORE = 0.05
+# Соседей ищем только по самым весомым словам поста: это редкие слова
+# с короткими списками постов, а частые слова почти не меняют порядок
+# соседей, но дают основную часть работы.
+QUERY_TERMS = 15
+CANDIDATES_FACTOR = 10
+
+
+class TfidfMatrix:
+    """Нормированные TF-IDF векторы постов в CSR и их транспонированная
+    копия для поиска постов по слову."""
+
+    def __init__(self, posts):
+        self.pks = array('q')
+        self.indptr = array('q', [0])
+        self.indices = array('l')
+        self.data = array('d')
+        vocabulary = {}
+        for pk, text in posts:
+            counts = Counter(tokenize(text))
+            self.pks.append(pk)
+            for word, count in counts.items():
+                self.indices.append(
+                    vocabulary.setdefault(word, len(vocabulary)))
+                self.data.append(count)
+            self.indptr.append(len(self.indices))
+        self.rows = {pk: row for row, pk in enumerate(self.pks)}
+        self._weigh(len(vocabulary))
+        self._transpose(len(vocabulary))
+
+    def __len__(self):
+        return len(self.pks)
+
+    def _weigh(self, columns):
+        self.df = df = array('l', bytes(array('l').itemsize * columns))
+        for column in self.indices:
+            df[column] += 1
+        total = len(self.pks)
+        max_df = max(MAX_DF * total, MAX_DF_FLOOR)
+        idf = array('d', (
+            math.log(total / count) + 1 if count <= max_df else 0.0
+            for count in df))
+        data = self.data
+        for row in range(total):
+            start, end = self.indptr[row], self.indptr[row + 1]
+            norm = 0.0
+            for index in range(start, end):
+                weight = (1 + math.log(data[index])) * idf[self.indices[index]]
+                data[index] = weight
+                norm += weight * weight
+            norm = math.sqrt(norm) or 1.0
+            for index in range(start, end):
+                data[index] /= norm
+
+    def _transpose(self, columns):
+        """Строит CSC: для каждого слова — строки и веса, где оно есть.
+
+        Слова из одного поста ни с чем его не связывают и пропускаются.
+        """
+        counts = array('q', bytes(array('q').itemsize * (columns + 1)))
+        for index, column in enumerate(self.indices):
+            if self.data[index] and self.df[column] > 1:
+                counts[column + 1] += 1
+        for column in range(columns):
+            counts[column + 1] += counts[column]
+        self.col_indptr = counts
+        size = counts[columns]
+        self.col_rows = array('q', bytes(array('q').itemsize * size))
+        self.col_data = array('d', bytes(array('d').itemsize * size))
+        fill = array('q', counts[:columns])
+        for row in range(len(self.pks)):
+            for index in range(self.indptr[row], self.indptr[row + 1]):
+                weight = self.data[index]
+                column = self.indices[index]
+                if weight and self.df[column] > 1:
+                    self.col_rows[fill[column]] = row
+                    self.col_data[fill[column]] = weight
+                    fill[column] += 1
+
+    def row(self, row):
+        start, end = self.indptr[row], self.indptr[row + 1]
+        return dict(zip(self.indices[start:end], self.data[start:end]))
+
+    def similarity(self, row, other):
+        """Косинус двух постов: векторы строк уже нормированы."""
+        vector = self.row(row)
+        return sum(vector.get(column, 0.0) * weight
+                   for column, weight in self.row(other).items())
+
+    def neighbours(self, row, limit):
+        """Самые похожие на строку row посты: список (pk, сходство).
+
+        Кандидаты набираются по самым весомым словам поста, затем для
+        лучших из них считается точный косинус.
+        """
+        start, end = self.indptr[row], self.indptr[row + 1]
+        terms = heapq.nlargest(QUERY_TERMS, range(start, end),
+                               key=self.data.__getitem__)
+        scores = defaultdict(float)
+        for index in terms:
+            weight = self.data[index]
+            column = self.indices[index]
+            if not weight or self.df[column] < 2:
+                continue
+            col_start = self.col_indptr[column]
+            col_end = self.col_indptr[column + 1]
+            for other, other_weight in zip(self.col_rows[col_start:col_end],
+                                           self.col_data[col_start:col_end]):
+                scores[other] += weight * other_weight
+        scores.pop(row, None)
+        candidates = heapq.nlargest(
+            limit * CANDIDATES_FACTOR, scores, key=scores.__getitem__)
+        vector = self.row(row)
+        exact = (
+            (other, sum(vector.get(column, 0.0) * weight
+                        for column, weight in self.row(other).items()))
+            for other in candidates
+        )
+        best = heapq.nlargest(limit, exact, key=itemgetter(1))
+        return [(self.pks[other], score) for other, score in best
+                if score >= MIN_SCORE]
+
+
+def load_matrix():
+    return TfidfMatrix(
+        Post.objects.order_by('pk').values_list('pk', 'text').iterator())
+
+
+def rebuild_related(matrix, batch_size=1000, limit=None):
+    """Пересчитывает соседей всех постов пачками по batch_size строк.
+
+    Связи пачки заменяются в одной транзакции с ее пересчетом, так что
+    во время полного пересчета под постами остаются прежние соседи.
+    """
+    limit = limit or settings.RELATED_POSTS_LIMIT
+    for start in range(0, len(matrix), batch_size):
+        rows = range(start, min(start + batch_size, len(matrix)))
+        with transaction.atomic():
+            RelatedPost.objects.filter(
+                post_id__in=[matrix.pks[row] for row in rows]).delete()
+            RelatedPost.objects.bulk_create(
+                (RelatedPost(post_id=matrix.pks[row], related_id=pk,
+                             score=score)
+                 for row in rows
+                 for pk, score in matrix.neighbours(row, limit)),
+                batch_size=500)
+
+
+def stale_pks():
+    """id постов, соседей которых еще не считали или текст которых
+    изменился после подсчета."""
+    return Post.objects.filter(
+        Q(related_built_at__isnull=True)
+        | Q(related_built_at__lt=F('updated'))
+    ).order_by('pk').values_list('pk', flat=True)
+
+
+def mark_built(moment, pks=None):
+    """Запоминает подсчет соседей. moment — время до загрузки матрицы:
+    посты, измененные позже, останутся устаревшими."""
+    posts = Post.objects.all() if pks is None else Post.objects.filter(
+        pk__in=pks)
+    posts.update(related_built_at=moment)
+
+
+def add_related(matrix, pks, limit=None):
+    """Находит соседей новых и измененных постов и добавляет их в списки
+    соседей, если они похожи сильнее, чем худший из сохраненных.
+
+    Собственные связи этих постов заменяются новыми, а связи на них из
+    чужих списков пересчитываются по новому тексту; связь, сходство
+    которой упало ниже MIN_SCORE, удаляется.
+    """
+    limit = limit or settings.RELATED_POSTS_LIMIT
+    found = {pk: matrix.neighbours(matrix.rows[pk], limit)
+             for pk in pks if pk in matrix.rows}
+    candidates = defaultdict(list)
+    for pk, neighbours in found.items():
+        candidates[pk] = list(neighbours)
+        for other, score in neighbours:
+            if other not in found:
+                candidates[other].append((pk, score))
+    with transaction.atomic():
+        RelatedPost.objects.filter(post_id__in=found).delete()
+        for post_id, related_id in RelatedPost.objects.filter(
+                related_id__in=found).values_list('post_id', 'related_id'):
+            if post_id in matrix.rows:
+                candidates[post_id].append((related_id, matrix.similarity(
+                    matrix.rows[post_id], matrix.rows[related_id])))
+        stored = defaultdict(list)
+        for post_id, related_id, score in RelatedPost.objects.filter(
+                post_id__in=candidates).values_list(
+                    'post_id', 'related_id', 'score'):
+            stored[post_id].append((related_id, score))
+        for pk, new in candidates.items():
+            _merge(pk, stored[pk], new, limit)
+
+
+def _merge(pk, stored, new, limit):
+    """Оставляет limit лучших из сохраненных и новых соседей; новое
+    сходство заменяет сохраненное."""
+    scores = {related: score
+              for related, score in dict(stored + new).items()
+              if score >= MIN_SCORE}
+    best = dict(heapq.nlargest(limit, scores.items(), key=itemgetter(1)))
+    old = dict(stored)
+    changed = [related for related, score in old.items()
+               if best.get(related) != score]
+    if changed:
+        RelatedPost.objects.filter(
+            post_id=pk, related_id__in=changed).delete()
+    RelatedPost.objects.bulk_create(
+        RelatedPost(post_id=pk, related_id=related, score=score)
+        for related, score in best.items() if old.get(related) != score)
@@ -0,0 +1,193 @@
+"""Полнотекстовый поиск по постам на индексе SQLite FTS5.
+
+В таблицу posts_post_fts попадают основы слов текста поста (см. stemmer),
+rowid строки совпадает с id поста. Так же устроена posts_comment_fts для
+комментариев, по ней ищет админка. Индексы обновляются сигналами моделей
+и командой rebuild_search_index.
+"""
+import re
+
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Post
+from .stemmer import stem
+from .utils import decode_cursor, encode_cursor
+
+FTS_TABLE = 'posts_post_fts'
+COMMENT_FTS_TABLE = 'posts_comment_fts'
+WORD_RE = re.compile(r'\w+')
+SNIPPET_WIDTH = 200
+
+_available = {}
+
+
+def is_available(table=FTS_TABLE):
+    """Есть ли индекс: база SQLite, собранная с FTS5, и миграция создала
+    таблицу. Проверяется один раз на процесс."""
+    if table not in _available:
+        _available[table] = (connection.vendor == 'sqlite'
+                             and probe_index(table))
+    return _available[table]
+
+
+def probe_index(table=FTS_TABLE):
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'SELECT rowid FROM {table} LIMIT 0')
+    except DatabaseError:
+        return False
+    return True
+
+
+def tokenize(text):
+    return [stem(word) for word in WORD_RE.findall(text)]
+
+
+def index_text(text):
+    return ' '.join(tokenize(text))
+
+
+def build_match(query):
+    """Запрос FTS5: все основы слов из запроса, с поиском по префиксу."""
+    stems = tokenize(query)
+    return ' AND '.join(f'"{word}"*' for word in stems), stems
+
+
+class MatchingIds(RawSQL):
+    """Подзапрос rowid строк индекса, подходящих под выражение MATCH.
+
+    RawSQL берет SQL в скобки, а lookup __in добавляет свои; SQLite
+    считает ((SELECT ...)) скалярным подзапросом и берет одну строку.
+    """
+
+    def __init__(self, match, table=FTS_TABLE):
+        super().__init__(
+            f'SELECT rowid FROM {table} WHERE {table} MATCH %s', [match])
+
+    def as_sql(self, compiler, connection):
+        return self.sql, self.params
+
+
+def match_q(query, table=FTS_TABLE):
+    """Условие для фильтрации постов (или комментариев по их индексу) по
+    запросу, например в админке."""
+    match, stems = build_match(query)
+    if not match:
+        return Q(pk__in=[])
+    if not is_available(table):
+        condition = Q()
+        for word in stems:
+            condition &= Q(text__icontains=word)
+        return condition
+    return Q(pk__in=MatchingIds(match, table))
+
+
+def index_posts(pairs, table=FTS_TABLE):
+    """Добавляет или обновляет в индексе пары (id поста или комментария,
+    текст)."""
+    rows = [(pk, index_text(text)) for pk, text in pairs]
+    if not rows or not is_available(table):
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {table} WHERE rowid = %s',
+            [(pk,) for pk, _ in rows])
+        cursor.executemany(
+            f'INSERT INTO {table} (rowid, body) VALUES (%s, %s)', rows)
+
+
+def unindex_posts(pks, table=FTS_TABLE):
+    if not pks or not is_available(table):
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {table} WHERE rowid = %s',
+            [(pk,) for pk in pks])
+
+
+def clear_index(table=FTS_TABLE):
+    if is_available(table):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {table}')
+
+
+def highlight(text, stems, width=SNIPPET_WIDTH):
+    """Фрагмент текста вокруг первого совпадения с подсвеченными словами."""
+    matches = [
+        match for match in WORD_RE.finditer(text)
+        if any(stem(match.group()).startswith(word) for word in stems)
+    ]
+    start = max(matches[0].start() - width // 4, 0) if matches else 0
+    end = min(start + width, len(text))
+    parts = ['…' if start else '']
+    position = start
+    for match in matches:
+        if match.start() < start or match.end() > end:
+            continue
+        parts.append(escape(text[position:match.start()]))
+        parts.append(f'<mark>{escape(match.group())}</mark>')
+        position = match.end()
+    parts.append(escape(text[position:end]))
+    parts.append('…' if end < len(text) else '')
+    return mark_safe(''.join(parts))
+
+
+def search_posts(query, cursor=None, limit=10):
+    """Ищет посты по релевантности (bm25) с курсорной пагинацией.
+
+    Возвращает список постов с атрибутом snippet и курсор следующей
+    страницы или None.
+    """
+    match, stems = build_match(query)
+    if not match:
+        return [], None
+    if not is_available():
+        return fallback_search(stems, cursor, limit)
+    after = decode_cursor(cursor)
+    if not after or len(after) != 2:
+        after = [float('-inf'), 0]
+    sql = (
+        f'SELECT score, rowid FROM ('
+        f'  SELECT rowid, bm25({FTS_TABLE}) AS score FROM {FTS_TABLE}'
+        f'  WHERE {FTS_TABLE} MATCH %s'
+        f') WHERE score > %s OR (score = %s AND rowid > %s) '
+        f'ORDER BY score, rowid LIMIT %s'
+    )
+    with connection.cursor() as db_cursor:
+        db_cursor.execute(
+            sql, [match, after[0], after[0], after[1], limit + 1])
+        rows = db_cursor.fetchall()
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(*rows[limit - 1])
+    rows = rows[:limit]
+    posts = Post.objects.select_related('author', 'group').in_bulk(
+        [pk for _, pk in rows])
+    results = []
+    for _, pk in rows:
+        post = posts.get(pk)
+        if post is not None:
+            post.snippet = highlight(post.text, stems)
+            results.append(post)
+    return results, next_cursor
+
+
+def fallback_search(stems, cursor, limit):
+    """Поиск без индекса для баз, где нет FTS5."""
+    after = decode_cursor(cursor)
+    posts = Post.objects.select_related('author', 'group').order_by('-pk')
+    for word in stems:
+        posts = posts.filter(text__icontains=word)
+    if after:
+        posts = posts.filter(pk__lt=after[0])
+    results = list(posts[:limit + 1])
+    next_cursor = (encode_cursor(results[limit - 1].pk)
+                   if len(results) > limit else None)
+    results = results[:limit]
+    for post in results:
+        post.snippet = highlight(post.text, stems)
+    return results, next_cursor
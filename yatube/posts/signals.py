@@ -0,0 +1,284 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from .archive import adjust, month_of, record_change
+from .autocomplete import GROUP, USER, USER_FIELDS, shared_index
+from .duplicates import sign_posts
+from .feeds import bump, group_scope, post_scopes, shard_of, shard_scope
+from .images import update_image_meta
+from .listing import make_preview
+from .models import (Comment, Follow, Group, GroupFollow, OrphanedImage,
+                     Post)
+from .poll import AUTHOR_KEY, FOLLOWS_KEY, GROUP_KEY, forget
+from .publish import (group_pages, group_path, mark_dirty, post_pages,
+                      post_path)
+from .search import COMMENT_FTS_TABLE, index_posts, unindex_posts
+from .tags import sync_tags
+from .trending import record_comment, record_follow, record_post
+
+
+def mark_orphaned(name):
+    """Ставит файл в очередь сборщика неиспользуемых картинок."""
+    if name:
+        OrphanedImage.objects.get_or_create(name=name)
+
+
+@receiver(pre_save, sender=Post)
+def handle_image_change(sender, instance, raw, update_fields, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and 'image' not in update_fields:
+        return
+    old_name = None
+    if instance.pk is not None:
+        old_name = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list('image', flat=True)
+            .first()
+        )
+    if old_name == instance.image.name and instance.image._committed:
+        return
+    if old_name:
+        mark_orphaned(old_name)
+    update_image_meta(instance)
+
+
+@receiver(pre_save, sender=Post)
+def update_preview(sender, instance, raw, update_fields, **kwargs):
+    """Пересчитывается при каждом сохранении; Post.save() добавляет
+    'preview' к update_fields с 'text'."""
+    instance.preview = make_preview(instance.text)
+
+
+@receiver(post_delete, sender=Post)
+def track_deleted_image(sender, instance, **kwargs):
+    mark_orphaned(instance.image.name)
+
+
+@receiver(post_save, sender=Post)
+def update_search_index(sender, instance, raw, update_fields, **kwargs):
+    if update_fields is not None and 'text' not in update_fields:
+        return
+    index_posts([(instance.pk, instance.text)])
+
+
+@receiver(post_delete, sender=Post)
+def remove_from_search_index(sender, instance, **kwargs):
+    unindex_posts([instance.pk])
+
+
+@receiver(post_save, sender=Comment)
+def update_comment_search_index(sender, instance, raw, update_fields,
+                                **kwargs):
+    if update_fields is not None and 'text' not in update_fields:
+        return
+    index_posts([(instance.pk, instance.text)], COMMENT_FTS_TABLE)
+
+
+@receiver(post_delete, sender=Comment)
+def remove_comment_from_search_index(sender, instance, **kwargs):
+    unindex_posts([instance.pk], COMMENT_FTS_TABLE)
+
+
+@receiver(post_save, sender=Post)
+def update_tags(sender, instance, raw, update_fields, **kwargs):
+    if update_fields is not None and 'text' not in update_fields:
+        return
+    sync_tags(instance)
+
+
+@receiver(post_save, sender=Post)
+def update_signature(sender, instance, raw, update_fields, **kwargs):
+    if update_fields is not None and 'text' not in update_fields:
+        return
+    sign_posts([(instance.pk, instance.text)])
+
+
+@receiver(post_save, sender=Post)
+def track_new_post(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        record_post(instance)
+
+
+@receiver(pre_save, sender=Post)
+def remember_archive_scope(sender, instance, raw, update_fields, **kwargs):
+    instance._archive_scope = None
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and not {'author', 'group'} & set(
+            update_fields):
+        return
+    instance._archive_scope = (
+        Post.objects.filter(pk=instance.pk)
+        .values_list('author_id', 'group_id')
+        .first()
+    )
+
+
+@receiver(post_save, sender=Post)
+def update_archive_counts(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    if created:
+        adjust(month_of(instance.pub_date), instance.author_id,
+               instance.group_id, 1)
+    elif getattr(instance, '_archive_scope', None) is not None:
+        record_change(instance, *instance._archive_scope)
+
+
+@receiver(post_delete, sender=Post)
+def remove_from_archive_counts(sender, instance, **kwargs):
+    adjust(month_of(instance.pub_date), instance.author_id,
+           instance.group_id, -1)
+
+
+@receiver(post_save, sender=Post)
+def bump_post_feeds(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    scopes = post_scopes(instance.author_id, instance.group_id)
+    old_scope = getattr(instance, '_archive_scope', None)
+    if old_scope is not None:
+        scopes += post_scopes(*old_scope)
+    if created:
+        scopes.append(shard_scope('posts', shard_of(instance.pk)))
+    bump(*set(scopes))
+
+
+@receiver(post_delete, sender=Post)
+def bump_deleted_post_feeds(sender, instance, **kwargs):
+    bump(*post_scopes(instance.author_id, instance.group_id),
+         shard_scope('posts', shard_of(instance.pk)))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def bump_group_feeds(sender, instance, **kwargs):
+    bump(group_scope(instance.pk),
+         shard_scope('groups', shard_of(instance.pk)))
+
+
+@receiver(post_save, sender=Comment)
+def track_new_comment(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        record_comment(instance)
+
+
+@receiver(post_save, sender=Follow)
+def track_new_follow(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        record_follow(instance)
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def update_user_autocomplete(sender, instance, update_fields=None,
+                             **kwargs):
+    """Сохранения без полей индекса, например last_login при каждом
+    входе, не рассылаются другим процессам."""
+    if update_fields is not None and not USER_FIELDS & update_fields:
+        return
+    shared_index.changed(USER, instance.pk)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def update_group_autocomplete(sender, instance, **kwargs):
+    shared_index.changed(GROUP, instance.pk)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+@receiver(post_save, sender=GroupFollow)
+@receiver(post_delete, sender=GroupFollow)
+def forget_poll_follows(sender, instance, **kwargs):
+    forget(FOLLOWS_KEY.format(instance.user_id))
+
+
+@receiver(pre_save, sender=get_user_model())
+def remember_username(sender, instance, raw, update_fields, **kwargs):
+    instance._old_username = None
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and 'username' not in update_fields:
+        return
+    instance._old_username = (
+        sender.objects.filter(pk=instance.pk)
+        .values_list('username', flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def forget_poll_group(sender, instance, **kwargs):
+    """После смены slug старый адрес должен отвечать 404, поэтому
+    забывается и прежний slug."""
+    slugs = {instance.slug, getattr(instance, '_old_slug', None)}
+    for slug in slugs - {None}:
+        forget(GROUP_KEY.format(slug))
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def forget_poll_author(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'username' not in update_fields:
+        return
+    usernames = {instance.username, getattr(instance, '_old_username', None)}
+    for username in usernames - {None}:
+        forget(AUTHOR_KEY.format(username))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def mark_post_pages(sender, instance, raw=False, **kwargs):
+    if raw or not settings.PUBLISH_PAGES:
+        return
+    group_ids = {instance.group_id}
+    old_scope = getattr(instance, '_archive_scope', None)
+    if old_scope is not None:
+        group_ids.add(old_scope[1])
+    mark_dirty(post_pages(instance.pk, group_ids))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def mark_comment_pages(sender, instance, raw=False, **kwargs):
+    if raw or not settings.PUBLISH_PAGES or instance.post_id is None:
+        return
+    mark_dirty([post_path(instance.post_id)])
+
+
+@receiver(pre_save, sender=Group)
+def remember_slug(sender, instance, raw, **kwargs):
+    """Прежний slug нужен выкладке страниц и опросу новых постов."""
+    instance._old_slug = None
+    if raw or instance.pk is None:
+        return
+    instance._old_slug = (
+        Group.objects.filter(pk=instance.pk)
+        .values_list('slug', flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=Group)
+def mark_group_pages(sender, instance, created, raw, **kwargs):
+    if raw or not settings.PUBLISH_PAGES:
+        return
+    if created:
+        mark_dirty([group_path(instance.slug)])
+        return
+    slugs = {instance.slug, getattr(instance, '_old_slug', None)}
+    mark_dirty(group_pages(instance.pk, slugs - {None}))
+
+
+@receiver(pre_delete, sender=Group)
+def mark_deleted_group_pages(sender, instance, **kwargs):
+    """Посты группы теряют ее до post_delete, поэтому их адреса
+    собираются заранее."""
+    if settings.PUBLISH_PAGES:
+        mark_dirty(group_pages(instance.pk, [instance.slug]))
@@ -0,0 +1,121 @@
+"""Стеммер для русского языка по алгоритму Snowball.
+
+https://snowballstem.org/algorithms/russian/stemmer.html
+Английские и прочие слова возвращаются в нижнем регистре без изменений.
+"""
+import re
+from functools import lru_cache
+
+VOWELS = 'аеиоуыэюя'
+CYRILLIC_RE = re.compile('[а-я]')
+
+
+def _endings(after_a_ya=(), other=()):
+    """Окончания от длинных к коротким; перед первыми нужна а или я."""
+    endings = [(ending, True) for ending in after_a_ya]
+    endings += [(ending, False) for ending in other]
+    return sorted(endings, key=lambda item: -len(item[0]))
+
+
+ADJECTIVE = (
+    'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+    'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю',
+    'ая', 'яя', 'ою', 'ею',
+)
+PARTICIPLE_AFTER_A_YA = ('ем', 'нн', 'вш', 'ющ', 'щ')
+PARTICIPLE = ('ивш', 'ывш', 'ующ')
+
+PERFECTIVE_GERUND = _endings(
+    ('в', 'вши', 'вшись'),
+    ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'),
+)
+REFLEXIVE = _endings(other=('ся', 'сь'))
+ADJECTIVAL = _endings(
+    [p + a for p in PARTICIPLE_AFTER_A_YA for a in ADJECTIVE],
+    [p + a for p in PARTICIPLE for a in ADJECTIVE] + list(ADJECTIVE),
+)
+VERB = _endings(
+    ('ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет',
+     'ют', 'ны', 'ть', 'ешь', 'нно'),
+    ('ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй',
+     'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят', 'ует', 'уют',
+     'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю'),
+)
+NOUN = _endings(other=(
+    'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии', 'и',
+    'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам', 'ом', 'о',
+    'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия', 'ья', 'я',
+))
+SUPERLATIVE = _endings(other=('ейше', 'ейш'))
+DERIVATIONAL = _endings(other=('ость', 'ост'))
+
+
+def _regions(word):
+    rv = r1 = r2 = len(word)
+    for index, letter in enumerate(word):
+        if letter in VOWELS:
+            rv = index + 1
+            break
+    for index in range(1, len(word)):
+        if word[index - 1] in VOWELS and word[index] not in VOWELS:
+            r1 = index + 1
+            break
+    for index in range(r1 + 1, len(word)):
+        if word[index - 1] in VOWELS and word[index] not in VOWELS:
+            r2 = index + 1
+            break
+    return rv, r2
+
+
+def _strip(word, start, endings):
+    """Отрезает самое длинное окончание, целиком лежащее в word[start:]."""
+    region = word[start:]
+    for ending, after_a_ya in endings:
+        if not region.endswith(ending):
+            continue
+        if after_a_ya and not region[:-len(ending)].endswith(('а', 'я')):
+            continue
+        return word[:-len(ending)]
+    return None
+
+
+def _strip_inflection(word, rv):
+    """Шаг 1: деепричастие либо возвратная частица и окончание."""
+    result = _strip(word, rv, PERFECTIVE_GERUND)
+    if result is not None:
+        return result
+    reflexive = _strip(word, rv, REFLEXIVE)
+    if reflexive is not None:
+        word = reflexive
+    for endings in (ADJECTIVAL, VERB, NOUN):
+        result = _strip(word, rv, endings)
+        if result is not None:
+            return result
+    return word
+
+
+def _tidy_up(word, rv):
+    """Шаг 4: двойная н, превосходная степень и мягкий знак."""
+    if word[rv:].endswith('нн'):
+        return word[:-1]
+    result = _strip(word, rv, SUPERLATIVE)
+    if result is not None:
+        return result[:-1] if result[rv:].endswith('нн') else result
+    if word[rv:].endswith('ь'):
+        return word[:-1]
+    return word
+
+
+@lru_cache(maxsize=100000)
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    if not CYRILLIC_RE.search(word):
+        return word
+    rv, r2 = _regions(word)
+    word = _strip_inflection(word, rv)
+    if word[rv:].endswith('и'):
+        word = word[:-1]
+    result = _strip(word, r2, DERIVATIONAL)
+    if result is not None:
+        word = result
+    return _tidy_up(word, rv)
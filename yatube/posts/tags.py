@@ -0,0 +1,81 @@
+"""Хештеги в тексте постов и обратный индекс тег -> посты.
+
+Связи PostTag хранят копию даты публикации, поэтому лента тега читается
+одним проходом по индексу (tag, pub_date, post).
+"""
+import re
+
+from django.db.models import Q
+
+from .listing import listing
+from .models import Post, PostTag, Tag
+from .utils import decode_date_cursor, encode_cursor
+
+TAG_RE = re.compile(r'(?<![\w#])#(\w+)')
+TAG_MAX_LENGTH = Tag._meta.get_field('name').max_length
+
+
+def extract_tags(text):
+    """Названия хештегов из текста: без решетки, в нижнем регистре."""
+    return {
+        name.lower() for name in TAG_RE.findall(text)
+        if len(name) <= TAG_MAX_LENGTH
+    }
+
+
+def get_tags(names):
+    """Теги с заданными названиями; недостающие создаются."""
+    tags = {tag.name: tag for tag in Tag.objects.filter(name__in=names)}
+    missing = [Tag(name=name) for name in names if name not in tags]
+    if missing:
+        Tag.objects.bulk_create(missing, ignore_conflicts=True)
+        tags.update(
+            (tag.name, tag) for tag in Tag.objects.filter(
+                name__in=[tag.name for tag in missing]))
+    return tags
+
+
+def sync_tags(post):
+    """Приводит теги поста к тексту, меняя только разницу."""
+    new = extract_tags(post.text)
+    old = dict(
+        PostTag.objects.filter(post=post).values_list('tag__name', 'pk'))
+    removed = [pk for name, pk in old.items() if name not in new]
+    if removed:
+        PostTag.objects.filter(pk__in=removed).delete()
+    added = new - old.keys()
+    if added:
+        PostTag.objects.bulk_create(
+            PostTag(post=post, tag=tag, pub_date=post.pub_date)
+            for tag in get_tags(added).values())
+
+
+def index_tags(posts):
+    """Заново строит связи для пачки постов (id, text, pub_date)."""
+    post_tags = {pk: (extract_tags(text), pub_date)
+                 for pk, text, pub_date in posts}
+    PostTag.objects.filter(post_id__in=post_tags).delete()
+    tags = get_tags(set().union(*(names for names, _ in post_tags.values())))
+    PostTag.objects.bulk_create(
+        (PostTag(post_id=pk, tag=tags[name], pub_date=pub_date)
+         for pk, (names, pub_date) in post_tags.items()
+         for name in names),
+        batch_size=500)
+
+
+def tag_feed(tag, cursor=None, limit=10):
+    """Посты тега от новых к старым и курсор следующей страницы."""
+    links = PostTag.objects.filter(tag=tag).order_by('-pub_date', '-post_id')
+    after = decode_date_cursor(cursor)
+    if after is not None:
+        pub_date, pk = after
+        links = links.filter(
+            Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, post_id__lt=pk))
+    rows = list(links.values_list('pub_date', 'post_id')[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        pub_date, pk = rows[limit - 1]
+        next_cursor = encode_cursor(pub_date.isoformat(), pk)
+    posts = listing(Post.objects.all()).in_bulk(
+        [pk for _, pk in rows[:limit]])
+    return [posts[pk] for _, pk in rows[:limit] if pk in posts], next_cursor
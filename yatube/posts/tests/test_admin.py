@@ -0,0 +1,116 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.admin import EstimatedCountPaginator, RangeDatesQuerySet
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class AdminChangelistTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password')
+        cls.user = User.objects.create_user(username='NoNameAuthor')
+        cls.group = Group.objects.create(
+            title='Тестовое название группы',
+            slug='test-slug',
+            description='Тестовое описание группы',
+        )
+        cls.cats = Post.objects.create(
+            author=cls.user, group=cls.group, text='Коты спят на диване')
+        cls.kittens = Post.objects.create(
+            author=cls.admin, text='Котята играют с котом')
+        Comment.objects.create(post=cls.cats, author=cls.user, text='Мяу')
+        Follow.objects.create(user=cls.admin, author=cls.user)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def changelist(self, model, **params):
+        url = reverse(f'admin:posts_{model}_changelist')
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return list(response.context['cl'].result_list)
+
+    def test_search_by_text_and_username(self):
+        """Посты ищутся по словоформе и по началу имени автора"""
+        self.assertCountEqual(self.changelist('post', q='котов'),
+                              [self.cats, self.kittens])
+        self.assertEqual(self.changelist('post', q='NoName'), [self.cats])
+        self.assertEqual(len(self.changelist('comment', q='NoName')), 1)
+        self.assertEqual(len(self.changelist('comment', q='мяу')), 1)
+        self.assertEqual(len(self.changelist('follow', q='adm')), 1)
+        self.assertEqual(self.changelist('follow', q='nobody'), [])
+
+    def test_user_search(self):
+        """Пользователи ищутся по началу имени или email без учета
+        регистра"""
+        url = reverse('admin:auth_user_changelist')
+        for query in ('nonameauthor', 'ADMIN@'):
+            with self.subTest(query=query):
+                response = self.client.get(url, {'q': query})
+                self.assertEqual(len(response.context['cl'].result_list), 1)
+
+    def test_post_changelist_queries_do_not_grow(self):
+        """Число запросов списка постов не зависит от числа строк"""
+        url = reverse('admin:posts_post_changelist')
+        with CaptureQueriesContext(connection) as before:
+            self.client.get(url)
+        for number in range(5):
+            Post.objects.create(author=self.user, group=self.group,
+                                text=f'Пост {number}')
+        with self.assertNumQueries(len(before)):
+            self.client.get(url)
+
+    def test_date_hierarchy(self):
+        """Навигация по датам открывает год, месяц и день"""
+        today = timezone.localdate()
+        for params in ({}, {'pub_date__year': today.year},
+                       {'pub_date__year': today.year,
+                        'pub_date__month': today.month},
+                       {'pub_date__year': today.year,
+                        'pub_date__month': today.month,
+                        'pub_date__day': today.day}):
+            with self.subTest(params=params):
+                self.assertEqual(len(self.changelist('post', **params)), 2)
+
+
+class RangeDatesTest(TestCase):
+    def test_dates_match_django_dates(self):
+        """dates() по диапазонам совпадает с обычным dates()"""
+        user = User.objects.create_user(username='NoNameAuthor')
+        moments = (datetime.datetime(2020, 12, 31, 23, 59),
+                   datetime.datetime(2021, 1, 1),
+                   datetime.datetime(2021, 3, 15, 12),
+                   datetime.datetime(2023, 2, 28, 6))
+        for moment in moments:
+            post = Post.objects.create(author=user, text='Тестовый пост')
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=timezone.make_aware(moment))
+        queryset = RangeDatesQuerySet(Post)
+        for kind in ('year', 'month', 'day'):
+            with self.subTest(kind=kind):
+                self.assertEqual(queryset.dates('pub_date', kind),
+                                 list(Post.objects.dates('pub_date', kind)))
+
+    def test_paginator_estimates_unfiltered_count(self):
+        user = User.objects.create_user(username='NoNameAuthor')
+        posts = [Post.objects.create(author=user, text=str(number))
+                 for number in range(5)]
+        posts[0].delete()
+        paginator = EstimatedCountPaginator(Post.objects.all(), 2)
+        self.assertEqual(paginator.count, posts[-1].pk)
+        paginator = EstimatedCountPaginator(
+            Post.objects.filter(author=user), 2)
+        paginator.count_limit = 3
+        self.assertEqual(paginator.count, 3)
@@ -0,0 +1,104 @@
+import datetime
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.archive import month_of
+from posts.models import Group, MonthlyPostCount, Post
+
+User = get_user_model()
+
+
+def moment(year, month, day):
+    return timezone.make_aware(datetime.datetime(year, month, day, 12))
+
+
+class ArchiveTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='NoNameAuthor')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug',
+            description='Тестовое описание')
+        for author, group, date in (
+                (cls.author, cls.group, moment(2026, 1, 31)),
+                (cls.author, None, moment(2026, 2, 1)),
+                (cls.other, cls.group, moment(2026, 2, 10)),
+                (cls.other, None, moment(2025, 12, 1))):
+            post = Post.objects.create(author=author, group=group, text='Т')
+            Post.objects.filter(pk=post.pk).update(pub_date=date)
+        call_command('rebuild_archive_counts', stdout=StringIO())
+
+    def setUp(self):
+        self.client = Client()
+
+    def months(self, name, *args):
+        response = self.client.get(reverse(f'posts:{name}', args=args))
+        return [(month.strftime('%Y-%m'), count)
+                for month, count, _ in response.context['months']]
+
+    def month_posts(self, name, *args):
+        response = self.client.get(reverse(f'posts:{name}', args=args))
+        return {post.pub_date for post in response.context['page_obj']}
+
+    def test_month_index(self):
+        self.assertEqual(self.months('archive_index'),
+                         [('2026-02', 2), ('2026-01', 1), ('2025-12', 1)])
+        self.assertEqual(self.months('group_archive_index', 'test-slug'),
+                         [('2026-02', 1), ('2026-01', 1)])
+        self.assertEqual(
+            self.months('profile_archive_index', 'NoNameAuthor'),
+            [('2026-02', 1), ('2026-01', 1)])
+
+    def test_month_posts(self):
+        self.assertEqual(
+            self.month_posts('archive_month', 2026, 2),
+            {moment(2026, 2, 1), moment(2026, 2, 10)})
+        self.assertEqual(
+            self.month_posts('group_archive_month', 'test-slug', 2026, 1),
+            {moment(2026, 1, 31)})
+        self.assertEqual(
+            self.month_posts('profile_archive_month', 'other', 2025, 12),
+            {moment(2025, 12, 1)})
+        response = self.client.get(
+            reverse('posts:archive_month', args=(2026, 13)))
+        self.assertEqual(response.status_code, 404)
+
+    def test_month_uses_pub_date_range(self):
+        """Месяц выбирается сравнением pub_date, без функций над колонкой"""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('posts:archive_month', args=(2026, 2)))
+        sql = ' '.join(query['sql'] for query in queries).lower()
+        self.assertIn('"posts_post"."pub_date" >=', sql)
+        self.assertNotIn('django_datetime_extract', sql)
+
+    def test_counts_follow_changes(self):
+        month = month_of(timezone.now())
+
+        def count(**scope):
+            return MonthlyPostCount.objects.filter(
+                month=month, **{'author': None, 'group': None, **scope}
+            ).values_list('count', flat=True).first()
+
+        post = Post.objects.create(author=self.author, text='Новый')
+        self.assertEqual((count(), count(author=self.author)), (1, 1))
+        post.group = self.group
+        post.save()
+        self.assertEqual(count(group=self.group), 1)
+        post.author = self.other
+        post.group = None
+        post.save()
+        self.assertEqual(
+            (count(), count(author=self.author), count(author=self.other),
+             count(group=self.group)),
+            (1, 0, 1, 0))
+        post.delete()
+        self.assertEqual((count(), count(author=self.other)), (0, 0))
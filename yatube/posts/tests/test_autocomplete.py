@@ -0,0 +1,101 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.autocomplete import (CHANGE_KEY, GENERATION_KEY, GROUP, USER,
+                                PrefixIndex, SharedIndex, shared_index)
+from posts.models import Group
+
+User = get_user_model()
+
+
+class AutocompleteTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='leo', first_name='Лев', last_name='Толстой')
+        cls.group = Group.objects.create(
+            title='Лёгкое чтение', slug='light', description='Описание')
+
+    def setUp(self):
+        cache.clear()
+        shared_index.index = None
+
+    def test_prefix_index(self):
+        index = PrefixIndex()
+        index.add(USER, 1, 'Лев Толстой', 'leo', ('leo', 'Лев Толстой'))
+        index.add(USER, 2, 'lena', 'lena', ('lena',))
+        self.assertEqual([pk for _, pk, _, _ in index.search('le')], [2, 1])
+        self.assertEqual(index.search('ЛЕВ'),
+                         [(USER, 1, 'Лев Толстой', 'leo')])
+        self.assertEqual(index.search('le', limit=1)[0][1], 2)
+        index.add(USER, 1, 'Лев Толстой', 'tolstoy', ('tolstoy',))
+        self.assertEqual(index.search('leo'), [])
+        index.remove(USER, 2)
+        self.assertEqual(index.search('le'), [])
+        self.assertEqual(len(index), 1)
+
+    def test_endpoint(self):
+        response = Client().get(reverse('posts:autocomplete'), {'q': 'лё'})
+        self.assertEqual(response.json()['results'], [
+            {
+                'type': 'user',
+                'label': 'Лев Толстой',
+                'value': 'leo',
+                'url': reverse('posts:profile', args=('leo',)),
+            },
+            {
+                'type': 'group',
+                'label': 'Лёгкое чтение',
+                'value': 'light',
+                'url': reverse('posts:group_posts', args=('light',)),
+            },
+        ])
+        response = Client().get(reverse('posts:autocomplete'), {'q': 'толс'})
+        self.assertEqual(len(response.json()['results']), 1)
+        response = Client().get(reverse('posts:autocomplete'))
+        self.assertEqual(response.json()['results'], [])
+
+    def test_changes_reach_other_workers(self):
+        """Изменение в одном процессе видно в другом без полной сборки."""
+        writer, reader = SharedIndex(), SharedIndex()
+        writer.sync()
+        reader.sync()
+        index = reader.index
+        Group.objects.filter(pk=self.group.pk).update(title='Тяжёлое')
+        writer.publish(GROUP, self.group.pk)
+        self.assertEqual(writer.search('тяж')[0][1], self.group.pk)
+        self.assertEqual(reader.search('тяж')[0][1], self.group.pk)
+        self.assertEqual(reader.search('лег'), [])
+        self.assertIs(reader.index, index)
+
+    def test_rebuild_when_log_is_lost(self):
+        reader = SharedIndex()
+        reader.sync()
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        shared_index.publish(USER, self.user.pk)
+        cache.delete(CHANGE_KEY.format(cache.get(GENERATION_KEY)))
+        self.assertEqual(reader.search('leo'), [])
+
+    def test_invalidate_reaches_synced_workers(self):
+        """После сброса индекс перестраивают все процессы, а не только
+        первый, кто заново завел счетчик"""
+        first, second = SharedIndex(), SharedIndex()
+        first.sync()
+        second.sync()
+        User.objects.create_user(username='leonardo')
+        shared_index.invalidate()
+        self.assertEqual(len(first.search('leonardo')), 1)
+        self.assertEqual(len(second.search('leonardo')), 1)
+
+    def test_login_does_not_publish_changes(self):
+        """Сохранение last_login при входе не трогает индекс"""
+        with mock.patch.object(shared_index, 'changed') as changed:
+            self.user.save(update_fields=['last_login'])
+            changed.assert_not_called()
+            self.user.save(update_fields=['first_name'])
+            changed.assert_called_once_with(USER, self.user.pk)
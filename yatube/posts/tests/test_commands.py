@@ -0,0 +1,163 @@
+import os
+import tempfile
+import shutil
+from io import BytesIO, StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.conf import settings
+from PIL import Image
+from sorl.thumbnail import get_thumbnail
+
+from core.storage import is_sharded
+from posts.models import OrphanedImage, Post
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ShardMediaCommandTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoNameAuthor')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_new_uploads_are_sharded(self):
+        """Новые загрузки попадают в каталоги вида posts/ab/cd/"""
+        post = Post.objects.create(author=self.user, text='Тестовый пост')
+        post.image.save('new.gif', ContentFile(b'GIF89a'))
+        self.assertTrue(is_sharded(post.image.name))
+        self.assertTrue(post.image.name.startswith('posts/'))
+
+    def test_shard_media_moves_flat_files(self):
+        """Команда переносит старые файлы и обновляет пути в базе"""
+        flat_name = default_storage.save('posts/old.gif', ContentFile(b'x'))
+        post = Post.objects.create(
+            author=self.user, text='Тестовый пост', image=flat_name)
+        call_command('shard_media', batch_size=1, stdout=StringIO())
+        post.refresh_from_db()
+        self.assertTrue(is_sharded(post.image.name))
+        self.assertTrue(default_storage.exists(post.image.name))
+        self.assertFalse(default_storage.exists(flat_name))
+        moved_name = post.image.name
+        call_command('shard_media', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.image.name, moved_name)
+
+    def test_shard_media_dry_run(self):
+        """Пробный запуск ничего не меняет"""
+        flat_name = default_storage.save('posts/dry.gif', ContentFile(b'x'))
+        post = Post.objects.create(
+            author=self.user, text='Тестовый пост', image=flat_name)
+        call_command('shard_media', dry_run=True, stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.image.name, flat_name)
+        self.assertTrue(os.path.exists(default_storage.path(flat_name)))
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class CollectMediaGarbageCommandTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoNameAuthor')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create_post_with_image(self, name):
+        post = Post.objects.create(author=self.user, text='Тестовый пост')
+        post.image.save(name, ContentFile(b'GIF89a'))
+        return post
+
+    def test_replaced_and_deleted_images_are_tracked(self):
+        """Замененные и удаленные картинки попадают в очередь сборщика"""
+        post = self.create_post_with_image('first.gif')
+        first_name = post.image.name
+        post.image.save('second.gif', ContentFile(b'GIF89a'))
+        self.assertTrue(
+            OrphanedImage.objects.filter(name=first_name).exists())
+        second_name = post.image.name
+        post.delete()
+        self.assertTrue(
+            OrphanedImage.objects.filter(name=second_name).exists())
+
+    def test_collect_removes_only_unreferenced_files(self):
+        """Сборщик удаляет файлы, на которые больше никто не ссылается"""
+        post = self.create_post_with_image('kept.gif')
+        kept_name = post.image.name
+        orphan_name = default_storage.save('posts/orphan.gif',
+                                           ContentFile(b'GIF89a'))
+        OrphanedImage.objects.create(name=orphan_name)
+        OrphanedImage.objects.create(name=kept_name)
+        out = StringIO()
+        call_command('collect_media_garbage', dry_run=True, stdout=out)
+        self.assertTrue(default_storage.exists(orphan_name))
+        self.assertIn('6 байт', out.getvalue())
+        call_command('collect_media_garbage', stdout=StringIO())
+        self.assertFalse(default_storage.exists(orphan_name))
+        self.assertTrue(default_storage.exists(kept_name))
+        self.assertFalse(OrphanedImage.objects.exists())
+
+    def test_scan_finds_untracked_orphans(self):
+        """Обход каталога находит файлы, которых нет в очереди"""
+        orphan_name = default_storage.save('posts/ab/cd/lost.gif',
+                                           ContentFile(b'GIF89a'))
+        call_command('collect_media_garbage', scan=True, min_age=-60,
+                     stdout=StringIO())
+        self.assertFalse(default_storage.exists(orphan_name))
+
+    def test_kvstore_sweep_removes_stale_thumbnails(self):
+        """Чистка sorl-thumbnail удаляет миниатюры удаленных картинок"""
+        buffer = BytesIO()
+        Image.new('RGB', (20, 20)).save(buffer, 'png')
+        post = Post.objects.create(author=self.user, text='Тестовый пост')
+        post.image.save('thumb.png', ContentFile(buffer.getvalue()))
+        thumbnail = get_thumbnail(post.image, '10x10')
+        self.assertTrue(default_storage.exists(thumbnail.name))
+        Post.objects.filter(pk=post.pk).update(image='')
+        call_command('collect_media_garbage', kvstore=True,
+                     stdout=StringIO())
+        self.assertFalse(default_storage.exists(thumbnail.name))
+        self.assertFalse(default_storage.exists(post.image.name))
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class BackfillImageMetaCommandTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoNameAuthor')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_backfill_fills_placeholder(self):
+        """Команда заполняет превью у старых постов"""
+        buffer = BytesIO()
+        Image.new('RGB', (30, 10)).save(buffer, 'png')
+        name = default_storage.save('posts/old.png',
+                                    ContentFile(buffer.getvalue()))
+        post = Post.objects.create(author=self.user, text='Тестовый пост')
+        Post.objects.filter(pk=post.pk).update(image=name)
+        broken = Post.objects.create(author=self.user, text='Тестовый пост')
+        Post.objects.filter(pk=broken.pk).update(image='posts/missing.png')
+        call_command('backfill_image_meta', batch_size=1, stdout=StringIO())
+        post.refresh_from_db()
+        self.assertTrue(post.image_placeholder.startswith('data:image/png'))
+        broken.refresh_from_db()
+        self.assertEqual(broken.image_placeholder, '')
@@ -0,0 +1,71 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.duplicates import find_duplicate, signature, similarity
+from posts.models import Post, PostSignature, SignatureBucket
+
+User = get_user_model()
+
+TEXT = ('Сегодня весь день шел дождь, и мы гуляли по набережной, '
+        'смотрели на корабли и пили горячий чай из термоса. Вечером '
+        'зашли в книжный магазин и купили две новые книги о путешествиях.')
+
+
+class DuplicatesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoNameAuthor')
+        cls.post = Post.objects.create(author=cls.user, text=TEXT)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_signature(self):
+        self.assertIsNone(signature('Короткий текст'))
+        original = signature(TEXT)
+        self.assertEqual(similarity(original, signature(TEXT.upper())), 1)
+        self.assertGreater(
+            similarity(original, signature(TEXT.replace('две', 'три'))), 0.8)
+        self.assertLess(
+            similarity(original, signature(TEXT[::-1])), 0.2)
+
+    def test_find_duplicate(self):
+        self.assertEqual(
+            find_duplicate(TEXT + '!!!')[0], self.post.pk)
+        self.assertIsNone(find_duplicate(TEXT, exclude=self.post.pk))
+        self.assertIsNone(find_duplicate(TEXT[:60] + TEXT[::-1]))
+
+    def test_create_rejects_duplicate(self):
+        count = Post.objects.count()
+        response = self.authorized_client.post(
+            reverse('posts:post_create'),
+            {'text': TEXT.replace('чай', 'кофе')})
+        self.assertFormError(
+            response, 'form', 'text',
+            'Почти такая же запись уже опубликована')
+        self.assertEqual(Post.objects.count(), count)
+
+    def test_edit_keeps_own_post(self):
+        """Правка поста не считает дубликатом его же прежний текст"""
+        response = self.authorized_client.post(
+            reverse('posts:post_edit', args=[self.post.pk]),
+            {'text': TEXT + ' Было здорово.'})
+        self.assertRedirects(
+            response, reverse('posts:post_detail', args=[self.post.pk]))
+
+    def test_sign_posts_command(self):
+        short = Post.objects.create(author=self.user, text='Коротко')
+        PostSignature.objects.all().delete()
+        SignatureBucket.objects.all().delete()
+        call_command('sign_posts', batch_size=1, stdout=StringIO())
+        self.assertTrue(
+            PostSignature.objects.filter(post=self.post).exists())
+        self.assertFalse(PostSignature.objects.filter(post=short).exists())
+        self.assertEqual(
+            SignatureBucket.objects.filter(post=self.post).count(), 16)
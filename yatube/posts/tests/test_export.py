@@ -0,0 +1,83 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class ExportTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug',
+            description='Тестовое описание')
+        cls.posts = [
+            Post.objects.create(author=cls.author, group=cls.group,
+                                text='Первый пост'),
+            Post.objects.create(author=cls.other, text='Второй пост'),
+            Post.objects.create(author=cls.author, text='Третий пост'),
+        ]
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.other, text='Комментарий')
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def export(self, filename, **options):
+        path = os.path.join(self.directory, filename)
+        call_command('export_jsonl', output=path, batch_size=2,
+                     stdout=StringIO(), **options)
+        opener = gzip.open if filename.endswith('.gz') else open
+        with opener(path, 'rt', encoding='utf-8') as lines:
+            return [json.loads(line) for line in lines]
+
+    def test_export_all(self):
+        rows = self.export('posts.jsonl')
+        self.assertEqual(
+            [(row['type'], row['id']) for row in rows],
+            [('post', self.posts[0].pk), ('post', self.posts[1].pk),
+             ('comment', self.posts[0].comments.get().pk),
+             ('post', self.posts[2].pk)])
+        self.assertEqual(rows[0]['author'], 'author')
+        self.assertEqual(rows[0]['group'], 'test-slug')
+        self.assertEqual(rows[0]['text'], 'Первый пост')
+        self.assertIsNone(rows[0]['image'])
+        self.assertEqual(rows[2]['author'], 'other')
+        self.assertEqual(rows[2]['post'], self.posts[0].pk)
+
+    def test_export_author_gzip(self):
+        rows = self.export('author.jsonl.gz', author='author',
+                           no_comments=True)
+        self.assertEqual([row['id'] for row in rows],
+                         [self.posts[0].pk, self.posts[2].pk])
+
+    def test_endpoint_is_staff_only(self):
+        url = reverse('api:export')
+        client = Client()
+        client.force_login(self.author)
+        self.assertEqual(client.get(url).status_code, 302)
+        admin = User.objects.create_user(username='admin', is_staff=True)
+        client.force_login(admin)
+        response = client.get(url, {'gzip': '1', 'author': 'other'})
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        rows = [
+            json.loads(line) for line in gzip.decompress(
+                b''.join(response.streaming_content)).splitlines()
+        ]
+        self.assertEqual([row['type'] for row in rows], ['post'])
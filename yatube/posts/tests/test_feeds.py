@@ -0,0 +1,106 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+@override_settings(SITEMAP_SHARD_SIZE=2)
+class FeedsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='leo', first_name='Лев', last_name='Толстой')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug',
+            description='Тестовое описание')
+
+    def setUp(self):
+        self.client = Client()
+        self.posts = [
+            Post.objects.create(author=self.author, text=f'Пост {number}',
+                                group=self.group if number % 2 else None)
+            for number in range(3)
+        ]
+        connection.run_on_commit = []
+        cache.clear()
+
+    def commit(self):
+        """Выполняет отложенные on_commit: TestCase не фиксирует
+        транзакцию и сам их не запускает."""
+        callbacks, connection.run_on_commit = connection.run_on_commit, []
+        for _, callback in callbacks:
+            callback()
+
+    def get(self, name, *args):
+        response = self.client.get(reverse(f'posts:{name}', args=args))
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_feeds(self):
+        content = self.get('rss')
+        self.assertIn('<rss', content)
+        self.assertEqual(content.count('<item>'), 3)
+        content = self.get('group_atom', 'test-slug')
+        self.assertIn('<feed', content)
+        self.assertIn('Тестовая группа', content)
+        self.assertEqual(content.count('<entry>'), 1)
+        content = self.get('profile_rss', 'leo')
+        self.assertIn('Лев Толстой', content)
+        self.assertEqual(content.count('<item>'), 3)
+        response = self.client.get(reverse('posts:group_rss', args=['none']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_feed_is_cached_until_new_post(self):
+        self.get('atom')
+        with self.assertNumQueries(0):
+            self.get('atom')
+        Post.objects.create(author=self.author, text='Свежий пост')
+        self.commit()
+        self.assertIn('Свежий пост', self.get('atom'))
+
+    def test_group_feed_follows_moved_post(self):
+        self.assertIn('Пост 1', self.get('group_rss', 'test-slug'))
+        post = self.posts[1]
+        post.group = None
+        post.save()
+        self.commit()
+        self.assertNotIn('Пост 1', self.get('group_rss', 'test-slug'))
+
+    def test_sitemap_shards(self):
+        index = self.get('sitemap')
+        shards = re.findall(r'<loc>http://testserver(.*?)</loc>', index)
+        self.assertEqual(shards, [
+            reverse('posts:sitemap_shard', args=['posts', number])
+            for number in range(2)
+        ] + [reverse('posts:sitemap_shard', args=['groups', 0])])
+        content = self.get('sitemap_shard', 'posts', 1)
+        self.assertEqual(
+            re.findall(r'<loc>http://testserver(.*?)</loc>', content),
+            [reverse('posts:post_detail', args=[self.posts[2].pk])])
+        self.assertIn('<lastmod>', content)
+        self.assertIn(reverse('posts:group_posts', args=['test-slug']),
+                      self.get('sitemap_shard', 'groups', 0))
+        response = self.client.get(
+            reverse('posts:sitemap_shard', args=['posts', 2]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_only_changed_shard_is_rebuilt(self):
+        first = self.posts[0].pk
+        self.assertEqual(first % 2, 1)
+        self.get('sitemap_shard', 'posts', (first - 1) // 2)
+        self.get('sitemap_shard', 'posts', (first + 1) // 2)
+        Post.objects.create(author=self.author, text='Новый пост')
+        self.commit()
+        with self.assertNumQueries(1):
+            self.get('sitemap_shard', 'posts', (first - 1) // 2)
+        with self.assertNumQueries(2):
+            content = self.get('sitemap_shard', 'posts', (first + 1) // 2)
+        self.assertEqual(content.count('<url>'), 2)
@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.core.paginator import Page
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.feed import FollowFeed
+from posts.models import Follow, Group, GroupFollow, Post
+
+User = get_user_model()
+
+
+class FollowFeedTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.stranger = User.objects.create_user(username='stranger')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug',
+            description='Тестовое описание')
+        cls.posts = [
+            Post.objects.create(author=cls.author, text='автор'),
+            Post.objects.create(author=cls.stranger, group=cls.group,
+                                text='группа'),
+            Post.objects.create(author=cls.author, group=cls.group,
+                                text='автор в группе'),
+            Post.objects.create(author=cls.stranger, text='чужой'),
+        ]
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_feed_merges_authors_and_groups(self):
+        GroupFollow.objects.create(user=self.reader, group=self.group)
+        feed = FollowFeed(self.reader)
+        expected = [self.posts[2], self.posts[1], self.posts[0]]
+        self.assertEqual(feed.count(), 3)
+        self.assertEqual(feed[0:3], expected)
+        self.assertEqual(feed[1:2], expected[1:2])
+        self.assertEqual(feed[2], expected[2])
+
+    def test_follow_index_page(self):
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertIsInstance(response.context['page_obj'], Page)
+        self.assertEqual(list(response.context['page_obj']),
+                         [self.posts[2], self.posts[0]])
+
+    def test_group_follow_and_unfollow(self):
+        response = self.client.get(
+            reverse('posts:group_follow', args=['test-slug']))
+        self.assertRedirects(
+            response, reverse('posts:group_posts', args=['test-slug']))
+        self.client.get(reverse('posts:group_follow', args=['test-slug']))
+        self.assertEqual(self.reader.group_follows.count(), 1)
+        response = self.client.get(
+            reverse('posts:group_posts', args=['test-slug']))
+        self.assertTrue(response.context['following'])
+        self.assertEqual(
+            self.client.get(reverse('posts:follow_index'))
+            .context['page_obj'].paginator.count, 3)
+        self.client.get(reverse('posts:group_unfollow', args=['test-slug']))
+        self.assertEqual(self.reader.group_follows.count(), 0)
+
+    def test_group_follow_requires_login(self):
+        url = reverse('posts:group_follow', args=['test-slug'])
+        response = Client().get(url)
+        self.assertRedirects(
+            response, f"{reverse('users:login')}?next={url}")
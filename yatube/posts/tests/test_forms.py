@@ -73,8 +73,11 @@ class PostFormTest(TestCase):
             group__slug=self.group.slug,
             text=form_data.get('text'),
             author=self.user,
-            image='posts/small.gif'
+            image__regex=r'^posts/[0-9a-f]{2}/[0-9a-f]{2}/small\.gif$'
         ).exists())
+        post = Post.objects.get(text=form_data.get('text'))
+        self.assertTrue(
+            post.image_placeholder.startswith('data:image/png;base64,'))
 
     def test_edit_post_form(self):
         """Пост изменяется с помощью формы"""
@@ -118,3 +121,23 @@ class PostFormTest(TestCase):
             text=form_data.get('text'),
             post=self.post.id
         ).exists())
+
+    def test_comment_form_ajax(self):
+        """Запрос из JavaScript получает только новый комментарий
+        со статусом 201, а ошибки формы — в JSON
+        """
+        url = reverse('posts:add_comment', kwargs={'post_id': self.post.pk})
+        response = self.author_client.post(
+            url, {'text': 'Комментарий без перезагрузки'},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.status_code, 201)
+        self.assertTemplateUsed(response, 'posts/includes/comment.html')
+        self.assertTemplateNotUsed(response, 'base.html')
+        self.assertContains(
+            response, 'Комментарий без перезагрузки', status_code=201)
+        self.assertTrue(Comment.objects.filter(
+            text='Комментарий без перезагрузки', post=self.post).exists())
+        response = self.author_client.post(
+            url, {'text': ''}, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('text', response.json()['errors'])
@@ -0,0 +1,87 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+
+@override_settings(POSTS_LIMIT=2)
+class FragmentsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='leo')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug',
+            description='Тестовое описание')
+        cls.posts = [
+            Post.objects.create(author=cls.author, text=f'Пост {number}',
+                                group=cls.group if number % 2 else None)
+            for number in range(5)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def scroll(self, url):
+        """Тексты постов всех порций ленты, пока есть курсор."""
+        texts = []
+        cursor = ''
+        while True:
+            response = self.client.get(url, {'cursor': cursor})
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('<html', response.content.decode())
+            texts += [post.text for post in response.context['posts']]
+            cursor = response['X-Next-Cursor']
+            if not cursor:
+                return texts
+
+    def test_fragments_continue_feeds(self):
+        texts = [post.text for post in reversed(self.posts)]
+        self.assertEqual(self.scroll(reverse('posts:index_fragment')), texts)
+        self.assertEqual(
+            self.scroll(reverse('posts:group_fragment', args=['test-slug'])),
+            ['Пост 3', 'Пост 1'])
+        self.assertEqual(
+            self.scroll(reverse('posts:profile_fragment', args=['leo'])),
+            texts)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.client.force_login(self.reader)
+        self.assertEqual(
+            self.scroll(reverse('posts:follow_fragment')), texts)
+
+    def test_page_links_next_fragment(self):
+        response = self.client.get(reverse('posts:index'))
+        cursor_url = response.context['fragment_url'] + '?cursor='
+        self.assertContains(response, f'data-fragment-url="{cursor_url}')
+        start = response.content.decode().index(cursor_url)
+        url = response.content.decode()[start:].split('"')[0]
+        response = self.client.get(url)
+        self.assertEqual([post.text for post in response.context['posts']],
+                         ['Пост 2', 'Пост 1'])
+
+    def test_fragment_cache_and_etag(self):
+        url = reverse('posts:index_fragment')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(author=self.author, text='Новый пост')
+        for _, callback in connection.run_on_commit:
+            callback()
+        connection.run_on_commit = []
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Новый пост')
+
+    def test_follow_fragment_is_private(self):
+        url = reverse('posts:follow_fragment')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.force_login(self.reader)
+        self.assertIn('private', self.client.get(url)['Cache-Control'])
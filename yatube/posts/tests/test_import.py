@@ -0,0 +1,135 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.models import Comment, Follow, Group, MonthlyPostCount, Post
+from posts.search import search_posts
+
+User = get_user_model()
+
+PUB_DATE = datetime(2020, 5, 17, 10, 30, tzinfo=timezone.utc)
+
+
+class ImportTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def write(self, filename, rows):
+        path = os.path.join(self.directory, filename)
+        opener = gzip.open if filename.endswith('.gz') else open
+        with opener(path, 'wt', encoding='utf-8') as output:
+            for row in rows:
+                output.write(json.dumps(row, ensure_ascii=False) + '\n')
+        return path
+
+    def load(self, path, **options):
+        output = StringIO()
+        call_command('import_jsonl', path, batch_size=2, stdout=output,
+                     **options)
+        return output.getvalue()
+
+    def test_round_trip_keeps_ids_and_dates(self):
+        author = User.objects.create_user(username='author')
+        group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug',
+            description='Тестовое описание')
+        posts = [
+            Post.objects.create(author=author, group=group,
+                                text=f'Пост номер {number}')
+            for number in range(3)
+        ]
+        # DjangoJSONEncoder пишет время с точностью до миллисекунд.
+        Post.objects.update(pub_date=PUB_DATE)
+        Comment.objects.create(post=posts[1], author=author,
+                               text='Комментарий')
+        path = os.path.join(self.directory, 'posts.jsonl.gz')
+        call_command('export_jsonl', output=path, stdout=StringIO())
+        expected = list(Post.objects.order_by('pk').values_list(
+            'pk', 'text', 'pub_date', 'group__slug'))
+        Post.objects.all().delete()
+
+        self.load(path)
+        self.assertEqual(list(Post.objects.order_by('pk').values_list(
+            'pk', 'text', 'pub_date', 'group__slug')), expected)
+        comment = Comment.objects.get()
+        self.assertEqual(comment.post_id, posts[1].pk)
+        self.assertEqual(comment.author, author)
+        self.assertEqual(Post.objects.create(
+            author=author, text='Новый').pk, posts[-1].pk + 1)
+
+    def test_creates_missing_authors_and_groups(self):
+        path = self.write('posts.jsonl', [
+            {'type': 'post', 'id': 1, 'author': 'leo', 'group': 'books',
+             'text': 'Война и мир', 'pub_date': PUB_DATE.isoformat(),
+             'image': None},
+            {'type': 'comment', 'id': 1, 'post': 1, 'author': 'reader',
+             'text': 'Прочитал', 'created': PUB_DATE.isoformat()},
+            {'type': 'comment', 'id': 2, 'post': 99, 'author': 'reader',
+             'text': 'К чужому посту', 'created': PUB_DATE.isoformat()},
+        ])
+        output = self.load(path)
+        post = Post.objects.get()
+        self.assertEqual(post.author.username, 'leo')
+        self.assertFalse(post.author.has_usable_password())
+        self.assertEqual(post.group.slug, 'books')
+        self.assertEqual(post.pub_date, PUB_DATE)
+        self.assertEqual(Comment.objects.get().created, PUB_DATE)
+        self.assertIn('пропущено строк: 1', output)
+
+    def test_existing_posts_are_shifted(self):
+        author = User.objects.create_user(username='leo')
+        existing = Post.objects.create(author=author, text='Уже был')
+        path = self.write('posts.jsonl', [
+            {'type': 'post', 'id': 1, 'author': 'leo', 'group': None,
+             'text': 'Загруженный', 'pub_date': PUB_DATE.isoformat(),
+             'image': None},
+            {'type': 'comment', 'id': 1, 'post': 1, 'author': 'leo',
+             'text': 'Комментарий', 'created': PUB_DATE.isoformat()},
+        ])
+        self.load(path)
+        imported = Post.objects.get(text='Загруженный')
+        self.assertEqual(imported.pk, existing.pk + 1)
+        self.assertEqual(Comment.objects.get().post, imported)
+        self.assertEqual(Post.objects.get(pk=existing.pk).text, 'Уже был')
+
+    def test_duplicate_follows_are_skipped(self):
+        reader = User.objects.create_user(username='reader')
+        author = User.objects.create_user(username='leo')
+        Follow.objects.create(user=reader, author=author)
+        path = self.write('follows.jsonl', [
+            {'type': 'follow', 'user': 'reader', 'author': 'leo'},
+            {'type': 'follow', 'user': 'reader', 'author': 'leo'},
+            {'type': 'follow', 'user': 'reader', 'author': 'reader'},
+            {'type': 'follow', 'user': 'leo', 'author': 'reader'},
+        ])
+        output = self.load(path, skip_derived=True)
+        self.assertEqual(
+            set(Follow.objects.values_list('user__username',
+                                           'author__username')),
+            {('reader', 'leo'), ('leo', 'reader')})
+        self.assertIn('новых подписок: 1', output)
+
+    def test_derived_data_rebuilt(self):
+        path = self.write('posts.jsonl', [
+            {'type': 'post', 'id': number, 'author': 'leo', 'group': None,
+             'text': f'Севастопольские рассказы {number}',
+             'pub_date': PUB_DATE.isoformat(), 'image': None}
+            for number in range(1, 4)
+        ])
+        self.load(path)
+        results, _ = search_posts('севастопольские')
+        self.assertEqual(len(results), 3)
+        self.assertEqual(MonthlyPostCount.objects.get(
+            month=PUB_DATE.date().replace(day=1),
+            author=None, group=None).count, 3)
@@ -0,0 +1,88 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import PREVIEW_LENGTH, Group, Post
+
+User = get_user_model()
+
+
+class ListingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='leo', first_name='Лев', last_name='Толстой')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug',
+            description='Тестовое описание')
+
+    def setUp(self):
+        self.client = Client()
+        self.post = Post.objects.create(
+            author=self.author, group=self.group,
+            text='Начало поста. ' + 'слово ' * 100 + 'Конец поста.')
+        cache.clear()
+
+    def test_preview_is_kept_on_save(self):
+        self.assertEqual(len(self.post.preview), PREVIEW_LENGTH)
+        self.assertTrue(self.post.preview.startswith('Начало поста.'))
+        self.assertTrue(self.post.preview.endswith('…'))
+        self.post.text = 'Короткий пост'
+        self.post.save(update_fields=['text', 'preview'])
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.preview, 'Короткий пост')
+
+    def test_preview_follows_text_saved_alone(self):
+        """Сохранение только текста через update_fields обновляет и
+        начало текста в базе"""
+        self.post.text = 'Короткий пост'
+        self.post.save(update_fields=['text'])
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.preview, 'Короткий пост')
+
+    def test_listings_skip_unused_columns(self):
+        pages = (
+            reverse('posts:index'),
+            reverse('posts:group_posts', args=['test-slug']),
+            reverse('posts:profile', args=['leo']),
+        )
+        for url in pages:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                post = response.context['page_obj'][0]
+                self.assertIn('text', post.get_deferred_fields())
+                self.assertIn('Начало поста.', response.content.decode())
+                self.assertNotIn('Конец поста.', response.content.decode())
+                self.assertContains(response, reverse(
+                    'posts:post_detail', args=[self.post.pk]))
+        post = self.client.get(reverse('posts:index')).context['page_obj'][0]
+        self.assertIn('password', post.author.get_deferred_fields())
+        self.assertIn('title', post.group.get_deferred_fields())
+
+    def test_listings_do_not_load_relations_per_post(self):
+        """Посты из group.posts и author.posts знают свою группу и автора
+        без отдельных запросов на каждую карточку"""
+        Post.objects.bulk_create(
+            Post(author=self.author, group=self.group, text=f'Пост {number}')
+            for number in range(5))
+        pages = (
+            (reverse('posts:group_posts', args=['test-slug']), 3),
+            (reverse('posts:profile', args=['leo']), 4),
+        )
+        for url, queries in pages:
+            with self.subTest(url=url), self.assertNumQueries(queries):
+                cache.clear()
+                self.client.get(url)
+
+    def test_follow_feed_uses_listing(self):
+        reader = User.objects.create_user(username='reader')
+        self.client.force_login(reader)
+        self.client.get(reverse('posts:profile_follow', args=['leo']))
+        response = self.client.get(reverse('posts:follow_index'))
+        post = response.context['page_obj'][0]
+        self.assertEqual(post, self.post)
+        self.assertIn('text', post.get_deferred_fields())
+        self.assertContains(
+            response, reverse('posts:post_detail', args=[self.post.pk]))
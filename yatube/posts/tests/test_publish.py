@@ -0,0 +1,105 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from posts.models import Comment, DirtyPage, Group, Post
+from posts.publish import (file_path, group_path, mark_dirty, post_path,
+                           publish, publish_site, remove_page)
+
+User = get_user_model()
+
+PUBLISH_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(PUBLISH_PAGES=True, PUBLISH_ROOT=PUBLISH_ROOT)
+class PublishTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='leo')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug',
+            description='Тестовое описание')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(PUBLISH_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.post = Post.objects.create(
+            author=self.author, text='Тестовый пост', group=self.group)
+        connection.run_on_commit = []
+        cache.clear()
+
+    def dirty(self):
+        return set(DirtyPage.objects.values_list('path', flat=True))
+
+    def read(self, path):
+        with open(file_path(path), encoding='utf-8') as file:
+            return file.read()
+
+    def test_changes_queue_pages(self):
+        self.assertEqual(self.dirty(), {post_path(self.post.pk),
+                                        group_path('test-slug')})
+        DirtyPage.objects.all().delete()
+        Comment.objects.create(post=self.post, author=self.author,
+                               text='Комментарий')
+        self.assertEqual(self.dirty(), {post_path(self.post.pk)})
+        self.group.slug = 'new-slug'
+        self.group.save()
+        self.assertEqual(self.dirty(), {
+            post_path(self.post.pk), group_path('test-slug'),
+            group_path('new-slug')})
+
+    @override_settings(PUBLISH_PAGES=False)
+    def test_nothing_is_queued_when_disabled(self):
+        DirtyPage.objects.all().delete()
+        self.post.text = 'Новый текст'
+        self.post.save()
+        self.assertFalse(DirtyPage.objects.exists())
+
+    def test_publish_dirty(self):
+        call_command('publish_dirty', stdout=StringIO())
+        self.assertFalse(DirtyPage.objects.exists())
+        self.assertIn('Тестовый пост', self.read(post_path(self.post.pk)))
+        self.assertIn('Тестовый пост', self.read(group_path('test-slug')))
+        Comment.objects.create(post=self.post, author=self.author,
+                               text='Свежий комментарий')
+        call_command('publish_dirty', stdout=StringIO())
+        self.assertIn('Свежий комментарий',
+                      self.read(post_path(self.post.pk)))
+        path = post_path(self.post.pk)
+        self.post.delete()
+        call_command('publish_dirty', stdout=StringIO())
+        self.assertFalse(os.path.exists(file_path(path)))
+        self.assertNotIn('Тестовый пост', self.read(group_path('test-slug')))
+
+    def test_publish_site(self):
+        other = Post.objects.create(author=self.author, text='Без группы')
+        self.assertEqual(publish_site(workers=1, batch_size=1), 3)
+        self.assertFalse(DirtyPage.objects.exists())
+        self.assertIn('Без группы', self.read(post_path(other.pk)))
+        self.assertIn('Тестовая группа', self.read(group_path('test-slug')))
+
+    def test_query_pages_are_not_published(self):
+        """Вторая страница группы не выкладывается поверх первой"""
+        Post.objects.bulk_create(
+            Post(author=self.author, text=f'Пост {number}', group=self.group)
+            for number in range(settings.POSTS_LIMIT))
+        path = group_path('test-slug') + '?page=2'
+        remove_page(group_path('test-slug'))
+        DirtyPage.objects.all().delete()
+        mark_dirty([path])
+        self.assertFalse(DirtyPage.objects.exists())
+        self.assertEqual(publish([path]), 0)
+        self.assertFalse(os.path.exists(file_path(group_path('test-slug'))))
+        self.assertFalse(os.path.exists(file_path(path)))
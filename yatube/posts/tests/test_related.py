@@ -0,0 +1,106 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post, RelatedPost
+from posts.related import (TfidfMatrix, add_related, load_matrix,
+                           rebuild_related)
+
+User = get_user_model()
+
+TEXTS = (
+    'Кошки любят спать на теплом подоконнике',
+    'Моя кошка спит на подоконнике весь день',
+    'Рецепт борща со свеклой и капустой',
+    'Варим борщ: свекла, капуста, морковь',
+    'Футбольный матч закончился ничьей',
+    'Вчера смотрели футбольный матч',
+)
+
+
+class RelatedPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoNameAuthor')
+        cls.posts = [Post.objects.create(author=cls.user, text=text)
+                     for text in TEXTS]
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def build(self, *args):
+        out = StringIO()
+        call_command('build_related_posts', *args, stdout=out)
+        return out.getvalue()
+
+    def nearest(self, post):
+        return RelatedPost.objects.filter(post=post).order_by(
+            '-score').values_list('related', flat=True).first()
+
+    def test_matrix_rows_are_normalized(self):
+        matrix = TfidfMatrix((post.pk, post.text) for post in self.posts)
+        for row in range(len(matrix)):
+            weights = matrix.data[matrix.indptr[row]:matrix.indptr[row + 1]]
+            self.assertAlmostEqual(sum(w * w for w in weights), 1.0)
+
+    def test_nearest_post_shares_topic(self):
+        """Ближайший сосед поста — пост на ту же тему"""
+        self.build()
+        for first, second in zip(self.posts[::2], self.posts[1::2]):
+            with self.subTest(post=first.text):
+                self.assertEqual(self.nearest(first), second.pk)
+                self.assertEqual(self.nearest(second), first.pk)
+
+    def test_new_post_added_incrementally(self):
+        """Новый пост получает соседей и сам попадает к ним в списки"""
+        self.build()
+        post = Post.objects.create(
+            author=self.user, text='Кошки и котята спят на подоконнике')
+        self.build()
+        self.assertIn(self.nearest(post), (self.posts[0].pk,
+                                           self.posts[1].pk))
+        self.assertTrue(RelatedPost.objects.filter(
+            post=self.posts[0], related=post).exists())
+
+    def test_lonely_post_is_processed_once(self):
+        """Пост без соседей не пересчитывается при каждом запуске"""
+        self.build()
+        Post.objects.create(author=self.user, text='Гиппопотам')
+        self.assertIn('Обработано постов: 1,', self.build())
+        self.assertIn('Обработано постов: 0,', self.build())
+
+    def test_edited_post_is_refreshed(self):
+        """Измененный пост получает новых соседей и уходит из старых
+        списков"""
+        self.build()
+        post = self.posts[4]
+        post.text = 'Варим борщ из свеклы и капусты'
+        post.save()
+        self.assertIn('Обработано постов: 1,', self.build())
+        self.assertIn(self.nearest(post), (self.posts[2].pk,
+                                           self.posts[3].pk))
+        self.assertFalse(RelatedPost.objects.filter(
+            post=self.posts[5], related=post).exists())
+
+    def test_refresh_keeps_other_lists(self):
+        """Пересчитанный пост остается в чужих списках, пока похож на их
+        владельцев, даже если сам нашел соседей ближе"""
+        rebuild_related(load_matrix(), limit=1)
+        self.assertEqual(self.nearest(self.posts[0]), self.posts[1].pk)
+        twin = Post.objects.create(author=self.user, text=TEXTS[1])
+        add_related(load_matrix(), [self.posts[1].pk], limit=1)
+        self.assertEqual(self.nearest(self.posts[1]), twin.pk)
+        self.assertEqual(self.nearest(self.posts[0]), self.posts[1].pk)
+
+    def test_post_detail_shows_related(self):
+        self.build('--full')
+        response = self.guest_client.get(
+            reverse('posts:post_detail', args=[self.posts[2].pk]))
+        self.assertEqual(
+            [item.related for item in response.context['related']][0],
+            self.posts[3])
+        self.assertContains(response, 'Похожие записи')
@@ -0,0 +1,91 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post
+from posts.search import FTS_TABLE, probe_index
+from posts.stemmer import stem
+
+User = get_user_model()
+
+
+class StemmerTest(TestCase):
+    def test_word_forms_share_stem(self):
+        """Разные формы слова сводятся к одной основе"""
+        forms = (
+            ('кот', 'котов', 'коты'),
+            ('ваза', 'вазами', 'вазы'),
+            ('программы', 'программ', 'программами'),
+        )
+        for words in forms:
+            with self.subTest(words=words):
+                self.assertEqual(len({stem(word) for word in words}), 1)
+
+
+class SearchViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoNameAuthor')
+        cls.cats = Post.objects.create(
+            author=cls.user, text='Мои коты любят спать на подоконнике')
+        cls.dogs = Post.objects.create(
+            author=cls.user, text='Собаки гуляют во дворе')
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def search(self, query, **params):
+        return self.guest_client.get(
+            reverse('posts:search'), {'q': query, **params})
+
+    def test_search_finds_other_word_forms(self):
+        """Поиск находит пост по другой форме слова и подсвечивает ее"""
+        response = self.search('котов')
+        self.assertEqual(response.context['results'], [self.cats])
+        self.assertIn('<mark>коты</mark>', response.content.decode())
+
+    def test_index_follows_edits_and_deletes(self):
+        """Индекс обновляется при изменении и удалении поста"""
+        post = Post.objects.create(author=self.user, text='Про черепаху')
+        self.assertEqual(self.search('черепахи').context['results'], [post])
+        post.text = 'Про ежей'
+        post.save()
+        self.assertEqual(self.search('черепахи').context['results'], [])
+        self.assertEqual(self.search('ежи').context['results'], [post])
+        post.delete()
+        self.assertEqual(self.search('ежи').context['results'], [])
+
+    def test_search_without_index(self):
+        """Без FTS5 поиск идет по тексту постов"""
+        self.assertTrue(probe_index())
+        with mock.patch.dict('posts.search._available', {FTS_TABLE: False}):
+            response = self.search('котов')
+        self.assertEqual(response.context['results'], [self.cats])
+
+    def test_cursor_pagination(self):
+        """Результаты листаются курсором без повторов"""
+        posts = [
+            Post.objects.create(author=self.user, text=f'Попугай номер {i}')
+            for i in range(5)
+        ]
+        seen = []
+        cursor = ''
+        with self.settings(POSTS_LIMIT=2):
+            while True:
+                response = self.search('попугаи', cursor=cursor)
+                seen += response.context['results']
+                cursor = response.context['next_cursor']
+                if not cursor:
+                    break
+        self.assertEqual(sorted(post.pk for post in seen),
+                         sorted(post.pk for post in posts))
+
+    def test_empty_and_broken_queries(self):
+        for params in ({'q': ''}, {'q': '""*'}, {'q': 'кот', 'cursor': '!'}):
+            with self.subTest(params=params):
+                response = self.guest_client.get(reverse('posts:search'),
+                                                 params)
+                self.assertEqual(response.status_code, 200)
@@ -0,0 +1,54 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Follow
+from posts.suggestions import FollowGraph
+
+User = get_user_model()
+
+
+class FollowSuggestionsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader, cls.friend, cls.twin, cls.author, cls.star = (
+            User.objects.create_user(username=name)
+            for name in ('reader', 'friend', 'twin', 'author', 'star'))
+        for user, author in ((cls.reader, cls.friend),
+                             (cls.friend, cls.author),
+                             (cls.twin, cls.friend),
+                             (cls.twin, cls.star)):
+            Follow.objects.create(user=user, author=author)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+        call_command('build_follow_suggestions', stdout=StringIO())
+
+    def suggested(self, url):
+        return [suggestion.author
+                for suggestion in self.client.get(url).context['suggestions']]
+
+    def test_graph_adjacency(self):
+        graph = FollowGraph([(1, 2), (1, 3), (2, 3)])
+        node = graph.nodes
+        self.assertEqual(sorted(graph.following(node[1])),
+                         [node[2], node[3]])
+        self.assertEqual(sorted(graph.followers(node[3])),
+                         [node[1], node[2]])
+
+    def test_friends_of_friends_and_co_followers(self):
+        """Рекомендуются подписки подписок и авторы с похожей аудиторией"""
+        suggested = self.suggested(reverse('posts:follow_index'))
+        self.assertCountEqual(suggested, [self.author, self.star])
+
+    def test_followed_author_disappears(self):
+        """Автор пропадает из рекомендаций сразу после подписки"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        suggested = self.suggested(
+            reverse('posts:profile', args=[self.friend.username]))
+        self.assertEqual(suggested, [self.star])
@@ -0,0 +1,77 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post, PostTag
+from posts.tags import extract_tags
+
+User = get_user_model()
+
+
+class TagsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoNameAuthor')
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def tag_names(self, post):
+        return set(post.post_tags.values_list('tag__name', flat=True))
+
+    def feed(self, name, **params):
+        return self.guest_client.get(
+            reverse('posts:tag_posts', args=[name]), params)
+
+    def test_extract_tags(self):
+        self.assertEqual(
+            extract_tags('#Коты и #собаки, но не a#b и не ##c. #Коты'),
+            {'коты', 'собаки'})
+
+    def test_edit_changes_only_difference(self):
+        """Правка поста меняет только добавленные и убранные теги"""
+        post = Post.objects.create(author=self.user, text='#коты #собаки')
+        kept = post.post_tags.get(tag__name='коты').pk
+        self.authorized_client.post(
+            reverse('posts:post_edit', args=[post.pk]),
+            {'text': '#коты #ежи'})
+        self.assertEqual(self.tag_names(post), {'коты', 'ежи'})
+        self.assertTrue(PostTag.objects.filter(pk=kept).exists())
+
+    def test_tag_feed_with_cursor(self):
+        """Лента тега листается курсором от новых постов к старым"""
+        posts = [Post.objects.create(author=self.user, text=f'#попугаи {i}')
+                 for i in range(5)]
+        Post.objects.create(author=self.user, text='без тегов')
+        seen = []
+        cursor = ''
+        with self.settings(POSTS_LIMIT=2):
+            while True:
+                response = self.feed('Попугаи', cursor=cursor)
+                seen += response.context['posts']
+                cursor = response.context['next_cursor']
+                if not cursor:
+                    break
+        self.assertEqual(seen, posts[::-1])
+        self.assertContains(
+            response, f'href="{reverse("posts:tag_posts", args=["попугаи"])}"')
+
+    def test_unknown_tag_and_broken_cursor(self):
+        Post.objects.create(author=self.user, text='#коты')
+        self.assertEqual(self.feed('нет-такого').status_code, 404)
+        for cursor in ('!', 'WyJ4IiwxXQ', 'WzEsMl0'):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.feed('коты', cursor=cursor)
+                                 .status_code, 200)
+
+    def test_rebuild_command(self):
+        post = Post.objects.create(author=self.user, text='#коты')
+        Post.objects.filter(pk=post.pk).update(text='#ежи #кроты')
+        call_command('rebuild_tag_index', batch_size=1, stdout=StringIO())
+        self.assertEqual(self.tag_names(post), {'ежи', 'кроты'})
@@ -0,0 +1,81 @@
+import datetime
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Comment, Follow, Group, Post
+from posts.trending import current_score, record_activity
+
+User = get_user_model()
+
+
+class TrendingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoNameAuthor')
+        cls.group = Group.objects.create(
+            title='Тестовое название группы',
+            slug='test-slug',
+            description='Тестовое описание группы',
+        )
+        cls.quiet_group = Group.objects.create(
+            title='Тихая группа',
+            slug='quiet',
+            description='Тестовое описание группы',
+        )
+        cls.old = Post.objects.create(
+            author=cls.user, group=cls.group, text='Старый пост')
+        cls.new = Post.objects.create(
+            author=cls.user, group=cls.quiet_group, text='Новый пост')
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def trending(self):
+        response = self.guest_client.get(reverse('posts:trending'))
+        return (list(response.context['page_obj']),
+                list(response.context['groups']))
+
+    def test_comments_lift_post_and_group(self):
+        """Комментарии поднимают пост и его группу"""
+        posts, groups = self.trending()
+        self.assertEqual(posts[0], self.new)
+        for _ in range(2):
+            Comment.objects.create(post=self.old, author=self.user, text='!')
+        posts, groups = self.trending()
+        self.assertEqual(posts[0], self.old)
+        self.assertEqual(groups[0], self.group)
+
+    def test_follow_lifts_latest_post(self):
+        reader = User.objects.create_user(username='reader')
+        author = User.objects.create_user(username='author')
+        post = Post.objects.create(author=author, text='Пост автора')
+        Post.objects.filter(pk=post.pk).update(trend=0.0)
+        Follow.objects.create(user=reader, author=author)
+        self.assertEqual(self.trending()[0][0], post)
+
+    def test_old_activity_decays(self):
+        """Три события двое суток назад весят меньше одного сейчас"""
+        now = timezone.now()
+        for post in (self.old, self.new):
+            Post.objects.filter(pk=post.pk).update(trend=0.0)
+        for _ in range(3):
+            record_activity(self.old.pk, None, 1.0,
+                            now - datetime.timedelta(days=2))
+        record_activity(self.new.pk, None, 1.0, now)
+        self.assertEqual(self.trending()[0][:2], [self.new, self.old])
+        self.old.refresh_from_db()
+        self.assertAlmostEqual(current_score(self.old.trend, now), 3 / 2 ** 8)
+
+    def test_rebuild_matches_incremental(self):
+        Comment.objects.create(post=self.old, author=self.user, text='!')
+        before = dict(Post.objects.values_list('pk', 'trend'))
+        Post.objects.update(trend=0.0)
+        call_command('rebuild_trending', stdout=StringIO())
+        for pk, trend in Post.objects.values_list('pk', 'trend'):
+            self.assertAlmostEqual(trend, before[pk], places=6)
@@ -0,0 +1,152 @@
+import datetime
+import os
+import shutil
+import tempfile
+from http import HTTPStatus
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.conf import settings
+
+from posts.models import ChunkedUpload, Post
+from posts.uploads import AssembledUpload
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+TEMP_UPLOAD_ROOT = os.path.join(TEMP_MEDIA_ROOT, 'chunks')
+
+User = get_user_model()
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT,
+                   CHUNKED_UPLOAD_ROOT=TEMP_UPLOAD_ROOT)
+class ChunkedUploadTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoNameAuthor')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.user)
+
+    def start_upload(self):
+        response = self.author_client.post(
+            reverse('posts:upload_start'),
+            {'filename': 'small.gif', 'size': len(SMALL_GIF)},
+        )
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        return response.json()['token']
+
+    def send_chunk(self, token, start, data):
+        end = start + len(data) - 1
+        return self.author_client.generic(
+            'PUT',
+            reverse('posts:upload_chunk', kwargs={'token': token}),
+            data,
+            content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {start}-{end}/{len(SMALL_GIF)}',
+        )
+
+    def test_upload_in_chunks_and_create_post(self):
+        """Файл, собранный по частям, становится картинкой нового поста"""
+        token = self.start_upload()
+        response = self.send_chunk(token, 0, SMALL_GIF[:20])
+        self.assertEqual(response.json()['offset'], 20)
+        response = self.send_chunk(token, 20, SMALL_GIF[20:])
+        self.assertTrue(response.json()['complete'])
+        upload = ChunkedUpload.objects.get(token=token)
+        self.author_client.post(
+            reverse('posts:post_create'),
+            {'text': 'Пост с картинкой по частям', 'upload_token': token},
+        )
+        post = Post.objects.get(text='Пост с картинкой по частям')
+        self.assertTrue(post.image.name.endswith('/small.gif'))
+        with post.image.open('rb') as image:
+            self.assertEqual(image.read(), SMALL_GIF)
+        self.assertFalse(os.path.exists(upload.path))
+        self.assertFalse(ChunkedUpload.objects.filter(token=token).exists())
+
+    def test_wrong_offset_returns_current_position(self):
+        """Часть не с того места отклоняется, клиент узнает, где продолжить"""
+        token = self.start_upload()
+        self.send_chunk(token, 0, SMALL_GIF[:10])
+        response = self.send_chunk(token, 20, SMALL_GIF[20:])
+        self.assertEqual(response.status_code, HTTPStatus.CONFLICT)
+        self.assertEqual(response.json()['offset'], 10)
+        response = self.author_client.get(
+            reverse('posts:upload_chunk', kwargs={'token': token}))
+        self.assertEqual(response.json()['offset'], 10)
+
+    def test_unfinished_upload_is_rejected(self):
+        token = self.start_upload()
+        self.send_chunk(token, 0, SMALL_GIF[:10])
+        response = self.author_client.post(
+            reverse('posts:post_create'),
+            {'text': 'Недозагруженный пост', 'upload_token': token},
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        self.assertFalse(
+            Post.objects.filter(text='Недозагруженный пост').exists())
+
+    def test_assembled_file_is_opened_lazily(self):
+        """Собранный файл открывается только при чтении"""
+        token = self.start_upload()
+        self.send_chunk(token, 0, SMALL_GIF)
+        assembled = AssembledUpload(ChunkedUpload.objects.get(token=token))
+        self.assertIsNone(assembled._file)
+        self.assertEqual(assembled.read(), SMALL_GIF)
+        assembled.close()
+
+    def test_invalid_form_closes_assembled_file(self):
+        """Проверка формы открывает собранный файл, и view его закрывает"""
+        token = self.start_upload()
+        self.send_chunk(token, 0, SMALL_GIF)
+        opened = []
+
+        def tracking_open(*args, **kwargs):
+            opened.append(open(*args, **kwargs))
+            return opened[-1]
+
+        with mock.patch('posts.uploads.open', tracking_open, create=True):
+            response = self.author_client.post(
+                reverse('posts:post_create'),
+                {'text': '', 'upload_token': token},
+            )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(opened)
+        self.assertTrue(all(file.closed for file in opened))
+        self.assertTrue(ChunkedUpload.objects.filter(token=token).exists())
+
+    def test_purge_keeps_active_uploads(self):
+        """Очистка удаляет загрузки без новых частей, а не старые"""
+        old = timezone.now() - datetime.timedelta(hours=48)
+        active = self.start_upload()
+        idle = self.start_upload()
+        self.send_chunk(idle, 0, SMALL_GIF[:10])
+        ChunkedUpload.objects.update(created=old)
+        ChunkedUpload.objects.filter(token=idle).update(updated=old)
+        self.send_chunk(active, 0, SMALL_GIF[:10])
+        idle_path = ChunkedUpload.objects.get(token=idle).path
+        call_command('purge_chunked_uploads', stdout=StringIO())
+        self.assertTrue(ChunkedUpload.objects.filter(token=active).exists())
+        self.assertFalse(ChunkedUpload.objects.filter(token=idle).exists())
+        self.assertFalse(os.path.exists(idle_path))
@@ -0,0 +1,108 @@
+"""Популярные посты и группы с экспоненциальным затуханием активности.
+
+Каждое событие (новый пост, комментарий, подписка на автора) вносит вклад
+weight, который затухает вдвое за TRENDING_HALF_LIFE. Вместо текущей
+суммы хранится trend = log(Σ weight · exp(λ · t)), где t — время события
+от фиксированной эпохи. Все суммы затухают с одним множителем, поэтому
+порядок по trend совпадает с порядком по текущей популярности, и хранимое
+значение никогда не нужно пересчитывать: событие лишь прибавляет свой
+вклад через logaddexp. Логарифм нужен, чтобы exp(λ · t) не переполнялся.
+"""
+import datetime
+import math
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Comment, Group, Post
+
+EPOCH = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+POST_WEIGHT = 1.0
+COMMENT_WEIGHT = 1.0
+FOLLOW_WEIGHT = 2.0
+
+
+def event_score(moment, weight=1.0):
+    """Вклад события в trend."""
+    rate = math.log(2) / settings.TRENDING_HALF_LIFE
+    return math.log(weight) + (moment - EPOCH).total_seconds() * rate
+
+
+def logaddexp(first, second):
+    high, low = max(first, second), min(first, second)
+    return high + math.log1p(math.exp(low - high))
+
+
+def current_score(trend, now=None):
+    """Популярность на момент now в единицах веса события."""
+    return math.exp(trend - event_score(now or timezone.now()))
+
+
+def bump(model, pk, weight, moment=None):
+    score = event_score(moment or timezone.now(), weight)
+    with transaction.atomic():
+        trend = (model.objects.select_for_update().filter(pk=pk)
+                 .values_list('trend', flat=True).first())
+        if trend is not None:
+            model.objects.filter(pk=pk).update(
+                trend=logaddexp(trend, score))
+
+
+def record_activity(post_id, group_id, weight, moment=None):
+    bump(Post, post_id, weight, moment)
+    if group_id is not None:
+        bump(Group, group_id, weight, moment)
+
+
+def record_post(post):
+    record_activity(post.pk, post.group_id, POST_WEIGHT, post.pub_date)
+
+
+def record_comment(comment):
+    if comment.post_id is None:
+        return
+    group_id = (Post.objects.filter(pk=comment.post_id)
+                .values_list('group_id', flat=True).first())
+    record_activity(comment.post_id, group_id, COMMENT_WEIGHT,
+                    comment.created)
+
+
+def record_follow(follow):
+    """Подписка поднимает последний пост автора."""
+    latest = (Post.objects.filter(author_id=follow.author_id)
+              .order_by('-pub_date').values_list('pk', 'group_id').first())
+    if latest is not None:
+        record_activity(*latest, FOLLOW_WEIGHT)
+
+
+def rebuild_trending(batch_size=1000):
+    """Считает trend заново по постам и комментариям.
+
+    Подписки не хранят дату, поэтому их вклад после пересчета теряется.
+    """
+    groups = {}
+    last_pk = 0
+    while True:
+        posts = list(
+            Post.objects.filter(pk__gt=last_pk).order_by('pk')
+            .values_list('pk', 'group_id', 'pub_date')[:batch_size])
+        if not posts:
+            break
+        last_pk = posts[-1][0]
+        trends = {pk: event_score(pub_date, POST_WEIGHT)
+                  for pk, _, pub_date in posts}
+        for post_id, created in Comment.objects.filter(
+                post_id__in=trends).values_list('post_id', 'created'):
+            trends[post_id] = logaddexp(
+                trends[post_id], event_score(created, COMMENT_WEIGHT))
+        with transaction.atomic():
+            for pk, group_id, _ in posts:
+                Post.objects.filter(pk=pk).update(trend=trends[pk])
+                if group_id is not None:
+                    groups[group_id] = logaddexp(
+                        groups.get(group_id, 0.0), trends[pk])
+    with transaction.atomic():
+        Group.objects.exclude(pk__in=groups).update(trend=0.0)
+        for pk, trend in groups.items():
+            Group.objects.filter(pk=pk).update(trend=trend)
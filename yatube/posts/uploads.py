@@ -0,0 +1,118 @@
+import os
+import re
+import uuid
+
+from django.core.files.uploadedfile import UploadedFile
+from django.http import Http404
+
+from .models import ChunkedUpload
+
+BLOCK_SIZE = 64 * 1024
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+class AssembledUpload(UploadedFile):
+    """Собранный из частей файл, который хранилище может просто переместить.
+
+    FileSystemStorage переносит файлы с temporary_file_path() через
+    file_move_safe, поэтому картинка не копируется еще раз. Файл
+    открывается при первом обращении — его читает уже проверка формы, —
+    а закрывает view через close_upload(): request.close() о копии
+    request.FILES не знает.
+    """
+
+    def __init__(self, upload):
+        super().__init__(None, upload.filename, None, upload.size)
+        self.path = upload.path
+
+    def _get_file(self):
+        if self._file is None:
+            self._file = open(self.path, 'rb')
+        return self._file
+
+    def _set_file(self, file):
+        self._file = file
+
+    file = property(_get_file, _set_file)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+    def temporary_file_path(self):
+        return self.path
+
+
+def upload_status(upload):
+    return {
+        'token': str(upload.token),
+        'offset': upload.offset,
+        'size': upload.size,
+        'complete': upload.complete,
+    }
+
+
+def chunk_offset(request):
+    """Смещение части из заголовка Content-Range или параметра offset."""
+    content_range = request.META.get('HTTP_CONTENT_RANGE')
+    if content_range:
+        match = CONTENT_RANGE_RE.match(content_range.strip())
+        return int(match.group(1)) if match else None
+    offset = request.GET.get('offset', '')
+    return int(offset) if offset.isdigit() else None
+
+
+def write_chunk(upload, stream, offset, length):
+    """Пишет часть в файл блоками, не держа ее в памяти целиком.
+
+    Возвращает число записанных байт: если клиент оборвал соединение,
+    оно будет меньше length.
+    """
+    os.makedirs(os.path.dirname(upload.path), exist_ok=True)
+    mode = 'r+b' if os.path.exists(upload.path) else 'wb'
+    remaining = length
+    with open(upload.path, mode) as file:
+        file.seek(offset)
+        while remaining:
+            data = stream.read(min(BLOCK_SIZE, remaining))
+            if not data:
+                break
+            file.write(data)
+            remaining -= len(data)
+        file.truncate()
+    return length - remaining
+
+
+def get_finished_upload(request):
+    """Возвращает завершенную загрузку по upload_token из формы.
+
+    Если токен не передан, возвращает None.
+    """
+    token = request.POST.get('upload_token')
+    if not token:
+        return None
+    try:
+        token = uuid.UUID(token)
+    except ValueError:
+        raise Http404('Загрузка не найдена')
+    upload = ChunkedUpload.objects.filter(
+        token=token, user=request.user).first()
+    if upload is None or not upload.complete:
+        raise Http404('Загрузка не найдена')
+    return upload
+
+
+def files_with_upload(files, upload):
+    """Подставляет собранный файл в request.FILES как картинку поста."""
+    if upload is None:
+        return files
+    files = files.copy()
+    files['image'] = AssembledUpload(upload)
+    return files
+
+
+def close_upload(files):
+    """Закрывает собранный файл, подставленный files_with_upload()."""
+    image = files.get('image')
+    if isinstance(image, AssembledUpload):
+        image.close()
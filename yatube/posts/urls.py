@@ -1,21 +1,75 @@
 from django.urls import path
 
-from . import views
+from . import feeds, views
 
 
 app_name = 'posts'
 
 urlpatterns = [
     path('group/<slug:slug>/', views.group_posts, name='group_posts'),
+    path('group/<slug:slug>/rss/', feeds.GroupFeed(), name='group_rss'),
+    path('group/<slug:slug>/atom/',
+         feeds.AtomGroupFeed(),
+         name='group_atom'),
+    path('group/<slug:slug>/fragments/',
+         views.group_fragment,
+         name='group_fragment'),
+    path('group/<slug:slug>/follow/',
+         views.group_follow,
+         name='group_follow'),
+    path('group/<slug:slug>/unfollow/',
+         views.group_unfollow,
+         name='group_unfollow'),
+    path('group/<slug:slug>/archive/',
+         views.archive_index,
+         name='group_archive_index'),
+    path('group/<slug:slug>/archive/<int:year>/<int:month>/',
+         views.archive_month,
+         name='group_archive_month'),
     path('', views.index, name='index'),
+    path('fragments/', views.index_fragment, name='index_fragment'),
+    path('rss/', feeds.PostsFeed(), name='rss'),
+    path('atom/', feeds.AtomPostsFeed(), name='atom'),
+    path('sitemap.xml', views.sitemap_index, name='sitemap'),
+    path('sitemap-<slug:section>-<int:number>.xml',
+         views.sitemap_shard,
+         name='sitemap_shard'),
+    path('archive/', views.archive_index, name='archive_index'),
+    path('archive/<int:year>/<int:month>/',
+         views.archive_month,
+         name='archive_month'),
+    path('trending/', views.trending, name='trending'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path('profile/<str:username>/fragments/',
+         views.profile_fragment,
+         name='profile_fragment'),
+    path('profile/<str:username>/rss/',
+         feeds.AuthorFeed(),
+         name='profile_rss'),
+    path('profile/<str:username>/atom/',
+         feeds.AtomAuthorFeed(),
+         name='profile_atom'),
+    path('profile/<str:username>/archive/',
+         views.archive_index,
+         name='profile_archive_index'),
+    path('profile/<str:username>/archive/<int:year>/<int:month>/',
+         views.archive_month,
+         name='profile_archive_month'),
+    path('search/', views.search, name='search'),
+    path('autocomplete/', views.autocomplete, name='autocomplete'),
+    path('tag/<str:name>/', views.tag_posts, name='tag_posts'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path('posts/<int:post_id>/comment/',
          views.add_comment,
          name='add_comment'),
+    path('uploads/', views.upload_start, name='upload_start'),
+    path('uploads/<uuid:token>/', views.upload_chunk, name='upload_chunk'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('follow/fragments/',
+         views.follow_fragment,
+         name='follow_fragment'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
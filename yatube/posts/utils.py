@@ -1,8 +1,54 @@
+import base64
+import json
+
 from django.core.paginator import Paginator
 from django.conf import settings
+from django.utils.dateparse import parse_datetime
 
 
 def get_paginate(page_number, post_list):
     paginator = Paginator(post_list, settings.POSTS_LIMIT)
     page_obj = paginator.get_page(page_number)
     return page_obj
+
+
+def chunked(iterable, size):
+    """Разбивает поток на списки длиной не больше size."""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def encode_cursor(*values):
+    """Упаковывает ключ последней записи страницы в строку для URL."""
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Распаковывает курсор; для пустого или испорченного вернет None."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except ValueError:
+        return None
+    return values if isinstance(values, list) else None
+
+
+def decode_date_cursor(cursor):
+    """Курсор ленты от новых к старым: (pub_date, pk) или None."""
+    values = decode_cursor(cursor)
+    if not values or len(values) != 2 or not isinstance(values[1], int):
+        return None
+    try:
+        pub_date = parse_datetime(str(values[0]))
+    except ValueError:
+        return None
+    return (pub_date, values[1]) if pub_date is not None else None
@@ -1,31 +1,147 @@
+import os
+
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                set_response_etag)
+from django.views.decorators.http import require_http_methods, require_POST
 
-from .models import Group, Post, User, Follow
+from .models import (ChunkedUpload, Group, GroupFollow, MonthlyPostCount,
+                     Post, Tag, User, Follow)
+from .archive import month_range
+from .autocomplete import USER, shared_index
+from .feed import FollowFeed, page_keys
+from .feeds import (FRAGMENT_KEY, INDEX, SECTIONS, author_scope, cached,
+                    group_scope, render_shard, shard_count)
 from .forms import PostForm, CommentForm
-from .utils import get_paginate
+from .listing import listing
+from .search import search_posts
+from .suggestions import get_suggestions
+from .tags import tag_feed
+from .uploads import (chunk_offset, close_upload, files_with_upload,
+                      get_finished_upload, upload_status, write_chunk)
+from .utils import decode_date_cursor, encode_cursor, get_paginate
 
 
 def index(request):
     page_obj = get_paginate(
         request.GET.get('page'),
-        Post.objects.select_related('author', 'group')
+        listing(Post.objects.all())
     )
     context = {
-        'page_obj': page_obj
+        'page_obj': page_obj,
+        'fragment_url': reverse('posts:index_fragment'),
     }
     return render(request, 'posts/index.html', context)
 
 
+def render_fragment(request, posts, scope=None):
+    """Карточки постов ленты после курсора без оболочки страницы; курсор
+    следующей порции — в заголовке X-Next-Cursor.
+
+    Публичные ленты кешируются по поколению области (см. posts.feeds),
+    ленту подписок каждый пользователь собирает свою.
+    """
+    after = decode_date_cursor(request.GET.get('cursor'))
+    cursor = encode_cursor(after[0].isoformat(), after[1]) if after else ''
+
+    def build():
+        keys = page_keys(posts, settings.POSTS_LIMIT + 1, after)
+        next_cursor = ''
+        if len(keys) > settings.POSTS_LIMIT:
+            pub_date, pk = keys[settings.POSTS_LIMIT - 1]
+            next_cursor = encode_cursor(pub_date.isoformat(), pk)
+        pks = [pk for _, pk in keys[:settings.POSTS_LIMIT]]
+        found = listing(Post.objects.all()).in_bulk(pks)
+        content = render_to_string('posts/includes/post_fragment.html', {
+            'posts': [found[pk] for pk in pks if pk in found],
+        })
+        return content, next_cursor
+
+    if scope is None:
+        content, next_cursor = build()
+    else:
+        content, next_cursor = cached(
+            scope, FRAGMENT_KEY.format(scope, cursor), build)
+    response = HttpResponse(content)
+    response['X-Next-Cursor'] = next_cursor
+    set_response_etag(response)
+    patch_cache_control(response, max_age=0, public=scope is not None,
+                        private=scope is None)
+    return get_conditional_response(
+        request, etag=response['ETag'], response=response)
+
+
+def index_fragment(request):
+    return render_fragment(request, Post.objects.all(), INDEX)
+
+
+def group_fragment(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return render_fragment(request, group.posts.all(), group_scope(group.pk))
+
+
+def profile_fragment(request, username):
+    author = get_object_or_404(User, username=username)
+    return render_fragment(
+        request, author.posts.all(), author_scope(author.pk))
+
+
+@login_required
+def follow_fragment(request):
+    return render_fragment(request, FollowFeed(request.user))
+
+
+def sitemap_index(request):
+    shards = [
+        request.build_absolute_uri(
+            reverse('posts:sitemap_shard', args=[section, number]))
+        for section in SECTIONS
+        for number in range(shard_count(section))
+    ]
+    return render(request, 'sitemaps/index.xml', {'shards': shards},
+                  content_type='application/xml')
+
+
+def sitemap_shard(request, section, number):
+    if section not in SECTIONS or number >= shard_count(section):
+        raise Http404('Такой части карты сайта нет')
+    return HttpResponse(render_shard(request, section, number),
+                        content_type='application/xml')
+
+
+def trending(request):
+    page_obj = get_paginate(
+        request.GET.get('page'),
+        listing(Post.objects.order_by('-trend'))
+    )
+    context = {
+        'page_obj': page_obj,
+        'groups': Group.objects.order_by(
+            '-trend')[:settings.TRENDING_GROUPS_LIMIT],
+    }
+    return render(request, 'posts/trending.html', context)
+
+
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
     page_obj = get_paginate(
         request.GET.get('page'),
-        group.posts.select_related('author')
+        listing(group.posts.all(), related=('author',))
     )
+    following = request.user.is_authenticated and group.followers.filter(
+        user=request.user
+    ).exists()
     context = {
         'group': group,
         'page_obj': page_obj,
+        'following': following,
+        'fragment_url': reverse('posts:group_fragment', args=[slug]),
     }
     return render(request, 'posts/group_list.html', context)
 
@@ -34,7 +150,7 @@ def profile(request, username):
     author = get_object_or_404(User, username=username)
     page_obj = get_paginate(
         request.GET.get('page'),
-        author.posts.select_related('group')
+        listing(author.posts.all(), related=('group',))
     )
     following = author.following.filter(
         user__username=request.user
@@ -43,33 +159,142 @@ def profile(request, username):
         'author': author,
         'page_obj': page_obj,
         'following': following,
+        'suggestions': get_suggestions(request.user),
+        'fragment_url': reverse('posts:profile_fragment', args=[username]),
     }
     return render(request, 'posts/profile.html', context)
 
 
+def get_archive_scope(slug, username):
+    """Фильтр архива и аргументы его URL: весь сайт, группа или автор."""
+    if slug is not None:
+        return {'group': get_object_or_404(Group, slug=slug)}, 'group_', slug
+    if username is not None:
+        author = get_object_or_404(User, username=username)
+        return {'author': author}, 'profile_', username
+    return {}, '', None
+
+
+def archive_index(request, slug=None, username=None):
+    scope, prefix, arg = get_archive_scope(slug, username)
+    args = (arg,) if arg else ()
+    counts = MonthlyPostCount.objects.filter(
+        **{'author': None, 'group': None, **scope}, count__gt=0
+    ).order_by('-month').values_list('month', 'count')
+    months = [
+        (month, count, reverse(f'posts:{prefix}archive_month',
+                               args=args + (month.year, month.month)))
+        for month, count in counts
+    ]
+    context = {
+        **scope,
+        'months': months,
+    }
+    return render(request, 'posts/archive_index.html', context)
+
+
+def archive_month(request, year, month, slug=None, username=None):
+    if not (1 <= month <= 12 and 1 <= year < 9999):
+        raise Http404
+    scope, prefix, arg = get_archive_scope(slug, username)
+    start, end = month_range(year, month)
+    page_obj = get_paginate(
+        request.GET.get('page'),
+        listing(Post.objects.filter(
+            pub_date__gte=start, pub_date__lt=end, **scope
+        ))
+    )
+    context = {
+        **scope,
+        'month': start,
+        'index_url': reverse(f'posts:{prefix}archive_index',
+                             args=(arg,) if arg else ()),
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/archive_month.html', context)
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    results, next_cursor = search_posts(
+        query,
+        request.GET.get('cursor'),
+        settings.POSTS_LIMIT
+    )
+    context = {
+        'query': query,
+        'results': results,
+        'next_cursor': next_cursor,
+    }
+    return render(request, 'posts/search.html', context)
+
+
+def autocomplete(request):
+    results = []
+    for kind, _, label, value in shared_index.search(
+            request.GET.get('q', ''), settings.AUTOCOMPLETE_LIMIT):
+        if kind == USER:
+            url = reverse('posts:profile', args=(value,))
+        else:
+            url = reverse('posts:group_posts', args=(value,))
+        results.append({
+            'type': 'user' if kind == USER else 'group',
+            'label': label,
+            'value': value,
+            'url': url,
+        })
+    return JsonResponse({'results': results})
+
+
+def tag_posts(request, name):
+    tag = get_object_or_404(Tag, name=name.lower())
+    posts, next_cursor = tag_feed(
+        tag,
+        request.GET.get('cursor'),
+        settings.POSTS_LIMIT
+    )
+    context = {
+        'tag': tag,
+        'posts': posts,
+        'next_cursor': next_cursor,
+    }
+    return render(request, 'posts/tag_posts.html', context)
+
+
 def post_detail(request, post_id):
     post = get_object_or_404(Post.objects.select_related('author'), id=post_id)
     comments = post.comments.select_related('author')
+    related = post.related_posts.select_related('related').order_by(
+        '-score')[:settings.RELATED_POSTS_LIMIT]
     author = post.author
     context = {
         'author': author,
         'post': post,
         'form': CommentForm(),
         'comments': comments,
+        'related': related,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
 @login_required
 def post_create(request):
-    form = PostForm(request.POST or None, request.FILES or None)
-    if form.is_valid():
-        post = form.save(commit=False)
-        post.author = request.user
-        post.save()
-        return redirect('posts:profile', username=post.author)
+    upload = get_finished_upload(request)
+    files = files_with_upload(request.FILES, upload)
+    try:
+        form = PostForm(request.POST or None, files or None)
+        if form.is_valid():
+            post = form.save(commit=False)
+            post.author = request.user
+            post.save()
+            if upload is not None:
+                upload.delete()
+            return redirect('posts:profile', username=post.author)
+    finally:
+        close_upload(files)
     context = {
-        'form': form
+        'form': form,
+        'upload': upload,
     }
     return render(request, 'posts/create_post.html', context)
 
@@ -79,30 +304,44 @@ def post_edit(request, post_id):
     post = get_object_or_404(Post.objects.select_related('author'), pk=post_id)
     if request.user != post.author:
         return redirect('posts:post_detail', post_id=post_id)
-    form = PostForm(
-        request.POST or None,
-        request.FILES or None,
-        instance=post
-    )
-    if form.is_valid():
-        form.save()
-        return redirect('posts:post_detail', post_id=post_id)
+    upload = get_finished_upload(request)
+    files = files_with_upload(request.FILES, upload)
+    try:
+        form = PostForm(request.POST or None, files or None, instance=post)
+        if form.is_valid():
+            form.save()
+            if upload is not None:
+                upload.delete()
+            return redirect('posts:post_detail', post_id=post_id)
+    finally:
+        close_upload(files)
     context = {
         'form': form,
         'post': post,
+        'upload': upload,
     }
     return render(request, 'posts/create_post.html', context)
 
 
 @login_required
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    """Сохраняет комментарий. Запрос из JavaScript (X-Requested-With)
+    получает только разметку нового комментария со статусом 201 или
+    ошибки формы в JSON, остальные — редирект на страницу поста."""
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
         comment.save()
+        if request.is_ajax():
+            return render(request, 'posts/includes/comment.html',
+                          {'comment': comment}, status=201)
+    elif request.is_ajax():
+        return JsonResponse(
+            {'errors': form.errors.get_json_data()}, status=400,
+            json_dumps_params={'ensure_ascii': False})
     return redirect('posts:post_detail', post_id=post_id)
 
 
@@ -110,10 +349,12 @@ def add_comment(request, post_id):
 def follow_index(request):
     page_obj = get_paginate(
         request.GET.get('page'),
-        Post.objects.filter(author__following__user=request.user)
+        FollowFeed(request.user)
     )
     context = {
-        'page_obj': page_obj
+        'page_obj': page_obj,
+        'suggestions': get_suggestions(request.user),
+        'fragment_url': reverse('posts:follow_fragment'),
     }
     return render(request, 'posts/follow.html', context)
 
@@ -131,3 +372,60 @@ def profile_unfollow(request, username):
     user = get_object_or_404(User, username=username)
     Follow.objects.filter(user=request.user, author=user).delete()
     return redirect('posts:profile', username)
+
+
+@login_required
+def group_follow(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    GroupFollow.objects.get_or_create(user=request.user, group=group)
+    return redirect('posts:group_posts', slug)
+
+
+@login_required
+def group_unfollow(request, slug):
+    GroupFollow.objects.filter(user=request.user, group__slug=slug).delete()
+    return redirect('posts:group_posts', slug)
+
+
+@login_required
+@require_POST
+def upload_start(request):
+    filename = os.path.basename(request.POST.get('filename', ''))
+    size = request.POST.get('size', '')
+    if not filename or not size.isdigit():
+        return JsonResponse(
+            {'error': 'Нужно передать filename и size'}, status=400)
+    if not 0 < int(size) <= settings.CHUNKED_UPLOAD_MAX_SIZE:
+        return JsonResponse({'error': 'Недопустимый размер файла'}, status=413)
+    upload = ChunkedUpload.objects.create(
+        user=request.user,
+        filename=filename,
+        size=int(size),
+    )
+    return JsonResponse(upload_status(upload), status=201)
+
+
+@login_required
+@require_http_methods(['GET', 'POST', 'PUT'])
+def upload_chunk(request, token):
+    upload = get_object_or_404(ChunkedUpload, token=token, user=request.user)
+    if request.method == 'GET':
+        return JsonResponse(upload_status(upload))
+    offset = chunk_offset(request)
+    length = int(request.META.get('CONTENT_LENGTH') or 0)
+    if offset != upload.offset:
+        # Клиент должен продолжить с того места, которое мы уже приняли.
+        return JsonResponse(upload_status(upload), status=409)
+    if (length > settings.CHUNKED_UPLOAD_CHUNK_SIZE
+            or offset + length > upload.size):
+        return JsonResponse({'error': 'Слишком большая часть'}, status=413)
+    if write_chunk(upload, request, offset, length) != length:
+        return JsonResponse(upload_status(upload), status=400)
+    updated = ChunkedUpload.objects.filter(
+        pk=upload.pk, offset=offset).update(
+        offset=offset + length, updated=timezone.now())
+    if not updated:
+        upload.refresh_from_db()
+        return JsonResponse(upload_status(upload), status=409)
+    upload.offset = offset + length
+    return JsonResponse(upload_status(upload))
@@ -0,0 +1,27 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.db.models import Q
+
+from core.admin import LargeTableAdmin
+
+User = get_user_model()
+
+
+admin.site.unregister(User)
+
+
+@admin.register(User)
+class UserAdmin(LargeTableAdmin, BaseUserAdmin):
+    """Поиск пользователей, в том числе в автодополнении, по началу
+    username, имени, фамилии или email без учета регистра. Такое условие
+    не идет по индексу, но таблица пользователей много меньше таблиц
+    постов и комментариев.
+    """
+    search_fields = BaseUserAdmin.search_fields
+
+    def search_condition(self, search_term):
+        condition = Q(pk__in=[])
+        for field in self.search_fields:
+            condition |= Q(**{f'{field}__istartswith': search_term})
+        return condition
@@ -39,11 +39,13 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
     'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -80,6 +82,21 @@ CACHES = {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
+# Через кеш процессы сервера узнают об изменениях друг друга: поколения
+# лент, фрагментов и карты сайта, отметки опроса, журнал автодополнения.
+# Поэтому без DEBUG кеш общий и со счетчиками, которые увеличиваются
+# атомарно, — memcached. Части карты сайта бывают больше мегабайта,
+# memcached для них запускается с -I 4m.
+if not DEBUG:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+            'LOCATION': '127.0.0.1:11211',
+            'OPTIONS': {
+                'server_max_value_length': 4 * 1024 * 1024,
+            },
+        }
+    }
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
@@ -92,6 +109,19 @@ DATABASES = {
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+DEFAULT_FILE_STORAGE = 'core.storage.ShardedFileSystemStorage'
+# Как отдавать MEDIA_URL без DEBUG: 'sendfile' — самим процессом через
+# wsgi.file_wrapper, 'x-accel-redirect' — через nginx (internal location
+# MEDIA_ACCEL_REDIRECT_PREFIX), 'x-sendfile' — через apache/lighttpd.
+MEDIA_SERVE_MODE = 'sendfile'
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+MEDIA_CACHE_MAX_AGE = 60 * 60 * 24
+
+# Загрузка картинок по частям: куда собирать файлы, предельный размер
+# файла и одной части.
+CHUNKED_UPLOAD_ROOT = os.path.join(BASE_DIR, 'uploads')
+CHUNKED_UPLOAD_MAX_SIZE = 20 * 1024 * 1024
+CHUNKED_UPLOAD_CHUNK_SIZE = 1024 * 1024
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -110,6 +140,28 @@ AUTH_PASSWORD_VALIDATORS = [
 
 POSTS_LIMIT = 10
 LETTERS_LIMIT = 15
+# Сколько похожих записей хранить и показывать под постом.
+RELATED_POSTS_LIMIT = 5
+# Сколько авторов рекомендовать для подписки.
+FOLLOW_SUGGESTIONS_LIMIT = 5
+# Период полураспада вклада комментариев, постов и подписок в
+# популярность, секунды; сколько групп показывать на странице популярного.
+TRENDING_HALF_LIFE = 6 * 60 * 60
+TRENDING_GROUPS_LIMIT = 10
+# Сколько подсказок отдавать автодополнению.
+AUTOCOMPLETE_LIMIT = 10
+# Наибольший размер страницы JSON API (параметр limit).
+API_LIMIT_MAX = 100
+# Выкладывать ли страницы постов и групп на диск готовым HTML для
+# фронтового сервера (см. posts.publish) и куда.
+PUBLISH_PAGES = False
+PUBLISH_ROOT = os.path.join(BASE_DIR, 'published')
+# До скольких новых постов досчитывает опрос api/v1/.../poll/.
+POLL_LIMIT = 100
+# Сколько записей отдавать в RSS/Atom-лентах и сколько адресов класть в
+# одну часть карты сайта (протокол разрешает до 50 000).
+FEED_LIMIT = 20
+SITEMAP_SHARD_SIZE = 10000
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -136,3 +188,13 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 
 STATIC_URL = '/static/'
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+# Без DEBUG collectstatic добавляет в имена хеш содержимого и пишет рядом
+# сжатые .gz/.br копии; с DEBUG статика отдается из STATICFILES_DIRS как есть.
+if not DEBUG:
+    STATICFILES_STORAGE = (
+        'core.storage.CompressedManifestStaticFilesStorage')
+# Сколько кешировать статику без хеша в имени, секунды.
+STATIC_CACHE_MAX_AGE = 60 * 60
+# Ответы короче этого размера, байт, не сжимаются: выигрыш меньше затрат.
+COMPRESS_MIN_SIZE = 1024